@@ -60,6 +60,17 @@ if BACKUP_CHANNEL_ID:
     except: 
         BACKUP_CHANNEL_ID = -1001550472719
 
+# 🌐 রান মোড: 'polling' (ডিফল্ট) অথবা 'webhook'
+BOT_MODE = os.environ.get("BOT_MODE", "polling").lower()
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL")          # পাবলিক https URL (যেমন রেলওয়ে ডোমেইন)
+WEBHOOK_HOST = os.environ.get("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.environ.get("PORT", os.environ.get("WEBHOOK_PORT", "8080")))
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET")
+UPDATE_WORKERS = int(os.environ.get("UPDATE_WORKERS", "8"))
+UPDATE_QUEUE_SIZE = int(os.environ.get("UPDATE_QUEUE_SIZE", "1000"))
+# লোকাল ফেক টেলিগ্রাম সার্ভারে টেস্ট করার জন্য (যেমন http://127.0.0.1:8081)
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL")
+
 # ৩. ভ্যালিডেশন
 if not BOT_TOKEN:
     print("\n❌ CRITICAL: BOT_TOKEN missing! Set it in Environment Variables or 'secrets.py'.")
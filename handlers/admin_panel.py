@@ -4,7 +4,17 @@ import json
 import os
 import time
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
-from utils.utils import get_data, save_data, CUSTOM_FILE, load_users
+from utils.utils import get_data, save_data, CUSTOM_FILE, load_users, load_active_users, count_users
+from utils.utils_shop import flush_shops, get_shop_cache_stats
+from utils.chat_store import flush_all_stores
+from utils.session_store import get_session_stats
+from utils.file_id_cache import get_file_id_stats
+from utils.http_client import get_http_stats
+from utils.download_pipeline import get_download_stats
+from utils.mirror_race import get_mirror_stats
+from utils.translation import get_translation_stats
+from utils.update_dispatcher import get_dispatcher
+from handlers.tools.watermark.cache import get_cache_stats as get_wm_cache_stats
 from config import SUPER_ADMINS
 
 # প্লাগিন ম্যানেজার ইমপোর্ট
@@ -210,16 +220,18 @@ def register_admin_handlers(bot):
 
     @bot.message_handler(func=lambda m: m.from_user.id in SUPER_ADMINS and ADMIN_STATE.get(m.from_user.id) == "waiting_broadcast")
     def process_broadcast(message):
-        users = load_users()
-        c = 0
-        bot.reply_to(message, "⏳ Sending...")
-        for uid in users:
-            try:
-                bot.copy_message(uid, message.chat.id, message.message_id)
-                c+=1
-            except: pass
+        from handlers.broadcast import get_broadcast_engine
+        users = load_active_users()
+        status = bot.reply_to(message, "⏳ Sending...")
         del ADMIN_STATE[message.from_user.id]
-        bot.edit_message_text(f"✅ Sent to {c} users.", message.chat.id, message.message_id + 1)
+        get_broadcast_engine(bot).start_job(
+            from_chat_id=message.chat.id,
+            message_id=message.message_id,
+            admin_chat_id=message.chat.id,
+            status_msg_id=status.message_id,
+            user_ids=users.keys(),
+            skipped=count_users(active_only=False) - len(users)
+        )
 
     @bot.callback_query_handler(func=lambda c: c.data == "adm_backup_ul")
     def restore_ui(call):
@@ -235,6 +247,8 @@ def register_admin_handlers(bot):
             json.loads(downloaded)
             with open(CUSTOM_FILE, 'wb') as f: f.write(downloaded)
             bot.reply_to(message, "✅ Restored! Restarting...")
+            flush_shops()
+            flush_all_stores()
             os.execl(os.sys.executable, os.sys.executable, *os.sys.argv)
         except: bot.reply_to(message, "❌ Invalid JSON.")
 
@@ -242,11 +256,73 @@ def register_admin_handlers(bot):
     def analytics(call):
         kb = InlineKeyboardMarkup()
         kb.add(InlineKeyboardButton("📜 List", callback_data="adm_export"), InlineKeyboardButton("🔙 Back", callback_data="open_admin_panel"))
-        bot.edit_message_text(f"📊 Users: {len(load_users())}", call.message.chat.id, call.message.message_id, reply_markup=kb)
+        sc = get_shop_cache_stats()
+        active = count_users()
+        inactive = count_users(active_only=False) - active
+        text = (
+            f"📊 Users: {active}\n"
+            f"💤 Inactive (blocked/deleted): {inactive} — {inactive} sends saved per broadcast\n\n"
+            f"🏪 <b>Shop Cache</b>\n"
+            f"Hit rate: {sc['hit_rate'] * 100:.1f}% ({sc['hits']} hits / {sc['misses']} misses)\n"
+            f"Writes: {sc['writes']} → Flushes: {sc['flushes']} (dirty: {sc['dirty']})\n"
+            f"Flush: avg {sc['avg_flush_ms']} ms, max {sc['max_flush_ms']:.1f} ms"
+        )
+        dispatcher = get_dispatcher()
+        if dispatcher:
+            text += "\n\n🛣 <b>Update Lanes</b> (queue depth / avg & max wait)\n" + "\n".join(
+                f"#{l['lane']}: {l['depth']} queued, {l['avg_wait_ms']} / {l['max_wait_ms']} ms, {l['processed']} done"
+                for l in dispatcher.get_stats()
+            )
+        text += "\n\n🎨 <b>Watermark Caches</b> (hit rate / size / evictions)\n" + "\n".join(
+            f"{c['name']}: {c['hit_rate'] * 100:.0f}%, {c['entries']} items"
+            + (f" ({c['bytes'] / 1048576:.1f}/{c['max_bytes'] / 1048576:.0f} MB)" if c['name'] != "fonts" else "")
+            + f", {c['evictions']} evicted"
+            for c in get_wm_cache_stats()
+        )
+        sessions = get_session_stats()
+        text += (
+            f"\n\n🧠 <b>Sessions</b>: {sum(x['entries'] for x in sessions)} in RAM "
+            f"({sum(x['bytes'] for x in sessions) / 1048576:.1f} MB), {sum(x['spilled_entries'] for x in sessions)} on disk, "
+            f"{sum(x['expired'] for x in sessions)} expired, {sum(x['evicted'] for x in sessions)} evicted"
+        )
+        fc = get_file_id_stats()
+        text += (
+            f"\n\n📎 <b>file_id Reuse</b>: {fc['hit_rate'] * 100:.0f}% ({fc['hits']} reused / {fc['uploads']} uploaded, {fc['entries']} known)\n"
+            f"Saved: {fc['bytes_saved'] / 1048576:.1f} MB of {(fc['bytes_saved'] + fc['bytes_uploaded']) / 1048576:.1f} MB, {fc['stale']} stale"
+        )
+        hosts = get_http_stats()[:6]
+        if hosts:
+            text += "\n\n🌐 <b>HTTP Hosts</b> (p50 / p95, peak in-flight / pool)\n" + "\n".join(
+                f"{h['host']}: {h['requests']} req, {h['p50']} / {h['p95']}, {h['errors']} err, {h['retries']} retried, "
+                f"{h['peak_in_flight']}/{h['pool_size']}" + (f" ⚠️ saturated {h['saturated']}x" if h['saturated'] else "")
+                for h in hosts
+            )
+        downloads = get_download_stats()
+        if downloads:
+            text += "\n\n🚚 <b>Downloads</b> (active / done / failed, avg)\n" + "\n".join(
+                f"{d['name']}: {d['active']} active"
+                + (" (" + ", ".join(f"{k} {v}" for k, v in d['stages'].items()) + ")" if d['stages'] else "")
+                + f", {d['done']} done, {d['failed']} failed, {d['rejected']} rejected, avg {d['avg_ms'] / 1000:.1f}s"
+                + (f", cache {d['cache']['hit_rate'] * 100:.0f}% hit ({d['cache']['entries']} posts)" if d.get('cache') else "")
+                for d in downloads
+            )
+        for name, mirrors in get_mirror_stats().items():
+            if not mirrors: continue
+            text += f"\n\n🏁 <b>Mirrors ({name})</b> (EWMA latency / fail rate)\n" + "\n".join(
+                f"{'🔴' if m['state'] == 'open' else '🟡' if m['state'] == 'half-open' else '🟢'} {m['mirror']}: "
+                f"{m['latency_ms']:.0f} ms, {m['fail_rate'] * 100:.0f}% fail, {m['wins']} wins"
+                for m in mirrors
+            )
+        tr = get_translation_stats()
+        text += (
+            f"\n\n🈯 <b>Translations</b>: {tr['hit_rate'] * 100:.0f}% cached ({tr['entries']} stored), "
+            f"{tr['batched_texts']} texts in {tr['requests']} requests, {tr['failures']} failed, {tr['pending']} pending"
+        )
+        bot.edit_message_text(text, call.message.chat.id, call.message.message_id, reply_markup=kb)
 
     @bot.callback_query_handler(func=lambda c: c.data == "adm_export")
     def export_users(call):
-        out = "\n".join([f"{u} | {d.get('first_name')}" for u, d in load_users().items()])
+        out = "\n".join([f"{u} | {d.get('first_name')}" + (f" | inactive: {d.get('inactive_reason')}" if d.get("inactive") else "") for u, d in load_users().items()])
         bot.send_document(call.message.chat.id, io.BytesIO(out.encode()), visible_file_name="users.txt")
 
     @bot.callback_query_handler(func=lambda c: c.data == "adm_backup_dl")
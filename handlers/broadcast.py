@@ -1,7 +1,19 @@
 import telebot
+import os
 import time
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
-from utils.utils import load_users
+from utils.utils import load_active_users, count_users, mark_user_inactive
+from utils.broadcast_engine import BroadcastEngine
+from config import DATA_DIR
+
+BROADCAST_JOBS_DIR = os.path.join(DATA_DIR, "broadcasts")
+_engine = None
+
+def get_broadcast_engine(bot):
+    """Single engine per process so all broadcasts share one rate limit."""
+    global _engine
+    if _engine is None: _engine = BroadcastEngine(bot, BROADCAST_JOBS_DIR, on_dead_user=mark_user_inactive)
+    return _engine
 
 def register_broadcast_handlers(bot):
 
@@ -26,8 +38,8 @@ def register_broadcast_handlers(bot):
             send_admin_panel(bot, message.chat.id)
             return
 
-        users = load_users()
-        count = len(users)
+        count = count_users()
+        skipped = count_users(active_only=False) - count
 
         kb = InlineKeyboardMarkup()
         # We attach the message_id to the button data to copy it later
@@ -44,15 +56,14 @@ def register_broadcast_handlers(bot):
 
         bot.send_message(
             message.chat.id, 
-            f"👆 <b>Ready to Broadcast?</b>\nTarget: {count} users.", 
+            f"👆 <b>Ready to Broadcast?</b>\nTarget: {count} users.\n"
+            f"⏭ Skipping {skipped} inactive (blocked/deleted) users.", 
             reply_markup=kb
         )
 
-    # 3. Execution Loop
+    # 3. Execution (Background Job Engine)
     @bot.callback_query_handler(func=lambda c: c.data.startswith("do_cast_"))
     def execute_broadcast(call):
-        from handlers.admin_panel import send_admin_panel
-
         try:
             msg_id = int(call.data.split("_")[2])
         except:
@@ -60,44 +71,30 @@ def register_broadcast_handlers(bot):
             return
 
         admin_chat_id = call.message.chat.id
-        users = load_users()
-        
-        sent = 0
-        failed = 0
-        
+        users = load_active_users()
+
         status_msg = bot.edit_message_text(
             f"🚀 <b>Broadcasting...</b>\n0/{len(users)}",
             chat_id=admin_chat_id,
             message_id=call.message.message_id
         )
 
-        for i, user_id in enumerate(users.keys()):
-            try:
-                bot.copy_message(chat_id=user_id, from_chat_id=admin_chat_id, message_id=msg_id)
-                sent += 1
-            except:
-                failed += 1
-            
-            time.sleep(0.05) # Anti-flood delay
-            
-            # Update status every 10 users
-            if i % 10 == 0:
-                try:
-                    bot.edit_message_text(
-                        f"🚀 <b>Broadcasting...</b>\n{i}/{len(users)}\n✅ {sent} ❌ {failed}",
-                        chat_id=admin_chat_id,
-                        message_id=status_msg.message_id
-                    )
-                except: pass
-
-        bot.edit_message_text(
-            f"✅ <b>Broadcast Complete!</b>\n\n"
-            f"🎯 <b>Total:</b> {len(users)}\n"
-            f"✅ <b>Success:</b> {sent}\n"
-            f"🚫 <b>Blocked/Failed:</b> {failed}",
-            chat_id=admin_chat_id,
-            message_id=status_msg.message_id
+        # পোলিং থ্রেড ব্লক না করে ব্যাকগ্রাউন্ডে পাঠানো
+        get_broadcast_engine(bot).start_job(
+            from_chat_id=admin_chat_id,
+            message_id=msg_id,
+            admin_chat_id=admin_chat_id,
+            status_msg_id=status_msg.message_id,
+            user_ids=users.keys(),
+            on_done=lambda job: _back_to_panel(bot, job),
+            skipped=count_users(active_only=False) - len(users)
         )
-        
-        time.sleep(2)
-        send_admin_panel(bot, admin_chat_id)
+
+    # রিস্টার্টের আগে অসমাপ্ত ব্রডকাস্ট থাকলে সেগুলো আবার চালু করা
+    get_broadcast_engine(bot).resume_pending(on_done=lambda job: _back_to_panel(bot, job))
+
+
+def _back_to_panel(bot, job):
+    from handlers.admin_panel import send_admin_panel
+    time.sleep(2)
+    send_admin_panel(bot, job.meta["admin_chat_id"])
@@ -2,13 +2,14 @@ import os
 import sys
 import time
 import base64
-import requests
+from utils.http_client import http
 import json
 import shutil
 import importlib.util
 import logging
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import SUPER_ADMINS, GITHUB_TOKEN, REPO_NAME, GITHUB_USER
+from utils.session_store import SessionStore
 
 # লগিং সেটআপ
 logger = logging.getLogger(__name__)
@@ -18,7 +19,7 @@ PLUGIN_BASE_DIR = "handlers/plugins"
 if not os.path.exists(PLUGIN_BASE_DIR):
     os.makedirs(PLUGIN_BASE_DIR)
 
-CREATION_STATE = {}
+CREATION_STATE = SessionStore("plugin_creation", ttl=3600)
 
 # ==========================================
 # 🌐 GITHUB SYNC
@@ -33,7 +34,7 @@ def upload_to_github(file_path, content_bytes, commit_msg):
     
     sha = None
     try:
-        check = requests.get(url, headers=headers)
+        check = http.get(url, headers=headers)
         if check.status_code == 200: sha = check.json().get("sha")
     except: pass
 
@@ -46,12 +47,21 @@ def upload_to_github(file_path, content_bytes, commit_msg):
     if sha: data["sha"] = sha
 
     try:
-        resp = requests.put(url, headers=headers, data=json.dumps(data))
+        resp = http.put(url, headers=headers, data=json.dumps(data))
         return resp.status_code in [200, 201], "Synced"
     except Exception as e: return False, str(e)
 
 def restart_bot():
     logger.info("🔄 Restarting bot process...")
+    # os.execl এ atexit চলে না, তাই পেন্ডিং শপ ডাটা ও চ্যাট সেটিংস আগেই ডিস্কে লিখে ফেলা
+    try:
+        from utils.utils_shop import flush_shops
+        flush_shops()
+    except Exception as e: logger.error(f"Shop flush failed: {e}")
+    try:
+        from utils.chat_store import flush_all_stores
+        flush_all_stores()
+    except Exception as e: logger.error(f"Chat settings flush failed: {e}")
     os.execl(sys.executable, sys.executable, *sys.argv)
 
 # ==========================================
@@ -1,13 +1,14 @@
 import os
-import requests
+from utils.http_client import http
 import base64
 import json
 from telebot import types
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import GITHUB_TOKEN, REPO_NAME, GITHUB_USER, SUPER_ADMINS
+from utils.session_store import SessionStore
 
 # স্টেট ম্যানেজমেন্ট
-GH_STATE = {}
+GH_STATE = SessionStore("gh_editor", ttl=6 * 3600)
 
 # ==========================================
 # 🛠 GITHUB API HELPERS
@@ -21,7 +22,7 @@ def get_github_content(path=""):
     path = path.strip("/")
     url = f"https://api.github.com/repos/{GITHUB_USER}/{REPO_NAME}/contents/{path}"
     try:
-        resp = requests.get(url, headers=get_headers())
+        resp = http.get(url, headers=get_headers())
         return resp.json() if resp.status_code == 200 else []
     except: return []
 
@@ -30,7 +31,7 @@ def get_file_data(path):
     path = path.strip("/")
     url = f"https://api.github.com/repos/{GITHUB_USER}/{REPO_NAME}/contents/{path}"
     try:
-        resp = requests.get(url, headers=get_headers())
+        resp = http.get(url, headers=get_headers())
         if resp.status_code == 200:
             return resp.json()
     except: pass
@@ -57,7 +58,7 @@ def delete_item(path, sha=None):
     url = f"https://api.github.com/repos/{GITHUB_USER}/{REPO_NAME}/contents/{path}"
     data = {"message": f"Delete {path}", "sha": sha, "branch": "main"}
     try:
-        resp = requests.delete(url, headers=get_headers(), data=json.dumps(data))
+        resp = http.delete(url, headers=get_headers(), data=json.dumps(data))
         return resp.status_code in [200, 201], "Deleted"
     except Exception as e: return False, str(e)
 
@@ -80,14 +81,14 @@ def rename_item(old_path, new_path):
     
     try:
         # নতুন ফাইল পুশ
-        resp = requests.put(create_url, headers=get_headers(), data=json.dumps(create_data))
+        resp = http.put(create_url, headers=get_headers(), data=json.dumps(create_data))
         if resp.status_code not in [200, 201]:
             return False, f"Create Failed: {resp.status_code}"
         
         # ৩. পুরনো ফাইল ডিলিট করা
         del_url = f"https://api.github.com/repos/{GITHUB_USER}/{REPO_NAME}/contents/{old_path}"
         del_data = {"message": "Delete old file (Rename)", "sha": sha, "branch": "main"}
-        requests.delete(del_url, headers=get_headers(), data=json.dumps(del_data))
+        http.delete(del_url, headers=get_headers(), data=json.dumps(del_data))
         
         return True, "Renamed Successfully"
     except Exception as e: return False, str(e)
@@ -98,7 +99,7 @@ def push_to_github(path, content, msg="Update via Bot"):
     
     sha = None
     try:
-        check = requests.get(url, headers=get_headers())
+        check = http.get(url, headers=get_headers())
         if check.status_code == 200: sha = check.json().get("sha")
     except: pass
 
@@ -111,7 +112,7 @@ def push_to_github(path, content, msg="Update via Bot"):
     if sha: data["sha"] = sha
 
     try:
-        r = requests.put(url, headers=get_headers(), data=json.dumps(data))
+        r = http.put(url, headers=get_headers(), data=json.dumps(data))
         if r.status_code in [200, 201]: return True, "✅ Success"
         return False, f"Error: {r.status_code}"
     except Exception as e: return False, str(e)
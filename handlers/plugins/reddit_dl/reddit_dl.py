@@ -1,10 +1,14 @@
 import os
 import re
 import json
-import time
-import shutil
 import subprocess
-import requests
+import time
+from utils.http_client import http
+from utils.download_pipeline import DownloadPipeline, QueueFullError, UserLimitError, remove_file
+from utils.video_split import split_video
+from utils.download_cache import DownloadResultCache
+from utils.mirror_race import MirrorRacer
+from utils.translation import translator
 import html
 from urllib.parse import urlparse
 
@@ -17,7 +21,6 @@ for package in required_packages:
         subprocess.check_call(["pip", "install", package])
 
 import yt_dlp
-from deep_translator import GoogleTranslator
 from telebot import types
 from telebot.types import InputMediaPhoto, InputMediaVideo
 
@@ -39,6 +42,8 @@ MIRRORS = [
 ]
 UA_ANDROID = "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36"
 SETTINGS_FILE = "plugin_data_reddit.json"
+MAX_SIZE_MB = 45  # বটের ৫০ এমবি আপলোড লিমিটের নিচে
+METADATA_TIMEOUT = 8  # সেকেন্ড, পুরো রেসের জন্য
 
 # ==========================================
 # ⚙️ ২. ডাটা এক্সট্রাক্টর লজিক
@@ -47,25 +52,32 @@ SETTINGS_FILE = "plugin_data_reddit.json"
 def resolve_reddit_url(url):
     if "/s/" not in url: return url
     try:
-        res = requests.head(url, allow_redirects=True, headers={'User-Agent': UA_ANDROID}, timeout=5)
+        res = http.head(url, allow_redirects=True, headers={'User-Agent': UA_ANDROID}, timeout=5)
         return res.url
     except: return url
 
+# সব টার্গেট একসাথে রেস করে; ধীর/মরা মিরর হেলথ স্কোরে পিছিয়ে যায়, বারবার ফেইল করলে কিছুক্ষণ বাদ
+mirror_racer = MirrorRacer("reddit")
+
+def fetch_post_json(target_url, deadline=None):
+    # রেস শেষ হলেও হেরে যাওয়া রিকোয়েস্ট পুলের থ্রেড ধরে রাখে, তাই টাইমআউট রেসের ডেডলাইন ছাড়াবে না
+    timeout = 6 if deadline is None else min(6, deadline - time.monotonic())
+    if timeout <= 0: raise TimeoutError("metadata deadline passed")
+    res = http.get(target_url, headers={'User-Agent': UA_ANDROID}, timeout=timeout, retries=0)
+    if res.status_code != 200: raise ValueError(f"HTTP {res.status_code}")
+    return res.json()[0]['data']['children'][0]['data']
+
 def get_reddit_metadata(url):
     full_url = resolve_reddit_url(url)
     path_name = urlparse(full_url).path.split('?')[0]
-    targets = [full_url.split('?')[0].rstrip('/') + ".json"]
+    main = full_url.split('?')[0].rstrip('/') + ".json"
+    candidates = [(urlparse(main).netloc, main)]
     for m in MIRRORS:
-        targets.append(f"{m}{path_name}".rstrip('/') + ".json")
+        candidates.append((urlparse(m).netloc, f"{m}{path_name}".rstrip('/') + ".json"))
 
-    for target_url in targets:
-        try:
-            res = requests.get(target_url, headers={'User-Agent': UA_ANDROID}, timeout=6)
-            if res.status_code == 200:
-                data = res.json()
-                return data[0]['data']['children'][0]['data'], full_url
-        except: continue
-    return None, full_url
+    deadline = time.monotonic() + METADATA_TIMEOUT
+    _, post = mirror_racer.race(candidates, lambda u: fetch_post_json(u, deadline), timeout=METADATA_TIMEOUT)
+    return post, full_url
 
 # ==========================================
 # 📊 ৩. সেটিংস হ্যান্ডলার
@@ -88,7 +100,100 @@ def update_user_config(chat_id, key, value):
     with open(SETTINGS_FILE, 'w') as f: json.dump(data, f)
 
 # ==========================================
-# 📥 ৪. মেইন হ্যান্ডলার
+# 🚚 ৪. পাইপলাইন স্টেজ (metadata → fetch → split → upload)
+# ==========================================
+
+def fetch_metadata(bot, job):
+    """মেটাডাটা + ক্যাপশন; ফেরত দেয় কোন কোন মিডিয়া নামাতে হবে"""
+    post, full_url = get_reddit_metadata(job.payload.get('resolved') or job.payload['url'])
+    title = post.get('title', 'Reddit Media') if post else "Reddit Media"
+
+    # ক্যাপশন লজিক: কাস্টম > (অনুবাদ ? বাংলা : অরিজিনাল); কাস্টমটা আপলোডের সময় বসে (caption_for)
+    # অনুবাদ ব্যাকগ্রাউন্ডে চলে; আপলোডের আগে শেষ না হলে অরিজিনাল দিয়ে পাঠিয়ে পরে এডিট
+    job.caption = title
+    if job.payload['trans']: job.caption_future = translator.submit(title, 'bn')
+
+    # মিডিয়া টাইপ (Gallery/Image/Video)
+    if post and post.get('is_gallery') and 'media_metadata' in post:
+        bot.edit_message_text("📚 **Gallery detected! Fetching...**", job.chat_id, job.payload['status_id'])
+        items = []
+        for item in post.get('gallery_data', {}).get('items', []):
+            meta = post['media_metadata'].get(item['media_id'])
+            if meta and meta.get('status') == 'valid':
+                u = meta['s'].get('u', meta['s'].get('gif', '')).replace('&amp;', '&')
+                ext = "jpg" if "jpg" in u or "jpeg" in u else "png"
+                items.append(('url', u, f"{item['media_id']}.{ext}"))
+        return items
+
+    if post and (re.search(r'\.(jpeg|jpg|png|gif)$', post.get('url', ''), re.I) or post.get('post_hint') == 'image'):
+        img_url = post['url']
+        ext = img_url.split('.')[-1].split('?')[0] or "jpg"
+        if len(ext) > 4: ext = "jpg"
+        return [('url', img_url, f"image.{ext}")]
+
+    video_source = post.get('secure_media', {}).get('reddit_video', {}).get('fallback_url', full_url) if post else full_url
+    return [('ydl', video_source, None)]
+
+def post_cache_key(job):
+    """ক্যানোনিকাল পোস্ট আইডি: /s/ শেয়ার লিঙ্ক রিজলভ করে permalink এর comments/<id>"""
+    resolved = job.payload['resolved'] = resolve_reddit_url(job.payload['url'])
+    path = urlparse(resolved).path.rstrip('/')
+    match = re.search(r'/comments/(\w+)', path)
+    post_id = match.group(1) if match else f"{urlparse(resolved).netloc}{path}"
+    return f"{post_id}:{'bn' if job.payload['trans'] else 'orig'}"
+
+def caption_for(job):
+    return job.payload['custom_caption'] or job.caption or ""
+
+def edit_caption(bot, job, message):
+    if job.payload['custom_caption']: return
+    bot.edit_message_caption(caption_for(job)[:1000], job.chat_id, message.message_id)
+
+def media_kind(path):
+    return 'video' if path.endswith(('.mp4', '.mkv', '.webm', '.gif')) else 'photo'
+
+def fetch_item(job, idx, item):
+    """একটা মিডিয়া নিজের ফোল্ডারে নামানো (গ্যালারির ছবিগুলো প্যারালালে)"""
+    kind, source, name = item
+    out_dir = job.path(f"f{idx:03d}")
+    os.makedirs(out_dir, exist_ok=True)
+    if kind == 'url':
+        f_path = os.path.join(out_dir, name)
+        with http.get(source, headers={'User-Agent': UA_ANDROID}, timeout=10, stream=True) as res, open(f_path, 'wb') as f:
+            for chunk in res.iter_content(chunk_size=256 * 1024): f.write(chunk)
+        return [(media_kind(f_path), f_path)]
+    ydl_opts = {'outtmpl': f'{out_dir}/%(title)s.%(ext)s', 'quiet': True, 'user_agent': UA_ANDROID}
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl: ydl.download([source])
+    return [(media_kind(os.path.join(out_dir, f)), os.path.join(out_dir, f)) for f in sorted(os.listdir(out_dir))]
+
+def upload_media(bot, job, media):
+    """১০টা করে অ্যালবাম; প্রতিটি অ্যালবাম পাঠানোর পরই তার ফাইল মুছে ফেলা (ক্যাশ হিটে সোর্স = file_id)"""
+    sent = []
+    for start in range(0, len(media), 10):
+        batch = media[start:start + 10]
+        sources = [open(src, 'rb') if os.path.isfile(src) else src for _, src in batch]
+        try:
+            media_list = [
+                (InputMediaVideo if kind == 'video' else InputMediaPhoto)(f, caption=caption_for(job)[:1000] if start + i == 0 else None)
+                for i, ((kind, _), f) in enumerate(zip(batch, sources))
+            ]
+            # টেলিগ্রাম ১ আইটেমের media group নেয় না
+            if len(media_list) == 1: sent.append(send_single(bot, job, media_list[0]))
+            else: sent.extend(bot.send_media_group(job.chat_id, media_list, reply_to_message_id=job.payload['reply_to']))
+        finally:
+            for f in sources:
+                if not isinstance(f, str): f.close()
+            for _, src in batch:
+                if os.path.isfile(src): remove_file(src)
+    bot.delete_message(job.chat_id, job.payload['status_id'])
+    return sent
+
+def send_single(bot, job, m):
+    send = bot.send_video if isinstance(m, InputMediaVideo) else bot.send_photo
+    return send(job.chat_id, m.media, caption=m.caption, reply_to_message_id=job.payload['reply_to'])
+
+# ==========================================
+# 📥 ৫. মেইন হ্যান্ডলার
 # ==========================================
 
 def register_handlers(bot):
@@ -118,6 +223,16 @@ def register_handlers(bot):
         elif call.data == "rd_toggle_trans": update_user_config(chat_id, "trans", not conf['trans'])
         reddit_menu(call)
 
+    pipeline = DownloadPipeline(
+        "rd", metadata=lambda job: fetch_metadata(bot, job), fetch=fetch_item,
+        split=lambda job, kind, path: split_video(path, job.work_dir, MAX_SIZE_MB * 1024 * 1024),
+        upload=lambda job, media: upload_media(bot, job, media),
+        edit_caption=lambda job, message: edit_caption(bot, job, message),
+        cache=DownloadResultCache("rd"), cache_key=post_cache_key,
+        on_empty=lambda job: bot.edit_message_text("❌ No supported media found.", job.chat_id, job.payload['status_id']),
+        on_error=lambda job, e: bot.edit_message_text(f"❌ **Error:** `{html.escape(str(e))[:150]}`", job.chat_id, job.payload['status_id'], parse_mode="Markdown")
+    )
+
     @bot.message_handler(func=lambda m: m.text and ("reddit.com" in m.text or "v.redd.it" in m.text or "i.redd.it" in m.text) and get_user_config(m.chat.id).get('power', True))
     def handle_reddit_dl(message):
         chat_id = message.chat.id
@@ -129,66 +244,8 @@ def register_handlers(bot):
         custom_caption = parts[1].strip() if len(parts) > 1 else None
         
         status = bot.reply_to(message, "🔍 **Resolving & Analyzing...**")
-        dl_dir = f"downloads/rd_{chat_id}_{int(time.time())}"
-        os.makedirs(dl_dir, exist_ok=True)
-
-        try:
-            # ১. মেটাডাটা এক্সট্রাক্ট করা
-            post, full_url = get_reddit_metadata(url)
-            media_list = []
-            title = post.get('title', 'Reddit Media') if post else "Reddit Media"
-            
-            # ২. ক্যাপশন লজিক: কাস্টম > (অনুবাদ ? বাংলা : অরিজিনাল)
-            if custom_caption:
-                final_caption = custom_caption
-            elif conf['trans']:
-                try: final_caption = GoogleTranslator(source='auto', target='bn').translate(title[:4500])
-                except: final_caption = title
-            else:
-                final_caption = title
-
-            # ৩. মিডিয়া ডাউনলোড (Gallery/Image/Video)
-            if post and post.get('is_gallery') and 'media_metadata' in post:
-                bot.edit_message_text("📚 **Gallery detected! Fetching...**", chat_id, status.message_id)
-                gallery_items = post.get('gallery_data', {}).get('items', [])
-                for item in gallery_items:
-                    meta = post['media_metadata'].get(item['media_id'])
-                    if meta and meta.get('status') == 'valid':
-                        u = meta['s'].get('u', meta['s'].get('gif', '')).replace('&amp;', '&')
-                        res = requests.get(u, headers={'User-Agent': UA_ANDROID}, timeout=10)
-                        ext = "jpg" if "jpg" in u or "jpeg" in u else "png"
-                        with open(os.path.join(dl_dir, f"{item['media_id']}.{ext}"), 'wb') as f: f.write(res.content)
-            
-            elif post and (re.search(r'\.(jpeg|jpg|png|gif)$', post.get('url', ''), re.I) or post.get('post_hint') == 'image'):
-                img_url = post['url']
-                res = requests.get(img_url, headers={'User-Agent': UA_ANDROID}, timeout=10)
-                ext = img_url.split('.')[-1].split('?')[0] or "jpg"
-                if len(ext) > 4: ext = "jpg"
-                with open(os.path.join(dl_dir, f"image.{ext}"), 'wb') as f: f.write(res.content)
-            
-            else:
-                video_source = post.get('secure_media', {}).get('reddit_video', {}).get('fallback_url', full_url) if post else full_url
-                ydl_opts = {'outtmpl': f'{dl_dir}/%(title)s.%(ext)s', 'quiet': True, 'user_agent': UA_ANDROID}
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl: ydl.download([video_source])
-
-            # ৪. মিডিয়া গ্রুপ তৈরি ও আপলোড
-            files = sorted([os.path.join(dl_dir, f) for f in os.listdir(dl_dir)])
-            for i, f_path in enumerate(files):
-                cap = final_caption[:1000] if i == 0 else None
-                with open(f_path, 'rb') as f:
-                    if f_path.endswith(('.mp4', '.mkv', '.webm', '.gif')):
-                        media_list.append(InputMediaVideo(f.read(), caption=cap))
-                    else:
-                        media_list.append(InputMediaPhoto(f.read(), caption=cap))
-
-            if media_list:
-                bot.send_media_group(chat_id, media_list, reply_to_message_id=message.message_id)
-                bot.delete_message(chat_id, status.message_id)
-            else:
-                bot.edit_message_text("❌ No supported media found.", chat_id, status.message_id)
-
-        except Exception as e:
-            err = html.escape(str(e))[:150] # পার্সিং এরর ফিক্স
-            bot.edit_message_text(f"❌ **Error:** `{err}`", chat_id, status.message_id, parse_mode="Markdown")
-        finally:
-            if os.path.exists(dl_dir): shutil.rmtree(dl_dir) # রেলওয়ে মেমরি ক্লিনআপ
+        payload = {"url": url, "custom_caption": custom_caption, "trans": conf['trans'],
+                   "status_id": status.message_id, "reply_to": message.message_id}
+        try: pipeline.submit(message.from_user.id, chat_id, payload)
+        except UserLimitError: bot.edit_message_text("⏳ আপনার আগের ডাউনলোড এখনো চলছে, শেষ হলে আবার চেষ্টা করুন।", chat_id, status.message_id)
+        except QueueFullError: bot.edit_message_text("🚦 সার্ভার এখন ব্যস্ত, একটু পরে আবার চেষ্টা করুন।", chat_id, status.message_id)
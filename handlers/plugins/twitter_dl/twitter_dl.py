@@ -1,12 +1,12 @@
 import os
 import json
-import time
-import shutil
 import yt_dlp
-import requests
-import subprocess
+from utils.http_client import http
+from utils.download_pipeline import DownloadPipeline, QueueFullError, UserLimitError, remove_file
+from utils.video_split import split_video
+from utils.download_cache import DownloadResultCache
+from utils.translation import translator
 import re
-from deep_translator import GoogleTranslator
 from telebot import types
 from telebot.types import InputMediaPhoto, InputMediaVideo
 
@@ -19,6 +19,9 @@ TOOL_INFO = {
 SETTINGS_FILE = "plugin_data_twitter.json"
 COOKIES_FILE = "cookies.txt" 
 MAX_SIZE_MB = 45  # ৫০ এমবি-র নিচে নিরাপদ সীমা
+FRAGMENT_WORKERS = int(os.environ.get("TW_FRAGMENT_WORKERS", "4"))  # HLS/DASH ফ্র্যাগমেন্ট প্যারালালে
+VIDEO_EXTS = ('.mp4', '.mov', '.webm', '.mkv')
+PHOTO_EXTS = ('.jpg', '.jpeg', '.png', '.webp')
 # ================================================
 
 def get_user_config(chat_id):
@@ -39,41 +42,6 @@ def update_user_config(chat_id, key, value):
     data[str(chat_id)] = current
     with open(SETTINGS_FILE, 'w') as f: json.dump(data, f)
 
-# 🎞 ভিডিও স্প্লিট করার নিরাপদ ফাংশন (Fix for Empty File)
-def split_video(file_path, output_dir):
-    try:
-        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-            return []
-            
-        file_size = os.path.getsize(file_path) / (1024 * 1024)
-        if file_size <= MAX_SIZE_MB: return [file_path]
-        
-        # ffprobe দিয়ে সঠিক ডিউরেশন বের করা
-        cmd = f'ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{file_path}"'
-        duration_output = subprocess.check_output(cmd, shell=True).decode().strip()
-        if not duration_output: return [file_path]
-        duration = float(duration_output)
-        
-        parts_count = int(file_size / MAX_SIZE_MB) + 1
-        part_duration = duration / parts_count
-        
-        split_files = []
-        for i in range(parts_count):
-            start_time = i * part_duration
-            output_file = os.path.join(output_dir, f"part_{i+1}_{os.path.basename(file_path)}")
-            # -avoid_negative_ts 1 এবং সঠিক সিকিং ব্যবহার করে স্প্লিট
-            split_cmd = f'ffmpeg -ss {start_time} -t {part_duration} -i "{file_path}" -c copy -avoid_negative_ts 1 "{output_file}" -y -loglevel quiet'
-            subprocess.run(split_cmd, shell=True)
-            
-            # গুরুত্বপূর্ণ: চেক করা ফাইলটি খালি কি না
-            if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                split_files.append(output_file)
-        
-        return split_files if split_files else [file_path]
-    except Exception as e:
-        print(f"Split Error: {e}")
-        return [file_path]
-
 # 🔄 VxTwitter API (ইমেজ/ভিডিও মেটাডাটা ব্যাকআপ)
 def fetch_vxtwitter_api(url):
     try:
@@ -82,12 +50,126 @@ def fetch_vxtwitter_api(url):
         tweet_id = match.group(1)
         api_url = f"https://api.vxtwitter.com/Twitter/status/{tweet_id}"
         headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(api_url, headers=headers, timeout=15)
+        r = http.get(api_url, headers=headers, timeout=15)
         if r.status_code == 200: return r.json()
     except Exception as e:
         print(f"VxAPI Error: {e}")
     return None
 
+# ==================== PIPELINE STAGES ====================
+# metadata → fetch → split → upload (utils.download_pipeline), হ্যান্ডলার থ্রেড শুধু জব জমা দেয়
+
+def ydl_options(out_dir):
+    return {
+        'outtmpl': f'{out_dir}/%(id)s_%(index)s.%(ext)s',
+        'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
+        'quiet': True,
+        'concurrent_fragment_downloads': FRAGMENT_WORKERS,
+        'cookiefile': COOKIES_FILE if os.path.exists(COOKIES_FILE) else None
+    }
+
+def source_caption(text, job):
+    return f"{text}\n\n🔗 **Source:** {job.payload['url']}"
+
+def make_caption(text, job):
+    """মূল লেখার ক্যাপশন; অনুবাদ চালু থাকলে সেটা ব্যাকগ্রাউন্ডে (শেষ না হলে পাঠানোর পর এডিট)"""
+    if job.payload['trans'] and text:
+        job.caption_future = translator.submit(text, 'bn', wrap=lambda t: source_caption(t, job))
+    return source_caption(text, job)
+
+def fetch_metadata(job):
+    """Stage 1: yt-dlp info (no download), else the VxTwitter API. Returns the items to fetch."""
+    url = job.payload['url']
+    items = []
+    try:
+        with yt_dlp.YoutubeDL(ydl_options(job.work_dir)) as ydl:
+            info = ydl.extract_info(url, download=False)
+        if info:
+            entries = [e for e in (info.get('entries') or [info]) if e]
+            items = [('ydl', e) for e in entries]
+            if items: job.caption = make_caption(info.get('description') or info.get('title') or "Twitter Media", job)
+    except: pass
+
+    if not items:
+        api_data = fetch_vxtwitter_api(url)
+        if api_data:
+            job.caption = make_caption(api_data.get('text', 'Twitter Media'), job)
+            for m in api_data.get('media_extended', []):
+                if m.get('type') == 'image': items.append(('photo_url', m.get('url')))
+                elif m.get('type') in ['video', 'gif']: items.append(('vx_video', m.get('url')))
+    return items
+
+def tweet_cache_key(job):
+    """Same tweet via twitter.com / x.com / ?s= links → one cache entry (per translation setting)."""
+    match = re.search(r'status/(\d+)', job.payload['url'])
+    return f"{match.group(1)}:{'bn' if job.payload['trans'] else 'orig'}" if match else None
+
+def caption_for(job):
+    if job.payload['custom_cap']:
+        return f"📝 **Caption:** {job.payload['custom_cap']}\n\n🔗 **Source:** {job.payload['url']}"
+    return job.caption or ""
+
+def fetch_item(job, idx, item):
+    """Stage 2 (parallel per item): download one entry into its own folder."""
+    kind, source = item
+    if kind == 'photo_url': return [('photo', source)] # টেলিগ্রাম নিজেই URL থেকে নেয়
+    out_dir = job.path(f"f{idx}")
+    os.makedirs(out_dir, exist_ok=True)
+    if kind == 'vx_video':
+        f_path = os.path.join(out_dir, f"vx_vid_{idx}.mp4")
+        with http.get(source, stream=True) as r, open(f_path, 'wb') as f:
+            for chunk in r.iter_content(chunk_size=256 * 1024): f.write(chunk)
+        return [('video', f_path)]
+    with yt_dlp.YoutubeDL(ydl_options(out_dir)) as ydl:
+        ydl.process_ie_result(source, download=True)
+    media = []
+    for name in sorted(os.listdir(out_dir)):
+        f_path = os.path.join(out_dir, name)
+        if name.lower().endswith(VIDEO_EXTS): media.append(('video', f_path))
+        elif name.lower().endswith(PHOTO_EXTS): media.append(('photo', f_path))
+    return media
+
+def upload_media(bot, job, media):
+    """Stage 4: albums of up to 10 in order; each batch's files are deleted right after sending.
+    Sources are local files, URLs or (cache hit) file_ids. Returns the sent messages."""
+    chat_id, caption, sent = job.chat_id, caption_for(job)[:1024], []
+    for start in range(0, len(media), 10):
+        batch = media[start:start + 10]
+        handles, tg_media = [], []
+        try:
+            for kind, src in batch:
+                f = open(src, 'rb') if os.path.isfile(src) else src
+                if f is not src: handles.append(f)
+                tg_media.append(InputMediaVideo(f) if kind == 'video' else InputMediaPhoto(f))
+            if start == 0:
+                tg_media[0].caption = caption
+                tg_media[0].parse_mode = "Markdown"
+            try:
+                if len(tg_media) == 1: sent.append(send_single(bot, chat_id, tg_media[0]))
+                else: sent.extend(bot.send_media_group(chat_id, tg_media))
+            except Exception as e:
+                # বড় ফাইলের জন্য ৪১৩ এরর হ্যান্ডলিং
+                if "413" not in str(e) and "too large" not in str(e).lower(): raise
+                if start == 0: bot.send_message(chat_id, "⚠️ ফাইল বড় হওয়ায় একটি একটি করে পাঠানো হচ্ছে...")
+                for m in tg_media:
+                    if hasattr(m.media, 'seek'): m.media.seek(0)
+                    sent.append(send_single(bot, chat_id, m))
+        finally:
+            for f in handles: f.close()
+            for kind, src in batch:
+                if os.path.isfile(src): remove_file(src)
+    try: bot.delete_message(chat_id, job.payload['status_id'])
+    except: pass
+    return sent
+
+def edit_caption(bot, job, message):
+    if job.payload['custom_cap']: return # কাস্টম ক্যাপশন অনুবাদে বদলায় না
+    bot.edit_message_caption(caption_for(job)[:1024], job.chat_id, message.message_id, parse_mode="Markdown")
+
+def send_single(bot, chat_id, m):
+    if isinstance(m, InputMediaVideo): return bot.send_video(chat_id, m.media, caption=m.caption, parse_mode=m.parse_mode)
+    return bot.send_photo(chat_id, m.media, caption=m.caption, parse_mode=m.parse_mode)
+
 def register_handlers(bot):
     
     @bot.callback_query_handler(func=lambda c: c.data == "plugin_twitter_menu")
@@ -107,6 +189,15 @@ def register_handlers(bot):
         update_user_config(call.message.chat.id, key, not conf.get(key))
         twitter_menu(call)
 
+    pipeline = DownloadPipeline(
+        "tw", metadata=fetch_metadata, fetch=fetch_item, split=lambda job, kind, path: split_video(path, job.work_dir, MAX_SIZE_MB * 1024 * 1024),
+        upload=lambda job, media: upload_media(bot, job, media),
+        edit_caption=lambda job, message: edit_caption(bot, job, message),
+        cache=DownloadResultCache("tw"), cache_key=tweet_cache_key,
+        on_empty=lambda job: bot.edit_message_text("❌ No media found.", job.chat_id, job.payload['status_id']),
+        on_error=lambda job, e: bot.edit_message_text(f"❌ Upload Error: {str(e)}", job.chat_id, job.payload['status_id'])
+    )
+
     @bot.message_handler(func=lambda m: m.text and ("twitter.com" in m.text or "x.com" in m.text))
     def start_download(message):
         chat_id = message.chat.id
@@ -118,129 +209,7 @@ def register_handlers(bot):
         custom_cap = parts[1].strip() if len(parts) > 1 else None
 
         status = bot.send_message(chat_id, "⏳ **Analyzing Twitter Post...**")
-        dl_dir = f"temp_tw_{chat_id}_{int(time.time())}"
-        os.makedirs(dl_dir, exist_ok=True)
-        
-        final_caption = ""
-        media_list = [] 
-
-        # --- চেষ্টা ১: yt-dlp ---
-        ydl_opts = {
-            'outtmpl': f'{dl_dir}/%(id)s_%(index)s.%(ext)s',
-            'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-            'quiet': True,
-            'cookiefile': COOKIES_FILE if os.path.exists(COOKIES_FILE) else None
-        }
-
-        success_ydl = False
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                if info:
-                    files = [os.path.join(dl_dir, f) for f in os.listdir(dl_dir)]
-                    # শুধুমাত্র ডাউনলোড হওয়া এবং সলিড ফাইল ফিল্টার
-                    valid_files = [f for f in files if os.path.exists(f) and os.path.getsize(f) > 0]
-                    
-                    if valid_files:
-                        success_ydl = True
-                        text = info.get('description') or info.get('title') or "Twitter Media"
-                        if conf.get('trans') and text:
-                            try: text = GoogleTranslator(source='auto', target='bn').translate(text)
-                            except: pass
-                        final_caption = f"{text}\n\n🔗 **Source:** {url}"
-
-                        for f_path in sorted(valid_files):
-                            if f_path.lower().endswith(('.mp4', '.mov', '.webm', '.mkv')):
-                                parts = split_video(f_path, dl_dir)
-                                for p in parts: media_list.append(('video_file', p))
-                            elif f_path.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
-                                media_list.append(('photo_file', f_path))
-        except: pass
-
-        # --- চেষ্টা ২: VxTwitter API (Fallback) ---
-        if not success_ydl:
-            api_data = fetch_vxtwitter_api(url)
-            if api_data:
-                text = api_data.get('text', 'Twitter Media')
-                if conf.get('trans') and text:
-                    try: text = GoogleTranslator(source='auto', target='bn').translate(text)
-                    except: pass
-                final_caption = f"{text}\n\n🔗 **Source:** {url}"
-                media_extended = api_data.get('media_extended', [])
-                for idx, m in enumerate(media_extended):
-                    m_url, m_type = m.get('url'), m.get('type')
-                    if m_type == 'image': media_list.append(('photo_url', m_url))
-                    elif m_type in ['video', 'gif']:
-                        try:
-                            r = requests.get(m_url, stream=True)
-                            f_path = os.path.join(dl_dir, f"vx_vid_{idx}.mp4")
-                            with open(f_path, 'wb') as f:
-                                for chunk in r.iter_content(chunk_size=8192): f.write(chunk)
-                            
-                            if os.path.exists(f_path) and os.path.getsize(f_path) > 0:
-                                parts = split_video(f_path, dl_dir)
-                                for p in parts: media_list.append(('video_file', p))
-                        except: pass
-
-        # --- ফাইনাল সেন্ডিং (The Fix) ---
-        if custom_cap:
-             final_caption = f"📝 **Caption:** {custom_cap}\n\n🔗 **Source:** {url}"
-
-        if media_list:
-            try:
-                tg_media = []
-                # প্রতিটি ফাইল পাঠানোর আগে চেক করা হচ্ছে
-                for m_type, m_source in media_list:
-                    if 'file' in m_type:
-                        if not os.path.exists(m_source) or os.path.getsize(m_source) == 0:
-                            continue # খালি ফাইল হলে বাদ দাও
-                        
-                        # ফাইল হ্যান্ডলার তৈরি
-                        f_handle = open(m_source, 'rb')
-                        if m_type == 'video_file':
-                            tg_media.append(InputMediaVideo(f_handle))
-                        else:
-                            tg_media.append(InputMediaPhoto(f_handle))
-                    elif m_type == 'photo_url':
-                        tg_media.append(InputMediaPhoto(m_source))
-
-                if not tg_media:
-                    bot.edit_message_text("❌ Media is empty or corrupted.", chat_id, status.message_id)
-                    return
-
-                # প্রথম আইটেমে ক্যাপশন যুক্ত করা
-                tg_media[0].caption = final_caption[:1024]
-                tg_media[0].parse_mode = "Markdown"
-
-                try:
-                    if len(tg_media) == 1:
-                        m = tg_media[0]
-                        if isinstance(m, InputMediaVideo):
-                            bot.send_video(chat_id, m.media, caption=m.caption, parse_mode=m.parse_mode)
-                        else:
-                            bot.send_photo(chat_id, m.media, caption=m.caption, parse_mode=m.parse_mode)
-                    else:
-                        bot.send_media_group(chat_id, tg_media)
-                    
-                    bot.delete_message(chat_id, status.message_id)
-                except Exception as e:
-                    # বড় ফাইলের জন্য ৪১৩ এরর হ্যান্ডলিং
-                    if "413" in str(e) or "too large" in str(e).lower():
-                        bot.send_message(chat_id, "⚠️ ফাইল বড় হওয়ায় একটি একটি করে পাঠানো হচ্ছে...")
-                        for m in tg_media:
-                            # ফাইল হ্যান্ডলার রিবাইন্ড করা জরুরি যদি আগের বার ফেইল করে
-                            if isinstance(m, InputMediaVideo):
-                                bot.send_video(chat_id, m.media, caption=final_caption[:1024] if m == tg_media[0] else None)
-                            else:
-                                bot.send_photo(chat_id, m.media, caption=final_caption[:1024] if m == tg_media[0] else None)
-                        bot.delete_message(chat_id, status.message_id)
-                    else:
-                        raise e
-                        
-            except Exception as e:
-                bot.edit_message_text(f"❌ Upload Error: {str(e)}", chat_id, status.message_id)
-        else:
-            bot.edit_message_text("❌ No media found.", chat_id, status.message_id)
-
-        # ক্লিনআপ (অস্থায়ী ফোল্ডার মুছে ফেলা)
-        if os.path.exists(dl_dir): shutil.rmtree(dl_dir, ignore_errors=True)
+        payload = {"url": url, "custom_cap": custom_cap, "trans": conf.get('trans'), "status_id": status.message_id}
+        try: pipeline.submit(message.from_user.id, chat_id, payload)
+        except UserLimitError: bot.edit_message_text("⏳ আপনার আগের ডাউনলোড এখনো চলছে, শেষ হলে আবার চেষ্টা করুন।", chat_id, status.message_id)
+        except QueueFullError: bot.edit_message_text("🚦 সার্ভার এখন ব্যস্ত, একটু পরে আবার চেষ্টা করুন।", chat_id, status.message_id)
@@ -1,9 +1,10 @@
 import os
-import requests
+from utils.http_client import http
 import base64
 import json
 from telebot import types
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+from utils.session_store import SessionStore
 
 # প্লাগইন ইনফো
 TOOL_INFO = {
@@ -14,7 +15,7 @@ TOOL_INFO = {
 # ডাটা ফাইল পাথ
 BASE_DIR = os.path.dirname(__file__)
 USER_DATA_FILE = os.path.join(BASE_DIR, "user_gh_data.json")
-GH_STATE = {}
+GH_STATE = SessionStore("user_github", ttl=6 * 3600)
 
 # ==========================================
 # 💾 DATABASE HELPERS
@@ -61,7 +62,7 @@ def get_repos_list(user_id):
     if not creds: return []
     url = "https://api.github.com/user/repos?sort=pushed&per_page=30"
     try:
-        resp = requests.get(url, headers=get_headers(creds['token']))
+        resp = http.get(url, headers=get_headers(creds['token']))
         return resp.json() if resp.status_code == 200 else []
     except: return []
 
@@ -75,17 +76,17 @@ def api_request(method, user_id, path="", data=None):
     
     try:
         if method == "GET":
-            resp = requests.get(url, headers=headers)
+            resp = http.get(url, headers=headers)
             if resp.status_code == 200: return True, resp.json()
             return False, f"HTTP {resp.status_code}"
         
         elif method == "PUT":
-            resp = requests.put(url, headers=headers, data=json.dumps(data))
+            resp = http.put(url, headers=headers, data=json.dumps(data))
             if resp.status_code in [200, 201]: return True, "Success"
             return False, f"Err: {resp.json().get('message')}"
             
         elif method == "DELETE":
-            resp = requests.delete(url, headers=headers, data=json.dumps(data))
+            resp = http.delete(url, headers=headers, data=json.dumps(data))
             if resp.status_code in [200, 201]: return True, "Success"
             return False, str(resp.status_code)
 
@@ -287,7 +288,7 @@ def register_handlers(bot):
         username = GH_STATE[user_id]["temp_user"]
         
         headers = {"Authorization": f"token {token}"}
-        check = requests.get("https://api.github.com/user", headers=headers)
+        check = http.get("https://api.github.com/user", headers=headers)
         
         if check.status_code == 200:
             save_user_data(user_id, {"user": username, "token": token})
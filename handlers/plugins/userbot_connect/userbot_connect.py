@@ -3,6 +3,7 @@ from telebot import types
 from telethon import TelegramClient
 from telethon.sessions import StringSession
 from telethon.errors import SessionPasswordNeededError, PhoneCodeInvalidError
+from utils.session_store import SessionStore
 
 # ✅ আমাদের তৈরি করা DB Manager ইমপোর্ট
 try:
@@ -11,7 +12,8 @@ except ImportError:
     print("Error: utils/db_manager.py missing")
 
 # টেম্পোরারি স্টোরেজ (লগইন প্রসেস চলাকালীন ডাটা রাখার জন্য)
-temp_login_data = {}
+# OTP লগইন কয়েক মিনিটের ব্যাপার; ক্লায়েন্ট অবজেক্ট থাকে বলে ডিস্কে spill হয় না
+temp_login_data = SessionStore("userbot_login", ttl=30 * 60, max_entries=500)
 
 def register_handlers(bot):
     
@@ -1,8 +1,9 @@
 import telebot
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, InputMediaVideo
 from utils.utils_shop import get_shop, add_access_request, get_product_rating, validate_coupon, create_order
+from utils.session_store import SessionStore
 
-buyer_sessions = {}
+buyer_sessions = SessionStore("buyer", ttl=24 * 3600)
 ITEMS_PER_PAGE = 6
 
 def get_session(user_id):
@@ -1,9 +1,10 @@
 import telebot
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from utils.utils_shop import get_shop, validate_coupon, create_order
+from utils.session_store import SessionStore
 
 # Storage: {user_id: {'shop_id': '123', 'items': [ {id, name, price} ]}}
-cart_sessions = {}
+cart_sessions = SessionStore("cart", ttl=24 * 3600)
 
 def register_cart_handlers(bot):
 
@@ -12,10 +12,12 @@ from utils.utils_shop import (
     set_subscription_price
 )
 from handlers.shop_social import post_product_to_channel
+from utils.session_store import SessionStore
 
-media_cache = {}
-pending_data = {}
-seller_sessions = {}
+# আপলোড ফ্লো কয়েক ঘণ্টায় শেষ না হলে বাতিল; ব্রাউজিং সেশন এক দিন
+media_cache = SessionStore("seller_media", ttl=6 * 3600)
+pending_data = SessionStore("seller_pending", ttl=6 * 3600)
+seller_sessions = SessionStore("seller", ttl=24 * 3600)
 ITEMS_PER_PAGE = 6
 
 def get_session(user_id):
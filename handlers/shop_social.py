@@ -1,8 +1,9 @@
 import telebot
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, InputMediaVideo
 from utils.utils_shop import get_shop, add_product_review, get_product_reviews
+from utils.session_store import SessionStore
 
-review_sessions = {}
+review_sessions = SessionStore("review", ttl=3600)
 
 def register_social_handlers(bot):
 
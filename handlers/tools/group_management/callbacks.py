@@ -1,5 +1,5 @@
 from telebot import types
-from .data import get_data
+from .data import get_data, group_data
 from .utils import is_admin
 
 # =========================================================
@@ -117,6 +117,7 @@ def handle_group_callbacks(bot, c):
         db_data = get_data(chat_id)
         if key in db_data['toggles']:
             db_data['toggles'][key] = not db_data['toggles'][key]
+            group_data.mark_dirty(chat_id)
             mk = get_filters_markup(chat_id) if key in ['block_sticker', 'block_voice'] else get_settings_markup(chat_id)
             try: bot.edit_message_reply_markup(chat_id, c.message.message_id, reply_markup=mk)
             except: pass
@@ -129,6 +130,7 @@ def handle_group_callbacks(bot, c):
         
         current_status = db_data['tools'].get(tool_key, False)
         db_data['tools'][tool_key] = not current_status
+        group_data.mark_dirty(chat_id)
         
         try:
             bot.edit_message_reply_markup(chat_id, c.message.message_id, reply_markup=get_tools_markup(chat_id))
@@ -1,6 +1,8 @@
 import time
 import os
+import shutil
 import threading
+from io import BytesIO
 from telebot import types
 from concurrent.futures import ThreadPoolExecutor
 
@@ -42,10 +44,13 @@ except ImportError:
 # 2. Watermark Engine
 apply_watermark_image = None
 apply_watermark_video = None
+media_temp_paths = None
 get_wm_settings = None
+render_in_background = None
 try:
-    from handlers.tools.watermark.engine import apply_watermark_image, apply_watermark_video
+    from handlers.tools.watermark.engine import apply_watermark_image, apply_watermark_video, media_temp_paths
     from handlers.tools.watermark.data import get_wm_settings
+    from handlers.tools.watermark.core import render_in_background
 except ImportError:
     print("⚠️ Watermark Tool module not found.")
 
@@ -98,8 +103,7 @@ def register_commands(bot):
 
         # Background Process
         def process_watermark_task():
-            in_path = None
-            out_path = None
+            work_dir = None
             try:
                 # File ID Get
                 if file_type == 'photo': file_id = reply.photo[-1].file_id
@@ -114,11 +118,6 @@ def register_commands(bot):
 
                 # Download
                 downloaded = bot.download_file(file_info.file_path)
-                ext = ".mp4" if file_type == 'video' else (".gif" if file_type == 'gif' else ".jpg")
-                in_path = f"temp_{m.chat.id}_{m.message_id}{ext}"
-                out_path = f"out_{m.chat.id}_{m.message_id}{ext}"
-
-                with open(in_path, 'wb') as f: f.write(downloaded)
 
                 # Settings
                 settings = get_wm_settings(m.chat.id).copy() if get_wm_settings else {'type': 'text', 'text': 'Watermark'}
@@ -128,18 +127,33 @@ def register_commands(bot):
                 if len(parts) > 1: settings['text'] = parts[1]
 
                 # Process
-                success = False
                 if file_type == 'photo':
-                    success = apply_watermark_image(in_path, out_path, settings)
-                else:
-                    bot.edit_message_text("🎬 Rendering... Please wait.", m.chat.id, status_msg.message_id)
-                    success = apply_watermark_video(in_path, out_path, settings, is_gif=(file_type=='gif'))
+                    # ছবি পুরোটাই মেমোরিতে প্রসেস হয়, ডিস্কে কিছু লেখা হয় না
+                    out = BytesIO()
+                    if apply_watermark_image(downloaded, out, settings):
+                        out.seek(0)
+                        bot.send_photo(m.chat.id, out, reply_to_message_id=reply.message_id)
+                        bot.delete_message(m.chat.id, status_msg.message_id)
+                    else:
+                        bot.edit_message_text("❌ Processing Failed.", m.chat.id, status_msg.message_id)
+                    return
+                if render_in_background:
+                    # ভিডিও/GIF মিডিয়া প্রসেস পুলে; টেম্প ডিরেক্টরি ও আপলোড জব নিজেই সামলাবে
+                    render_in_background(
+                        bot, m.chat.id, m.from_user.id, file_type, downloaded, settings,
+                        status_msg.message_id, reply_to=reply.message_id
+                    )
+                    return
+
+                work_dir, in_path, out_path = media_temp_paths(file_type)
+                with open(in_path, 'wb') as f: f.write(downloaded)
+                bot.edit_message_text("🎬 Rendering... Please wait.", m.chat.id, status_msg.message_id)
+                success = apply_watermark_video(in_path, out_path, settings, is_gif=(file_type=='gif'))
 
                 # Upload
                 if success and os.path.exists(out_path):
                     with open(out_path, 'rb') as f:
-                        if file_type == 'photo': bot.send_photo(m.chat.id, f, reply_to_message_id=reply.message_id)
-                        elif file_type == 'video': bot.send_video(m.chat.id, f, reply_to_message_id=reply.message_id)
+                        if file_type == 'video': bot.send_video(m.chat.id, f, reply_to_message_id=reply.message_id)
                         elif file_type == 'gif': bot.send_animation(m.chat.id, f, reply_to_message_id=reply.message_id)
                     bot.delete_message(m.chat.id, status_msg.message_id)
                 else:
@@ -148,8 +162,7 @@ def register_commands(bot):
             except Exception as e:
                 bot.edit_message_text(f"❌ Error: {e}", m.chat.id, status_msg.message_id)
             finally:
-                if in_path and os.path.exists(in_path): os.remove(in_path)
-                if out_path and os.path.exists(out_path): os.remove(out_path)
+                if work_dir: shutil.rmtree(work_dir, ignore_errors=True)
 
         executor.submit(process_watermark_task)
 
@@ -1,6 +1,5 @@
 from handlers.tools.watermark_engine import DEFAULT_WM_SETTINGS
-
-group_data = {}
+from utils.chat_store import ChatSettingsStore
 
 def get_default_settings():
     return {
@@ -38,16 +37,30 @@ def get_default_settings():
         'banwords': []
     }
 
+def _upgrade_data(data):
+    # JSON এ ইউজার আইডি কী স্ট্রিং হয়ে যায়; হ্যান্ডলাররা int আইডি দিয়ে খোঁজে
+    data['warns'] = {int(uid): count for uid, count in data.get('warns', {}).items()}
+    for section, defaults in get_default_settings().items():
+        if isinstance(defaults, dict) and section != 'warns':
+            data.setdefault(section, {})
+            for k, v in defaults.items(): data[section].setdefault(k, v)
+        else:
+            data.setdefault(section, defaults)
+    return data
+
+# রিস্টার্টের পরও গ্রুপ সেটিংস থাকে (data/chat_settings.db), RAM এ শুধু সাম্প্রতিক চ্যাট
+group_data = ChatSettingsStore("group", get_default_settings, on_load=_upgrade_data)
+
 def get_data(chat_id):
-    if chat_id not in group_data:
-        group_data[chat_id] = get_default_settings()
-    return group_data[chat_id]
+    return group_data.get(chat_id)
 
 def save_wm_settings(chat_id, key, value):
     data = get_data(chat_id)
     data['wm_settings'][key] = value
+    group_data.mark_dirty(chat_id)
 
 def reset_warns(chat_id, user_id):
     data = get_data(chat_id)
     if user_id in data['warns']:
         del data['warns'][user_id]
+        group_data.mark_dirty(chat_id)
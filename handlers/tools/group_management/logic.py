@@ -1,6 +1,6 @@
 import time
 import re
-from .data import get_data, reset_warns
+from .data import get_data, group_data, reset_warns
 from .utils import is_admin, format_text
 
 # --- Actions (Ban/Mute/Unmute/Kick) ---
@@ -50,6 +50,7 @@ def handle_warning(bot, message, target_user):
     
     current = data['warns'].get(target_user.id, 0) + 1
     data['warns'][target_user.id] = current
+    group_data.mark_dirty(chat_id)
     limit = data['warn_settings']['limit']
     
     if current >= limit:
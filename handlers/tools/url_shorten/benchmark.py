@@ -0,0 +1,64 @@
+import sys
+import time
+
+# ==========================================
+# ⏱ QR RENDER BENCHMARK
+# ==========================================
+# ব্যবহার (প্রজেক্ট রুট থেকে):
+#   python -m handlers.tools.url_shorten.benchmark [url]
+# প্রতিটি QR স্টাইলে: পুরনো মডিউল-প্রতি ড্র লুপ বনাম স্ট্যাম্প মাস্ক (পিক্সেল মিলিয়ে দেখে),
+# আর পুরো make_qr এর প্রথম রেন্ডার বনাম ক্যাশ হিট।
+
+SAMPLE_URL = "https://spoo.me/benchmark-qr-link"
+
+
+def reference_mask(matrix, style, box_size, border):
+    """The old renderer: one ImageDraw call per dark module."""
+    from PIL import Image, ImageDraw
+    from .qr_utils import draw_module
+    img_size = (len(matrix) + (border * 2)) * box_size
+    mask = Image.new("L", (img_size, img_size), 0)
+    draw = ImageDraw.Draw(mask)
+    for y in range(len(matrix)):
+        for x in range(len(matrix[y])):
+            if matrix[y][x]:
+                draw_module(draw, style, (x + border) * box_size, (y + border) * box_size, box_size, 255)
+    return mask
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(url=SAMPLE_URL, repeat=5):
+    import qrcode
+    import numpy as np
+    from .core import QR_STYLES
+    from . import qr_utils
+
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=4)
+    qr.add_data(url); qr.make(fit=True)
+    matrix = qr.get_matrix()
+    box, border = qr_utils.MODULE_PX, qr_utils.QR_BORDER
+
+    print(f"{len(matrix)}x{len(matrix)} modules, {sum(map(sum, matrix))} dark")
+    print(f"{'style':<12}{'draw ms':>9}{'stamp ms':>10}{'speedup':>9}  identical{'make_qr ms':>12}{'cached ms':>11}")
+    for style in QR_STYLES:
+        t_old, ref = _best_of(lambda: reference_mask(matrix, style, box, border), repeat)
+        t_new, got = _best_of(lambda: qr_utils.render_module_mask(matrix, style, box, border), repeat)
+        same = np.array_equal(np.asarray(ref), np.asarray(got))
+
+        qr_utils.qr_cache.clear()
+        t_full, _ = _best_of(lambda: qr_utils.make_qr(url, style, gradient_name="sunset"), 1)
+        t_hit, _ = _best_of(lambda: qr_utils.make_qr(url, style, gradient_name="sunset"), repeat)
+        print(f"{style:<12}{t_old * 1000:>9.2f}{t_new * 1000:>10.2f}{t_old / t_new:>8.1f}x  {str(same):<9}{t_full * 1000:>12.1f}{t_hit * 1000:>11.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:2]))
@@ -1,25 +1,32 @@
 # handlers/tools/url_shorten/core.py
 
-import requests
+from utils.http_client import http
 import json
 import re
 import os
 import uuid
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from telebot import types
 from PIL import Image
+from utils.session_store import SessionStore
+from utils.file_id_cache import send_cached, edit_media_cached
 
 # Utils থেকে ইম্পোর্ট
 from handlers.tools.url_shorten.qr_utils import (
     load_colors, add_new_color, generate_palette_page, 
-    make_qr, generate_gradient_palette_page, load_gradients, add_new_gradient
+    make_qr, generate_gradient_palette_page, load_gradients, add_new_gradient, get_palette_png
 )
 
 # -------------------------------
 # CONFIGURATION & DATA FILES
 # -------------------------------
-TEXT_ENDPOINT = "https://spoo.me/"
-EMOJI_ENDPOINT = "https://spoo.me/emoji"
+# লোকাল স্টাব সার্ভার দিয়ে টেস্ট করতে SPOO_ENDPOINT=http://127.0.0.1:8080/ দেওয়া যায়
+TEXT_ENDPOINT = os.environ.get("SPOO_ENDPOINT", "https://spoo.me/")
+EMOJI_ENDPOINT = TEXT_ENDPOINT.rstrip("/") + "/emoji"
+SHORTEN_TIMEOUT = (5, 10) # (connect, read)
+# শর্টনার কল হ্যান্ডলার থ্রেডে চললে ধীর spoo.me পুরো আপডেট লেন আটকে রাখত
+shorten_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("SHORTEN_WORKERS", "4")), thread_name_prefix="url-shorten")
 
 GLOBAL_THEMES_FILE = "data/themes_global.json"
 USER_THEMES_FILE = "data/themes_user.json"
@@ -27,8 +34,8 @@ USER_THEMES_FILE = "data/themes_user.json"
 QR_STYLES = ['square', 'round', 'diamond', 'vertical', 'horizontal', 'rounded', 'star']
 GRADIENT_LIST = [None, 'sunset', 'ocean', 'forest', 'purple_love', 'fire', 'sky', 'royal']
 
-# গ্লোবাল স্টেট
-user_state_url = {}
+# গ্লোবাল স্টেট (লোগো/ব্যাকগ্রাউন্ড ইমেজের বাইটসহ); বাজেট ছাড়ালে পুরনো চ্যাট ডিস্কে যায়
+user_state_url = SessionStore("url_tool", ttl=6 * 3600, max_entries=2000, max_bytes=64 * 1024 * 1024, spill=True)
 
 # -------------------------------
 # 1. DATA MANAGEMENT (JSON)
@@ -202,13 +209,15 @@ def process_url(bot, message):
     url = message.text.strip()
     init_user(cid); s = user_state_url[cid]
     msg = bot.reply_to(message, "⏳ **Generating...**", parse_mode="Markdown")
+    shorten_pool.submit(finish_shorten, bot, cid, url, s, msg)
 
+def finish_shorten(bot, cid, url, s, msg):
     try:
         target = EMOJI_ENDPOINT if s['emoji'] else TEXT_ENDPOINT
         payload = {'url': url}
         if s['emoji']: payload['emoji'] = "true"
         headers = {"content-type": "application/x-www-form-urlencoded", "Accept": "application/json", "User-Agent": "Mozilla/5.0"}
-        r = requests.post(target, data=payload, headers=headers, timeout=10)
+        r = http.post(target, data=payload, headers=headers, timeout=SHORTEN_TIMEOUT)
         
         if r.status_code == 200:
             try: short = r.json().get("short_url")
@@ -223,13 +232,15 @@ def process_url(bot, message):
                                      gradient_name=s['gradient'], bg_color_name=s['bg_color'], bg_image_data=s['bg_image'])
                     if qr_img:
                         bot.delete_message(cid, msg.message_id)
-                        bot.send_photo(cid, qr_img, caption=text, parse_mode="Markdown", reply_markup=get_dashboard_menu(cid))
+                        send_cached(bot, "photo", cid, qr_img, caption=text, parse_mode="Markdown", reply_markup=get_dashboard_menu(cid))
                     else: bot.edit_message_text(text, cid, msg.message_id, parse_mode="Markdown", reply_markup=get_dashboard_menu(cid))
                 else: bot.edit_message_text(text, cid, msg.message_id, parse_mode="Markdown", reply_markup=get_dashboard_menu(cid))
             else:
                 err = r.json().get('message', 'API Error'); bot.edit_message_text(f"❌ Failed: {err}", cid, msg.message_id)
         else: bot.edit_message_text(f"❌ Server Error: {r.status_code}", cid, msg.message_id)
-    except Exception as e: bot.edit_message_text(f"❌ Error: {str(e)[:50]}", cid, msg.message_id)
+    except Exception as e:
+        try: bot.edit_message_text(f"❌ Error: {str(e)[:50]}", cid, msg.message_id)
+        except: pass
 
 # -------------------------------
 # 4. HANDLERS REGISTER
@@ -263,8 +274,8 @@ def register_url_handlers(bot):
         if action == 'waiting_grad_input':
             added = []
             for line in text.split('\n'):
-                match = re.search(r'^([a-zA-Z0-9_ ]+?)\s+(#?[0-9a-fA-F]{6})\s+(#?[0-9a-fA-F]{6})$', line.strip())
-                if match: add_new_gradient(match.group(1).strip(), match.group(2), match.group(3)); added.append(match.group(1).title())
+                match = re.search(r'^([a-zA-Z0-9_ ]+?)\s+(#?[0-9a-fA-F]{6})\s+(#?[0-9a-fA-F]{6})(?:\s+(diagonal|horizontal|vertical|radial))?$', line.strip(), re.IGNORECASE)
+                if match: add_new_gradient(match.group(1).strip(), match.group(2), match.group(3), match.group(4)); added.append(match.group(1).title())
             user_state_url[cid]['action'] = None
             bot.reply_to(m, f"✅ Added: {', '.join(added)}" if added else "❌ Wrong Format!", reply_markup=get_dashboard_menu(cid))
 
@@ -288,13 +299,17 @@ def register_url_handlers(bot):
     def handle_link_private(m): process_url(bot, m)
 
     # --- ৪. কলব্যাক হ্যান্ডলারস ---
+    def send_palette(cid, kind, page, caption, markup, message_id=None, is_edit=False):
+        """Shows a cached palette page; after the first upload it goes out by file_id."""
+        png = get_palette_png(kind, page)
+        if not png: return
+        if is_edit and message_id:
+            try: return edit_media_cached(bot, "photo", cid, message_id, png, caption=caption, reply_markup=markup)
+            except: pass
+        return send_cached(bot, "photo", cid, png, caption=caption, reply_markup=markup)
+
     def show_color_page(cid, page, message_id=None, is_edit=False):
-        img_bio = generate_palette_page(page); markup = get_color_menu(page)
-        if img_bio:
-            if is_edit and message_id:
-                try: bot.edit_message_media(media=types.InputMediaPhoto(img_bio, caption="🎨 **Select a Color:**"), chat_id=cid, message_id=message_id, reply_markup=markup)
-                except: bot.send_photo(cid, img_bio, caption="🎨 **Select a Color:**", reply_markup=markup)
-            else: bot.send_photo(cid, img_bio, caption="🎨 **Select a Color:**", reply_markup=markup)
+        send_palette(cid, "color", page, "🎨 **Select a Color:**", get_color_menu(page), message_id, is_edit)
 
     @bot.callback_query_handler(func=lambda c: c.data.startswith("url_"))
     def handle_url_callbacks(c):
@@ -315,13 +330,13 @@ def register_url_handlers(bot):
         elif data == "url_unlock_color":
             user_state_url[cid]['gradient'] = None; show_color_page(cid, 0, c.message.message_id, True)
         elif data == "url_menu_bg":
-            img_bio = generate_palette_page(0); mk = get_color_menu(0)
+            mk = get_color_menu(0)
             for row in mk.keyboard:
                 for btn in row:
                     if btn.callback_data.startswith("url_col_"): btn.callback_data = btn.callback_data.replace("url_col_", "url_setbg_")
             mk.row(types.InlineKeyboardButton("📷 Upload Background Image", callback_data="url_up_bg_img"))
             if user_state_url[cid]['bg_image']: mk.row(types.InlineKeyboardButton("🗑️ Remove BG Image", callback_data="url_rm_bg_img"))
-            bot.edit_message_media(media=types.InputMediaPhoto(img_bio, caption="🖼 **Background Settings:**"), chat_id=cid, message_id=c.message.message_id, reply_markup=mk)
+            send_palette(cid, "color", 0, "🖼 **Background Settings:**", mk, c.message.message_id, True)
         elif data == "url_up_bg_img":
             user_state_url[cid]['action'] = 'waiting_bg_img'; bot.delete_message(cid, c.message.message_id)
             bot.send_message(cid, "🖼️ **Please send the photo now.**")
@@ -336,16 +351,15 @@ def register_url_handlers(bot):
             qr_img = make_qr("https://t.me/MissZeba_bot", user_state_url[cid]['style'], user_state_url[cid]['color'], user_state_url[cid]['logo'], user_state_url[cid]['gradient'], user_state_url[cid]['bg_color'], user_state_url[cid]['bg_image'])
             if qr_img:
                 bot.delete_message(cid, c.message.message_id)
-                bot.send_photo(cid, qr_img, caption="👁️ **Preview**", reply_markup=types.InlineKeyboardMarkup().add(types.InlineKeyboardButton("🔙 Back", callback_data="url_home")), parse_mode="Markdown")
+                send_cached(bot, "photo", cid, qr_img, caption="👁️ **Preview**", reply_markup=types.InlineKeyboardMarkup().add(types.InlineKeyboardButton("🔙 Back", callback_data="url_home")), parse_mode="Markdown")
         elif data == "url_menu_grad":
-            img_bio = generate_gradient_palette_page(0); mk = get_gradient_menu(0)
-            bot.edit_message_media(media=types.InputMediaPhoto(img_bio, caption="🌈 **Select a Gradient Style:**"), chat_id=cid, message_id=c.message.message_id, reply_markup=mk)
+            send_palette(cid, "gradient", 0, "🌈 **Select a Gradient Style:**", get_gradient_menu(0), c.message.message_id, True)
         elif data.startswith("url_grad_pg_"):
-            pg = int(data.split("_")[-1]); img_bio = generate_gradient_palette_page(pg); mk = get_gradient_menu(pg)
-            bot.edit_message_media(media=types.InputMediaPhoto(img_bio, caption="🌈 **Select a Gradient Style:**"), chat_id=cid, message_id=c.message.message_id, reply_markup=mk)
+            pg = int(data.split("_")[-1])
+            send_palette(cid, "gradient", pg, "🌈 **Select a Gradient Style:**", get_gradient_menu(pg), c.message.message_id, True)
         elif data == "url_add_grad":
             user_state_url[cid]['action'] = 'waiting_grad_input'; bot.delete_message(cid, c.message.message_id)
-            bot.send_message(cid, "➕ **Add New Gradient:**\nFormat: `Name #Hex1 #Hex2`", parse_mode="Markdown")
+            bot.send_message(cid, "➕ **Add New Gradient:**\nFormat: `Name #Hex1 #Hex2 [diagonal|horizontal|vertical|radial]`", parse_mode="Markdown")
         elif data.startswith("url_set_grad_"):
             val = data.replace("url_set_grad_", ""); user_state_url[cid]['gradient'] = None if val=="None" else val
             open_url_tool(bot, c.message, True)
@@ -378,7 +392,7 @@ def register_url_handlers(bot):
                 if is_g: mk.add(types.InlineKeyboardButton("⭐ Add Favorites", callback_data=f"thm_save_{tid}"), types.InlineKeyboardButton("🔙 Back", callback_data="thm_browse_0"))
                 else: mk.add(types.InlineKeyboardButton("🚀 Apply", callback_data=f"thm_apply_{tid}"), types.InlineKeyboardButton("🌍 Publish", callback_data=f"thm_pub_{tid}"), types.InlineKeyboardButton("🗑️ Delete", callback_data=f"thm_del_{tid}"), types.InlineKeyboardButton("🔙 Back", callback_data="thm_mine_0"))
                 bot.delete_message(cid, c.message.message_id)
-                bot.send_photo(cid, qr_img, caption=f"🎨 **Theme:** {theme['name']}\n👤 **Author:** {theme.get('author','Unknown')}", reply_markup=mk, parse_mode="Markdown")
+                send_cached(bot, "photo", cid, qr_img, caption=f"🎨 **Theme:** {theme['name']}\n👤 **Author:** {theme.get('author','Unknown')}", reply_markup=mk, parse_mode="Markdown")
         elif data.startswith("thm_save_"):
             tid = data.split("_")[-1]; theme = next((t for t in get_global_themes() if t['id'] == tid), None)
             if theme: 
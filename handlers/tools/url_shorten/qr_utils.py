@@ -2,13 +2,22 @@ import qrcode
 import json
 import os
 import math
+import hashlib
+import threading
+import numpy as np
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
+from utils.byte_cache import ByteLRUCache
 
 # -------------------------------
 # CONFIGURATION & DATA PATHS
 # -------------------------------
 DATA_FILE = "data/qr_colors.json"
+QR_CACHE_MB = int(os.environ.get("QR_CACHE_MB", "32"))
+GRADIENT_CACHE_MB = int(os.environ.get("GRADIENT_CACHE_MB", "32"))
+GRADIENT_DIRECTIONS = ('diagonal', 'horizontal', 'vertical', 'radial')
+PALETTE_CACHE_MB = int(os.environ.get("QR_PALETTE_CACHE_MB", "16"))
+PALETTE_CACHE_DIR = "data/palette_cache"
 
 DEFAULT_DATA = {
     "colors": {
@@ -72,31 +81,56 @@ def add_new_color(name, hex_code):
     data = load_all_data()
     data["colors"][name.lower()] = hex_code.upper()
     save_all_data(data)
+    invalidate_palette_pages("color")
 
-def add_new_gradient(name, hex1, hex2):
+def add_new_gradient(name, hex1, hex2, direction=None):
     data = load_all_data()
-    data["gradients"][name.lower()] = [hex1.upper(), hex2.upper()]
+    grad = [hex1.upper(), hex2.upper()]
+    # ডায়াগনাল ডিফল্ট, তাই শুধু অন্য দিক হলে তৃতীয় ঘরে রাখা (পুরনো ফরম্যাটের সাথে মিল থাকে)
+    if direction and direction.lower() != 'diagonal': grad.append(direction.lower())
+    data["gradients"][name.lower()] = grad
     save_all_data(data)
+    invalidate_palette_pages("gradient")
 
 # -------------------------------
 # 2. HELPER FUNCTIONS
 # -------------------------------
-def create_linear_gradient(width, height, start_color, end_color):
-    """ইমেজের জন্য ডায়াগনাল গ্রেডিয়েন্ট তৈরি করে।"""
+gradient_cache = ByteLRUCache(GRADIENT_CACHE_MB * 1024 * 1024, "gradients")
+
+def gradient_mask(width, height, direction='diagonal'):
+    """0-255 blend mask (uint8 array). Diagonal matches the old per-pixel loop exactly."""
+    ys = np.arange(height, dtype=np.float64) / height
+    xs = np.arange(width, dtype=np.float64) / width
+    if direction == 'horizontal': t = np.broadcast_to(255 * xs[None, :], (height, width))
+    elif direction == 'vertical': t = np.broadcast_to(255 * ys[:, None], (height, width))
+    elif direction == 'radial':
+        # কেন্দ্রে start রঙ, কোণায় end রঙ
+        dy, dx = ys[:, None] - 0.5, xs[None, :] - 0.5
+        t = 255 * np.sqrt((dx * dx + dy * dy) / 0.5)
+    else: t = 255 * (ys[:, None] + xs[None, :]) / 2
+    return np.minimum(t, 255).astype(np.uint8)
+
+def create_linear_gradient(width, height, start_color, end_color, direction='diagonal'):
+    """
+    Gradient image (diagonal, horizontal, vertical or radial), cached by
+    (size, colors, direction). The result is shared: paste from it, never draw on it.
+    """
+    direction = direction if direction in GRADIENT_DIRECTIONS else 'diagonal'
+    key = (width, height, start_color, end_color, direction)
+    img = gradient_cache.get(key)
+    if img is not None: return img
     try:
         base = Image.new('RGB', (width, height), start_color)
         top = Image.new('RGB', (width, height), end_color)
-        mask = Image.new('L', (width, height))
-        mask_data = []
-        for y in range(height):
-            for x in range(width):
-                mask_data.append(int(255 * (y / height + x / width) / 2))
-        mask.putdata(mask_data)
-        base.paste(top, (0, 0), mask)
-        return base
+        base.paste(top, (0, 0), Image.fromarray(gradient_mask(width, height, direction)))
+        return gradient_cache.put(key, base, width * height * 3)
     except:
         return Image.new('RGB', (width, height), "black")
 
+def gradient_direction(val):
+    """Direction stored as the optional 3rd item of a gradient entry."""
+    return val[2] if len(val) > 2 else 'diagonal'
+
 def draw_star_shape(draw, cx, cy, size, fill):
     points = []
     outer_radius, inner_radius = size / 2, size / 4
@@ -129,9 +163,9 @@ def _draw_palette_common(chunk, is_gradient, page_index):
         box_x, box_y = 70, y_start + ((row_h - card_gap - box_s) // 2)
         
         if is_gradient:
-            grad_box = create_linear_gradient(box_s, box_s, val[0], val[1])
+            grad_box = create_linear_gradient(box_s, box_s, val[0], val[1], gradient_direction(val))
             img.paste(grad_box, (box_x, box_y))
-            hex_text = f"{val[0]} ➔ {val[1]}"
+            hex_text = f"{val[0]} ➔ {val[1]}" + (f" ({val[2]})" if len(val) > 2 else "")
         else:
             try: draw.rectangle([box_x, box_y, box_x+box_s, box_y+box_s], fill=val, outline="black", width=3)
             except: draw.rectangle([box_x, box_y, box_x+box_s, box_y+box_s], fill="black", outline="black", width=3)
@@ -144,33 +178,134 @@ def _draw_palette_common(chunk, is_gradient, page_index):
     return bio
 
 def generate_palette_page(page_index):
-    colors = load_colors()
-    chunk = list(colors.items())[page_index*10 : (page_index+1)*10]
-    return _draw_palette_common(chunk, False, page_index) if chunk else None
+    png = get_palette_png("color", page_index)
+    return BytesIO(png) if png else None
 
 def generate_gradient_palette_page(page_index):
-    grads = load_gradients()
-    chunk = list(grads.items())[page_index*10 : (page_index+1)*10]
-    return _draw_palette_common(chunk, True, page_index) if chunk else None
+    png = get_palette_png("gradient", page_index)
+    return BytesIO(png) if png else None
+
+# --- PALETTE PAGE CACHE (RAM → Disk) ---
+# প্যালেট শুধু add_new_color / add_new_gradient এ বদলায়, তাই প্রতিটি পেজ একবারই রেন্ডার হয়।
+# কী তে পেজের কনটেন্টের হ্যাশ থাকে, ফলে JSON হাতে এডিট করলেও পুরনো ছবি দেখায় না।
+palette_cache = ByteLRUCache(PALETTE_CACHE_MB * 1024 * 1024, "palettes")
+
+def _palette_chunk(kind, page_index):
+    items = load_colors() if kind == "color" else load_gradients()
+    return list(items.items())[page_index*10 : (page_index+1)*10]
+
+def palette_page_key(kind, page_index):
+    """'<kind>_<page>_<content hash>' or None when the page is empty."""
+    chunk = _palette_chunk(kind, page_index)
+    if not chunk: return None
+    digest = hashlib.sha1(json.dumps(chunk).encode()).hexdigest()[:12]
+    return f"{kind}_{page_index}_{digest}"
+
+def get_palette_png(kind, page_index):
+    key = palette_page_key(kind, page_index)
+    if not key: return None
+    png = palette_cache.get(key)
+    if png is not None: return png
+    path = os.path.join(PALETTE_CACHE_DIR, f"{key}.png")
+    if os.path.exists(path):
+        with open(path, 'rb') as f: png = f.read()
+    else:
+        png = _draw_palette_common(_palette_chunk(kind, page_index), kind == "gradient", page_index).getvalue()
+        os.makedirs(PALETTE_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f: f.write(png)
+        os.replace(tmp, path)
+    return palette_cache.put(key, png, len(png))
+
+def invalidate_palette_pages(kind):
+    """Drops cached pages of `kind` whose content changed; untouched pages stay."""
+    items = load_colors() if kind == "color" else load_gradients()
+    valid = {palette_page_key(kind, i) for i in range((len(items) + 9) // 10)}
+    palette_cache.clear()
+    if not os.path.isdir(PALETTE_CACHE_DIR): return
+    for name in os.listdir(PALETTE_CACHE_DIR):
+        if name.startswith(f"{kind}_") and name.endswith(".png") and name[:-4] not in valid:
+            os.remove(os.path.join(PALETTE_CACHE_DIR, name))
 
 # -------------------------------
 # 4. QR GENERATOR
+# -------------------------------
+MODULE_PX, QR_BORDER = 20, 4
+
+# একই লিংক + থিমের QR বারবার চাওয়া হয়, তাই চূড়ান্ত PNG বাইট ক্যাশে থাকে
+qr_cache = ByteLRUCache(QR_CACHE_MB * 1024 * 1024, "qr")
+_stamps = {}
+_stamps_lock = threading.Lock()
+
+def draw_module(draw, style, l, t, box_size, fill_val):
+    """Draws one QR module at (l, t) exactly like the original per-module renderer."""
+    r, b = l + box_size, t + box_size
+    cx, cy = l + (box_size/2), t + (box_size/2)
+    if style == 'round': draw.ellipse((l, t, r, b), fill=fill_val)
+    elif style == 'diamond': draw.polygon([(cx, t), (r, cy), (cx, b), (l, cy)], fill=fill_val)
+    elif style == 'rounded': draw.rounded_rectangle((l, t, r, b), radius=box_size*0.3, fill=fill_val)
+    elif style == 'star': draw_star_shape(draw, cx, cy, box_size, fill_val)
+    else: draw.rectangle((l, t, r, b), fill=fill_val)
+
+def module_stamp(style, box_size=MODULE_PX):
+    """One module pre-rendered as a uint8 array (box_size+1 square: PIL shapes include the far edge)."""
+    key = (style, box_size)
+    with _stamps_lock:
+        if key not in _stamps:
+            img = Image.new("L", (box_size + 1, box_size + 1), 0)
+            draw_module(ImageDraw.Draw(img), style, 0, 0, box_size, 255)
+            _stamps[key] = np.asarray(img)
+        return _stamps[key]
+
+def render_module_mask(matrix, style, box_size=MODULE_PX, border=QR_BORDER):
+    """
+    Full QR mask without a draw call per module: the canvas is viewed as a
+    grid of box_size blocks and the stamp (cut into block-sized pieces, since
+    PIL shapes overlap the next module by 1px) is max-blitted into every dark
+    module's block with one fancy-indexed assignment per piece.
+    """
+    dark = np.asarray(matrix, dtype=bool)
+    n = dark.shape[0]
+    img_size = (n + border * 2) * box_size
+    canvas = np.zeros((img_size + box_size, img_size + box_size), dtype=np.uint8)
+    stamp = module_stamp(style, box_size)
+    pieces = -(-stamp.shape[0] // box_size)
+    for py in range(pieces):
+        for px in range(pieces):
+            part = stamp[py*box_size:(py+1)*box_size, px*box_size:(px+1)*box_size]
+            if not part.any(): continue
+            h, w = part.shape
+            y0, x0 = (border + py) * box_size, (border + px) * box_size
+            # (n, n, h, w) ভিউ: প্রতিটি মডিউলের ব্লক
+            blocks = canvas[y0:y0 + n*box_size, x0:x0 + n*box_size].reshape(n, box_size, n, box_size).transpose(0, 2, 1, 3)[:, :, :h, :w]
+            blocks[dark] = np.maximum(blocks[dark], part)
+    return Image.fromarray(np.ascontiguousarray(canvas[:img_size, :img_size]))
+
+def _digest(data):
+    return hashlib.sha1(data).hexdigest() if data else None
+
 def make_qr(url, style='square', color_name='black', logo_data=None, gradient_name=None, bg_color_name='white', bg_image_data=None):
     try:
         colors = load_colors()
+        bg_hex = colors.get(bg_color_name, '#FFFFFF')
+        c_pair = load_gradients().get(gradient_name, ["#000000", "#000000"]) if gradient_name else None
+        # নামের বদলে আসল রঙ দিয়ে কী, তাই প্যালেট বদলালে পুরনো ক্যাশ আপনাআপনি অকেজো
+        key = (url, style, colors.get(color_name, '#000000'), tuple(c_pair) if c_pair else None,
+               bg_hex, _digest(logo_data), _digest(bg_image_data))
+        png = qr_cache.get(key)
+        if png is not None: return BytesIO(png)
+
         qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=4)
         qr.add_data(url); qr.make(fit=True)
         
-        matrix = qr.get_matrix(); box_size, border = 20, 4
+        matrix = qr.get_matrix(); box_size, border = MODULE_PX, QR_BORDER
         img_size = (len(matrix) + (border * 2)) * box_size
         
         # ১. ব্যাকগ্রাউন্ড নির্ধারণ (Image vs Color)
-        bg_hex = colors.get(bg_color_name, '#FFFFFF')
-        
         if bg_image_data:
             try:
                 bg_img = Image.open(BytesIO(bg_image_data)).convert("RGBA")
-                # স্কয়ার ক্রপ করা
+                # স্কয়ার ক্রপ করা
                 w, h = bg_img.size
                 min_dim = min(w, h)
                 left, top = (w - min_dim)/2, (h - min_dim)/2
@@ -183,25 +318,11 @@ def make_qr(url, style='square', color_name='black', logo_data=None, gradient_na
         else:
             final_img = Image.new("RGBA", (img_size, img_size), bg_hex)
 
-        # ২. MASK & COLOR Layer (Foreground)
-        mask = Image.new("L", (img_size, img_size), 0)
-        draw = ImageDraw.Draw(mask); fill_val = 255
-        for y in range(len(matrix)):
-            for x in range(len(matrix[y])):
-                if matrix[y][x]:
-                    l, t = (x + border) * box_size, (y + border) * box_size
-                    r, b = l + box_size, t + box_size
-                    cx, cy = l + (box_size/2), t + (box_size/2)
-                    if style == 'round': draw.ellipse((l, t, r, b), fill=fill_val)
-                    elif style == 'diamond': draw.polygon([(cx, t), (r, cy), (cx, b), (l, cy)], fill=fill_val)
-                    elif style == 'rounded': draw.rounded_rectangle((l, t, r, b), radius=box_size*0.3, fill=fill_val)
-                    elif style == 'star': draw_star_shape(draw, cx, cy, box_size, fill_val)
-                    else: draw.rectangle((l, t, r, b), fill=fill_val)
-
-        if gradient_name:
-            grads = load_gradients()
-            c_pair = grads.get(gradient_name, ["#000000", "#000000"])
-            color_layer = create_linear_gradient(img_size, img_size, c_pair[0], c_pair[1])
+        # ২. MASK & COLOR Layer (Foreground) — প্রি-রেন্ডার করা মডিউল স্ট্যাম্প থেকে
+        mask = render_module_mask(matrix, style, box_size, border)
+
+        if c_pair:
+            color_layer = create_linear_gradient(img_size, img_size, c_pair[0], c_pair[1], gradient_direction(c_pair))
         else:
             color_layer = Image.new("RGB", (img_size, img_size), colors.get(color_name, '#000000'))
 
@@ -214,14 +335,16 @@ def make_qr(url, style='square', color_name='black', logo_data=None, gradient_na
                 logo = Image.open(BytesIO(logo_data)).convert("RGBA")
                 l_s = int(img_size * 0.22)
                 logo = logo.resize((l_s, l_s), Image.Resampling.LANCZOS)
-                # লোগোর পেছনে একটু প্যাডিং (সাদা বা সলিড কালার দিলে ভালো দেখায়)
+                # লোগোর পেছনে একটু প্যাডিং (সাদা বা সলিড কালার দিলে ভালো দেখায়)
                 bg_l = Image.new("RGBA", (l_s+10, l_s+10), bg_hex if not bg_image_data else "white")
                 bg_l.paste(logo, (5, 5), logo)
                 pos = ((img_size - bg_l.width)//2, (img_size - bg_l.height)//2)
                 final_img.paste(bg_l, pos, bg_l)
             except: pass
 
-        bio = BytesIO(); final_img.save(bio, "PNG"); bio.seek(0)
-        return bio
+        bio = BytesIO(); final_img.save(bio, "PNG")
+        png = bio.getvalue()
+        qr_cache.put(key, png, len(png))
+        return BytesIO(png)
     except Exception as e:
         print(f"QR Error: {e}"); return None
@@ -0,0 +1,51 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# =========================================================
+# 🖼️ ALBUM MODE (media_group_id Collector)
+# =========================================================
+# টেলিগ্রাম অ্যালবামের প্রতিটি ছবি আলাদা আপডেট হিসেবে আসে। একই media_group_id এর
+# মেসেজগুলো একটা ছোট উইন্ডোতে জমিয়ে একসাথে প্রসেস করা হয়, ফলে একটাই স্ট্যাটাস
+# মেসেজ, একটাই send_media_group আর একটাই মেনু রিফ্রেশ লাগে।
+
+ALBUM_WINDOW = float(os.environ.get("WM_ALBUM_WINDOW", "1.2"))  # শেষ ছবির পর কত সেকেন্ড অপেক্ষা
+ALBUM_WORKERS = int(os.environ.get("WM_ALBUM_WORKERS", "4"))
+ALBUM_MAX = 10 # টেলিগ্রামের এক অ্যালবামে সর্বোচ্চ আইটেম
+
+album_pool = ThreadPoolExecutor(max_workers=ALBUM_WORKERS, thread_name_prefix="wm-album")
+
+
+class MediaGroupCollector:
+    """
+    Buffers messages by (chat_id, media_group_id). A group is handed to
+    `on_group(messages)` (sorted by message_id, on a timer thread) once no
+    new part arrived for `window` seconds.
+    """
+
+    def __init__(self, on_group, window=ALBUM_WINDOW):
+        self.on_group = on_group
+        self.window = window
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def add(self, m):
+        key = (m.chat.id, m.media_group_id)
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = {"messages": [], "timer": None}
+            else:
+                group["timer"].cancel() # নতুন অংশ এসেছে → উইন্ডো আবার শুরু
+            group["messages"].append(m)
+            group["timer"] = threading.Timer(self.window, self._flush, args=(key,))
+            group["timer"].daemon = True
+            group["timer"].start()
+
+    def _flush(self, key):
+        with self._lock:
+            group = self._groups.pop(key, None)
+        if not group: return
+        messages = sorted(group["messages"], key=lambda m: m.message_id)
+        try: self.on_group(messages)
+        except Exception as e: print(f"⚠️ Album processing error: {e}")
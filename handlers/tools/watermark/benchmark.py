@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+# ==========================================
+# ⏱ VIDEO ENGINE BENCHMARK (FFmpeg vs MoviePy)
+# ==========================================
+# ব্যবহার (প্রজেক্ট রুট থেকে):
+#   python -m handlers.tools.watermark.benchmark [clip1.mp4 clip2.mp4 ...]
+#   python -m handlers.tools.watermark.benchmark --tiling
+# কোনো ক্লিপ না দিলে ffmpeg দিয়ে কয়েকটি টেস্ট ক্লিপ বানিয়ে নেয়।
+# প্রতিটি রান আলাদা প্রসেসে চলে, তাই peak RSS এ ffmpeg চাইল্ড প্রসেসও ধরা পড়ে।
+# --tiling: টাইল্ড লেয়ারের মাইক্রো-বেঞ্চমার্ক (paste লুপ বনাম প্রি-টাইল্ড স্ট্রিপ)।
+
+ENGINES = ("ffmpeg", "moviepy")
+RESOLUTIONS = (("720p", 1280, 720), ("1080p", 1920, 1080), ("4K", 3840, 2160))
+SAMPLE_CLIPS = (("480p_10s", "854x480", 10), ("720p_15s", "1280x720", 15), ("1080p_10s", "1920x1080", 10))
+
+
+def _settings(tiled):
+    from .data import DEFAULT_WM_SETTINGS
+    s = DEFAULT_WM_SETTINGS.copy()
+    s.update({"text": "Benchmark ©", "is_tiled": tiled, "rotation": 30 if tiled else 0})
+    return s
+
+
+def make_sample_clips(ffmpeg_bin, out_dir):
+    clips = []
+    for name, size, secs in SAMPLE_CLIPS:
+        path = os.path.join(out_dir, f"{name}.mp4")
+        subprocess.run([
+            ffmpeg_bin, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30:duration={secs}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={secs}",
+            "-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac", "-shortest", path
+        ], check=True)
+        clips.append(path)
+    return clips
+
+
+def run_once(engine, clip, output, tiled):
+    """Child side: one render with one engine."""
+    from . import engine as wm_engine
+    fn = wm_engine.apply_watermark_video_ffmpeg if engine == "ffmpeg" else wm_engine.apply_watermark_video_moviepy
+    ok = fn(clip, output, _settings(tiled), False)
+    sys.exit(0 if ok else 1)
+
+
+def measure(engine, clip, output, tiled):
+    """Returns (ok, wall seconds, peak RSS MiB) of one render in a fresh process."""
+    cmd = [sys.executable, "-m", __spec__.name, "--run", engine, clip, output, "1" if tiled else "0"]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # Linux এ ru_maxrss KiB এ; চাইল্ডের অপেক্ষা করা ffmpeg প্রসেসও এতে থাকে
+    return proc.returncode == 0, wall, usage.ru_maxrss / 1024
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_tiling(repeat=5):
+    """Tiled layer per resolution and tile mode; also checks the outputs match."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+    from . import engine as wm_engine
+
+    content = Image.new("RGBA", (180, 60), (0, 0, 0, 0))
+    ImageDraw.Draw(content).text((10, 10), "Benchmark ©", fill=(255, 255, 255, 200))
+    content = content.rotate(30, expand=True, resample=Image.BICUBIC)
+
+    print(f"{'resolution':<12}{'mode':<12}{'before ms':>11}{'after ms':>10}{'speedup':>9}  identical")
+    for name, w, h in RESOLUTIONS:
+        for mode in ("grid", "vertical", "horizontal"):
+            def loop_layer():
+                layer = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+                wm_engine.paste_tiles(layer, content, 20, mode)
+                return layer
+            t_old, ref = _best_of(loop_layer, repeat)
+            t_new, got = _best_of(lambda: wm_engine.tile_watermark(content, w, h, 20, mode), repeat)
+            same = np.array_equal(np.asarray(ref), np.asarray(got))
+            print(f"{name:<12}{mode:<12}{t_old * 1000:>11.1f}{t_new * 1000:>10.1f}{t_old / t_new:>8.1f}x  {same}")
+
+    return 0
+
+
+def main(argv):
+    from .engine import find_ffmpeg
+    ffmpeg_bin = find_ffmpeg()
+    if not ffmpeg_bin:
+        print("❌ ffmpeg not found (install it or imageio-ffmpeg).")
+        return 1
+
+    work_dir = tempfile.mkdtemp(prefix="wm_bench_")
+    try:
+        clips = argv or make_sample_clips(ffmpeg_bin, work_dir)
+        print(f"{'clip':<24}{'layout':<8}{'engine':<9}{'wall s':>9}{'peak MiB':>10}  status")
+        for clip in clips:
+            for tiled in (False, True):
+                results = {}
+                for engine in ENGINES:
+                    out = os.path.join(work_dir, f"out_{engine}.mp4")
+                    ok, wall, rss = measure(engine, clip, out, tiled)
+                    results[engine] = wall if ok else None
+                    layout = "tiled" if tiled else "corner"
+                    print(f"{os.path.basename(clip)[:23]:<24}{layout:<8}{engine:<9}{wall:>9.2f}{rss:>10.1f}  {'ok' if ok else 'FAILED'}")
+                if all(results.values()):
+                    print(f"{'':<24}{'':<8}{'speedup':<9}{results['moviepy'] / results['ffmpeg']:>8.1f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        run_once(sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5] == "1")
+    if sys.argv[1:] == ["--tiling"]:
+        sys.exit(bench_tiling())
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,52 @@
+import os
+import json
+import hashlib
+from utils.byte_cache import ByteLRUCache
+
+# =========================================================
+# 🧠 WATERMARK RENDER CACHES (Layers, Fonts, Logos)
+# =========================================================
+# একই ইউজার সাধারণত একই সেটিংসে একই সাইজের অনেক ছবি পাঠায়, তাই
+# রেন্ডার করা লেয়ার, লোড করা ফন্ট আর ডিকোড করা লোগো RAM এ রেখে দেওয়া হয়।
+# ক্যাশ থেকে পাওয়া ইমেজগুলো শেয়ারড — কলার কখনো এগুলো মডিফাই করবে না।
+
+LAYER_CACHE_MB = int(os.environ.get("WM_LAYER_CACHE_MB", "64"))
+LOGO_CACHE_MB = int(os.environ.get("WM_LOGO_CACHE_MB", "16"))
+FONT_CACHE_SIZE = int(os.environ.get("WM_FONT_CACHE_SIZE", "32"))
+
+# শুধু এই কী গুলো লেয়ারের চেহারা বদলায় (favorites, font_name ইত্যাদি নয়)
+RENDER_KEYS = (
+    "mode", "text", "text_color", "bg_color", "position", "opacity", "bg_opacity",
+    "size_pct", "bg_enabled", "font_path", "logo_path", "logo_scale",
+    "rotation", "is_tiled", "tile_gap", "tile_mode", "pos_x", "pos_y"
+)
+
+
+layer_cache = ByteLRUCache(LAYER_CACHE_MB * 1024 * 1024, "layers")
+logo_cache = ByteLRUCache(LOGO_CACHE_MB * 1024 * 1024, "logos")
+font_cache = ByteLRUCache(FONT_CACHE_SIZE, "fonts") # প্রতিটি ফন্ট = 1
+
+
+def file_version(path):
+    """(mtime_ns, size) so a logo/font overwritten at the same path gets a new key."""
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def settings_hash(s):
+    render = {k: s.get(k) for k in RENDER_KEYS}
+    if s.get("mode") == "logo" and s.get("logo_path"): render["_logo_v"] = file_version(s["logo_path"])
+    if s.get("font_path"): render["_font_v"] = file_version(s["font_path"])
+    raw = json.dumps(render, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def image_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+
+def get_cache_stats():
+    return [c.get_stats() for c in (layer_cache, font_cache, logo_cache)]
@@ -1,4 +1,5 @@
 import os
+import shutil
 import traceback
 from telebot import types
 import uuid 
@@ -7,7 +8,11 @@ from io import BytesIO
 # --- IMPORTS FROM LOCAL FILES ---
 # ⚠️ তোমার প্রোজেক্টে data.py, engine.py, menus.py ফাইলগুলো থাকতে হবে
 from .data import get_wm_settings, save_wm_settings
-from .engine import apply_watermark_image, apply_watermark_video, generate_font_preview_image
+from .engine import apply_watermark_image, apply_watermark_video, generate_font_preview_image, media_temp_paths
+from .jobs import get_media_queue, QueueFullError, UserLimitError, MEDIA_PER_USER
+from .album import MediaGroupCollector, album_pool, ALBUM_MAX
+from utils.session_store import SessionStore
+from utils.file_id_cache import send_cached
 from .menus import *
 
 # 🔥 CRITICAL IMPORT: Auto Clean & Status Msg
@@ -38,7 +43,8 @@ MAX_MEDIA_SIZE = 20 * 1024 * 1024
 if not os.path.exists(FONTS_DIR): os.makedirs(FONTS_DIR)
 
 user_states_watermark = {}
-last_menu_ids = {}
+# ৪৮ ঘণ্টার পুরনো মেসেজ টেলিগ্রাম আর ডিলিট করতে দেয় না, তাই এর বেশি রাখার মানে নেই
+last_menu_ids = SessionStore("wm_menus", ttl=48 * 3600)
 
 def update_wm(cid, k, v): save_wm_settings(cid, k, v)
 
@@ -66,6 +72,70 @@ def refresh_main_menu(bot, cid, mid=None):
     txt = f"🎛️ **Watermark Studio**\n📝 Text: `{s.get('text','Watermark')}`\n🎨 Font: `{s.get('font_name','Default')}`\n\n👇 **Send Photo, Video or GIF to process.**"
     send_menu(bot, cid, txt, get_main_menu(s), mid)
 
+# --- BACKGROUND VIDEO/GIF RENDER (Media Process Pool) ---
+def render_in_background(bot, cid, user_id, file_type, downloaded, s, status_mid, reply_to=None, on_finish=None):
+    """
+    Queues a video/GIF render on the media process pool instead of running
+    MoviePy on the handler thread. The status message shows the queue
+    position with a cancel button and is replaced by the result.
+    The downloaded bytes go to a private temp dir that is removed when the job ends.
+    """
+    work_dir, t_in, t_out = media_temp_paths(file_type)
+    with open(t_in, 'wb') as f: f.write(downloaded)
+
+    def edit_status(text, markup=None):
+        try: bot.edit_message_text(text, cid, status_mid, reply_markup=markup)
+        except: pass
+
+    def cancel_kb(job):
+        kb = types.InlineKeyboardMarkup()
+        kb.add(types.InlineKeyboardButton("❌ Cancel", callback_data=f"wm_cancel_{job.job_id}"))
+        return kb
+
+    def on_position(job, pos):
+        if pos: edit_status(f"⏳ Queued for rendering: #{pos}", cancel_kb(job))
+        else: edit_status(f"🎬 Rendering {file_type}... Please wait.", cancel_kb(job))
+
+    def on_done(job):
+        try:
+            if job.state == "done" and job.result and os.path.exists(t_out):
+                with open(t_out, 'rb') as f:
+                    if file_type == 'video': bot.send_video(cid, f, caption="✅ Done", reply_to_message_id=reply_to)
+                    else: bot.send_animation(cid, f, caption="✅ Done", reply_to_message_id=reply_to)
+                try: bot.delete_message(cid, status_mid)
+                except: pass
+            elif job.state == "cancelled": edit_status("🚫 Rendering cancelled.")
+            elif job.state == "timeout": edit_status("⌛ Rendering took too long and was stopped.")
+            else: edit_status("❌ Processing Failed (Engine Error).")
+        except Exception as e:
+            edit_status(f"❌ Error: {e}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            if on_finish: on_finish()
+
+    try:
+        job = get_media_queue().submit(
+            user_id, apply_watermark_video, t_in, t_out, s, file_type == 'gif',
+            on_done=on_done, on_position=on_position
+        )
+    except (QueueFullError, UserLimitError) as e:
+        busy = "🚦 Render queue is full, try again in a minute." if isinstance(e, QueueFullError) \
+            else f"🚦 You already have {MEDIA_PER_USER} videos rendering. Please wait."
+        edit_status(busy)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return None
+
+    on_position(job, job.position if job.state == "queued" else 0)
+    return job
+
+def media_type_of(m):
+    """'photo' / 'video' / 'gif' for watermarkable messages (video documents count as video), else None."""
+    if m.photo: return 'photo'
+    if m.video: return 'video'
+    if m.animation: return 'gif'
+    if m.document and m.document.mime_type and 'video' in m.document.mime_type: return 'video'
+    return None
+
 # --- PROCESS MEDIA (Main Logic with Auto Clean) ---
 def process_media(bot, m, file_type):
     cid = m.chat.id
@@ -74,12 +144,11 @@ def process_media(bot, m, file_type):
     status = StatusMsg(bot, cid)
     status.send(f"⏳ Processing {file_type.title()}... Please wait.")
     
-    t_in = None
-    t_out = None
+    work_dir = None
 
     try:
         if file_type == 'photo': file_id = m.photo[-1].file_id
-        elif file_type == 'video': file_id = m.video.file_id
+        elif file_type == 'video': file_id = (m.video or m.document).file_id
         elif file_type == 'gif': file_id = m.animation.file_id
 
         file_info = bot.get_file(file_id)
@@ -89,28 +158,37 @@ def process_media(bot, m, file_type):
             return
 
         downloaded = bot.download_file(file_info.file_path)
-        ext_in = ".mp4" if file_type == 'video' else (".gif" if file_type == 'gif' else ".jpg")
-        
-        t_in = f"wm_in_{cid}{ext_in}"
-        t_out = f"wm_out_{cid}{ext_in}"
-        
-        with open(t_in, 'wb') as f: f.write(downloaded)
-        
         s = get_wm_settings(cid)
+
         if file_type == 'photo':
-            success = apply_watermark_image(t_in, t_out, s)
-        else:
-            # ভিডিওর ক্ষেত্রে একটু বেশি সময় লাগতে পারে
-            success = apply_watermark_video(t_in, t_out, s, is_gif=(file_type=='gif'))
-
-        if success:
-            with open(t_out, 'rb') as f:
-                if file_type == 'photo': bot.send_photo(cid, f, caption="✅ Done")
-                elif file_type == 'video': bot.send_video(cid, f, caption="✅ Done")
-                elif file_type == 'gif': bot.send_animation(cid, f, caption="✅ Done")
+            # ডাউনলোড → কম্পোজিট → JPEG → আপলোড, পুরোটাই মেমোরিতে
+            out = BytesIO()
+            if apply_watermark_image(downloaded, out, s):
+                out.seek(0)
+                bot.send_photo(cid, out, caption="✅ Done")
+            else:
+                bot.send_message(cid, "❌ Processing Failed (Engine Error).")
+
+        elif status.msg:
+            # ভিডিও/GIF মিডিয়া প্রসেস পুলে যায়; টেম্প ফাইল আর স্ট্যাটাস মেসেজ এখন জবের দায়িত্বে
+            render_in_background(
+                bot, cid, m.from_user.id, file_type, downloaded, dict(s), status.msg.message_id,
+                on_finish=lambda: refresh_main_menu(bot, cid)
+            )
+            status.msg = None
+            return
+
         else:
-            bot.send_message(cid, "❌ Processing Failed (Engine Error).")
-        
+            # স্ট্যাটাস মেসেজ পাঠানো না গেলে আগের মতো সরাসরি রেন্ডার
+            work_dir, t_in, t_out = media_temp_paths(file_type)
+            with open(t_in, 'wb') as f: f.write(downloaded)
+            if apply_watermark_video(t_in, t_out, s, is_gif=(file_type=='gif')):
+                with open(t_out, 'rb') as f:
+                    if file_type == 'video': bot.send_video(cid, f, caption="✅ Done")
+                    else: bot.send_animation(cid, f, caption="✅ Done")
+            else:
+                bot.send_message(cid, "❌ Processing Failed (Engine Error).")
+
         # সফল হলে মেনু রিফ্রেশ করা
         refresh_main_menu(bot, cid)
 
@@ -118,16 +196,72 @@ def process_media(bot, m, file_type):
         bot.send_message(cid, f"❌ Error: {e}")
     
     finally:
-        # 🧹 কাজ শেষে লোডিং মেসেজ এবং টেম্প ফাইল ডিলিট
+        # 🧹 কাজ শেষে লোডিং মেসেজ এবং টেম্প ডিরেক্টরি ডিলিট
         status.done() 
-        if t_in and os.path.exists(t_in): os.remove(t_in)
-        if t_out and os.path.exists(t_out): os.remove(t_out)
+        if work_dir: shutil.rmtree(work_dir, ignore_errors=True)
+
+# --- PROCESS ALBUM (media_group_id → one send_media_group) ---
+def process_album(bot, messages):
+    """
+    Watermarks every photo of an album in parallel and sends them back with
+    one send_media_group (chunks of 10). Other parts (video, GIF, video
+    document) go through process_media with their own type.
+    """
+    cid = messages[0].chat.id
+    photos = [m for m in messages if m.photo]
+    for m in messages:
+        file_type = media_type_of(m)
+        if file_type and file_type != 'photo': process_media(bot, m, file_type)
+    if not photos: return
+
+    status = StatusMsg(bot, cid)
+    status.send(f"⏳ Processing album ({len(photos)} photos)... Please wait.")
+    s = dict(get_wm_settings(cid))
+
+    def render(m):
+        file_info = bot.get_file(m.photo[-1].file_id)
+        if file_info.file_size and file_info.file_size > MAX_MEDIA_SIZE: return None
+        out = BytesIO()
+        if not apply_watermark_image(bot.download_file(file_info.file_path), out, s): return None
+        out.seek(0)
+        return out
+
+    try:
+        results = []
+        for future in [album_pool.submit(render, m) for m in photos]:
+            try: results.append(future.result())
+            except Exception as e:
+                print(f"Album item error: {e}")
+                results.append(None)
+        done = [r for r in results if r is not None]
+
+        for i in range(0, len(done), ALBUM_MAX):
+            chunk = done[i:i + ALBUM_MAX]
+            # send_media_group এ ২-১০টা আইটেম লাগে, একা বাকি থাকলে সাধারণ ছবি
+            if len(chunk) == 1:
+                bot.send_photo(cid, chunk[0], caption="✅ Done" if i == 0 else None)
+                continue
+            bot.send_media_group(cid, [
+                types.InputMediaPhoto(buf, caption="✅ Done" if i == 0 and j == 0 else None)
+                for j, buf in enumerate(chunk)
+            ])
+        failed = len(results) - len(done)
+        if failed: bot.send_message(cid, f"❌ {failed} of {len(results)} photos failed (Engine Error or too big).")
+
+        refresh_main_menu(bot, cid)
+    except Exception as e:
+        bot.send_message(cid, f"❌ Error: {e}")
+    finally:
+        status.done()
 
 # =========================================================
 # 🎮 MAIN HANDLERS
 # =========================================================
 
 def register_watermark_handlers(bot):
+    # পোলিং থ্রেড চালুর আগেই কিউ তৈরি (শিডিউলার থ্রেড এখানেই শুরু হয়)
+    get_media_queue()
+    albums = MediaGroupCollector(lambda messages: process_album(bot, messages))
 
     def safe_handle(call, func):
         try:
@@ -164,12 +298,11 @@ def register_watermark_handlers(bot):
                 refresh_main_menu(bot, cid)
             return
 
-        # মিডিয়া ইনপুট (ওয়াটারমার্ক প্রয়োগ)
-        if m.photo: process_media(bot, m, 'photo')
-        elif m.video: process_media(bot, m, 'video')
-        elif m.animation: process_media(bot, m, 'gif')
-        elif m.document and m.document.mime_type and 'video' in m.document.mime_type:
-            process_media(bot, m, 'video')
+        # মিডিয়া ইনপুট (ওয়াটারমার্ক প্রয়োগ); অ্যালবামের অংশগুলো জমিয়ে একসাথে
+        file_type = media_type_of(m)
+        if not file_type: return
+        if m.media_group_id: albums.add(m)
+        else: process_media(bot, m, file_type)
 
     # --- ৩. কলব্যাক হ্যান্ডলারস (ড্যাশবোর্ড ও সেটিংস) ---
     # এখানে tool_img যোগ করা হয়েছে কারণ callbacks.py থেকে এটি বাদ দেওয়া হয়েছে
@@ -179,7 +312,14 @@ def register_watermark_handlers(bot):
         data = c.data
 
         def action():
-            if data == "tool_img" or data == "wm_menu_main":
+            if data.startswith("wm_cancel_"):
+                job_id = data.replace("wm_cancel_", "")
+                owner = None if is_admin(c.from_user.id) else c.from_user.id
+                if not get_media_queue().cancel(job_id, user_id=owner):
+                    try: bot.answer_callback_query(c.id, "⚠️ Nothing to cancel.")
+                    except: pass
+
+            elif data == "tool_img" or data == "wm_menu_main":
                 user_states_watermark[cid] = "waiting_media"
                 refresh_main_menu(bot, cid, mid if data=="wm_menu_main" else None)
             
@@ -196,7 +336,7 @@ def register_watermark_handlers(bot):
                 if preview_img:
                     try: bot.delete_message(cid, mid)
                     except: pass
-                    sent = bot.send_photo(cid, preview_img, caption=f"🌐 **Library Preview**", reply_markup=markup)
+                    sent = send_cached(bot, "photo", cid, preview_img, caption=f"🌐 **Library Preview**", reply_markup=markup)
                     last_menu_ids[cid] = sent.message_id
                 else: send_menu(bot, cid, "📂 No fonts found.", markup, mid)
 
@@ -213,11 +353,10 @@ def register_watermark_handlers(bot):
 
             elif data == "wm_do_preview":
                 from PIL import Image
-                t_in, t_out = f"p_in_{cid}.jpg", f"p_out_{cid}.jpg"
-                Image.new('RGB', (1280, 720), (200, 200, 200)).save(t_in)
-                apply_watermark_image(t_in, t_out, get_wm_settings(cid))
-                with open(t_out, 'rb') as f: bot.send_photo(cid, f, caption="👁️ Preview")
-                os.remove(t_in); os.remove(t_out)
+                out = BytesIO()
+                apply_watermark_image(Image.new('RGB', (1280, 720), (200, 200, 200)), out, get_wm_settings(cid))
+                out.seek(0)
+                bot.send_photo(cid, out, caption="👁️ Preview")
                 refresh_main_menu(bot, cid)
 
             elif data == "wm_toggle_mode":
@@ -1,6 +1,5 @@
 # handlers/tools/watermark/data.py
-
-wm_storage = {}
+from utils.chat_store import ChatSettingsStore
 
 DEFAULT_WM_SETTINGS = {
     "mode": "text",             # 'text' or 'logo'
@@ -34,14 +33,23 @@ DEFAULT_WM_SETTINGS = {
     "pos_y": 0
 }
 
+def _new_settings():
+    s = DEFAULT_WM_SETTINGS.copy()
+    s["favorites"] = []
+    return s
+
+def _upgrade_settings(s):
+    # পুরনো রেকর্ডে নতুন ডিফল্ট কী না থাকলে যোগ করা
+    for k, v in DEFAULT_WM_SETTINGS.items(): s.setdefault(k, v)
+    if s.get("favorites") is None: s["favorites"] = []
+    return s
+
+# রিস্টার্টের পরও সেটিংস থাকে (data/chat_settings.db), RAM এ শুধু সাম্প্রতিক চ্যাট
+wm_storage = ChatSettingsStore("watermark", _new_settings, on_load=_upgrade_settings)
+
 def get_wm_settings(chat_id):
-    if chat_id not in wm_storage:
-        wm_storage[chat_id] = DEFAULT_WM_SETTINGS.copy()
-        if "favorites" not in wm_storage[chat_id]:
-            wm_storage[chat_id]["favorites"] = []
-    return wm_storage[chat_id]
+    return wm_storage.get(chat_id)
 
 def save_wm_settings(chat_id, key, value):
-    if chat_id not in wm_storage:
-        wm_storage[chat_id] = DEFAULT_WM_SETTINGS.copy()
-    wm_storage[chat_id][key] = value
+    wm_storage.get(chat_id)[key] = value
+    wm_storage.mark_dirty(chat_id)
@@ -1,8 +1,13 @@
 import os
+import re
 import sys
+import json
+import shutil
+import tempfile
+import subprocess
 from PIL import Image, ImageDraw, ImageFont, ImageEnhance, ImageColor
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont, ImageEnhance, ImageColor
+from .cache import layer_cache, font_cache, logo_cache, settings_hash, file_version, image_bytes
 
 # =========================================================
 # 🛡️ FFmpeg CRASH PROTECTION
@@ -54,7 +59,36 @@ def apply_opacity_pil(image, opacity_val):
     img.putalpha(alpha)
     return image
 
+def load_font(path, size):
+    """ImageFont.truetype() cached by (path, file version, size)."""
+    key = (path, file_version(path), size)
+    font = font_cache.get(key)
+    if font is None:
+        font = font_cache.put(key, ImageFont.truetype(path, size), 1)
+    return font
+
+def load_logo(path):
+    """Decoded RGBA logo cached by (path, file version). Never modify the result."""
+    key = (path, file_version(path))
+    logo = logo_cache.get(key)
+    if logo is None:
+        logo = Image.open(path).convert("RGBA")
+        logo_cache.put(key, logo, image_bytes(logo))
+    return logo
+
 def generate_watermark_layer(target_size, s):
+    """
+    Full-size RGBA watermark layer (or None), cached by (settings hash, w, h).
+    The returned image is shared between callers and must not be modified.
+    """
+    key = (settings_hash(s), target_size[0], target_size[1])
+    layer = layer_cache.get(key)
+    if layer is None:
+        layer = render_watermark_layer(target_size, s)
+        if layer is not None: layer_cache.put(key, layer, image_bytes(layer))
+    return layer
+
+def render_watermark_layer(target_size, s):
     width, height = target_size
     watermark_layer = Image.new("RGBA", (width, height), (0,0,0,0))
     wm_content = None
@@ -62,7 +96,7 @@ def generate_watermark_layer(target_size, s):
     # --- 1. GENERATE CONTENT (Logo/Text) ---
     if s["mode"] == "logo" and s["logo_path"] and os.path.exists(s["logo_path"]):
         try:
-            wm_content = Image.open(s["logo_path"]).convert("RGBA")
+            wm_content = load_logo(s["logo_path"])
             scale = s.get("logo_scale", 1.0)
             base_w = int(min(width, height) * 0.2 * scale)
             w_ratio = base_w / float(wm_content.size[0])
@@ -77,7 +111,7 @@ def generate_watermark_layer(target_size, s):
         
         font = None
         if s.get("font_path") and os.path.exists(s["font_path"]):
-            try: font = ImageFont.truetype(s["font_path"], font_size)
+            try: font = load_font(s["font_path"], font_size)
             except: pass
         if not font: font = ImageFont.load_default()
 
@@ -107,11 +141,8 @@ def generate_watermark_layer(target_size, s):
 
     if s["is_tiled"]:
         gap = s.get("tile_gap", 20); mode = s.get("tile_mode", "grid")
-        for y in range(0, height, wm_h + gap):
-            for x in range(0, width, wm_w + gap):
-                if mode == "vertical" and x > 0: continue
-                if mode == "horizontal" and y > 0: continue
-                watermark_layer.paste(wm_content, (x, y), wm_content)
+        if gap >= 0: watermark_layer = tile_watermark(wm_content, width, height, gap, mode)
+        else: paste_tiles(watermark_layer, wm_content, gap, mode) # টাইল ওভারল্যাপ করলে পুরনো লুপ
     else:
         padding = 20; pos = s["position"]
         if pos == "custom": x, y = s.get("pos_x", 0), s.get("pos_y", 0)
@@ -123,28 +154,173 @@ def generate_watermark_layer(target_size, s):
         
     return watermark_layer
 
+def paste_tiles(layer, content, gap, mode):
+    """Reference tiling: one masked paste per tile (needed when tiles overlap)."""
+    wm_w, wm_h = content.size
+    width, height = layer.size
+    for y in range(0, height, wm_h + gap):
+        for x in range(0, width, wm_w + gap):
+            if mode == "vertical" and x > 0: continue
+            if mode == "horizontal" and y > 0: continue
+            layer.paste(content, (x, y), content)
+
+def tile_watermark(content, width, height, gap, mode):
+    """
+    Same pixels as paste_tiles() for gap >= 0, with a handful of plain pastes:
+    one tile period (content + gap) → one pre-tiled row strip → strip pasted per row.
+    """
+    wm_w, wm_h = content.size
+    step_x, step_y = wm_w + gap, wm_h + gap
+    # মাস্ক সহ স্বচ্ছ ক্যানভাসে পেস্ট করলে পিক্সেল যা হয়, ঠিক সেটাই এক পিরিয়ডে রাখা
+    period = Image.new("RGBA", (step_x, step_y), (0, 0, 0, 0))
+    period.paste(content, (0, 0), content)
+
+    strip_w = min(step_x, width) if mode == "vertical" else width
+    strip = Image.new("RGBA", (strip_w, step_y), (0, 0, 0, 0))
+    for x in range(0, strip_w, step_x): strip.paste(period, (x, 0))
+
+    layer = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    rows = range(0, min(height, 1), step_y) if mode == "horizontal" else range(0, height, step_y)
+    for y in rows: layer.paste(strip, (0, y))
+    return layer
+
 # ==========================================
 # 🖼️ IMAGE PROCESSOR (Always Active)
 # ==========================================
-def apply_watermark_image(input_path, output_path, s):
+def apply_watermark_image(src, dst, s):
+    """
+    src: file path, raw bytes (bytes/bytearray/memoryview), file-like or PIL Image.
+    dst: file path or writable file-like (e.g. BytesIO) — gets the JPEG.
+    Buffers never touch the disk.
+    """
     try:
-        img = Image.open(input_path).convert("RGBA")
+        if isinstance(src, (bytes, bytearray, memoryview)): src = BytesIO(src)
+        img = src if isinstance(src, Image.Image) else Image.open(src)
+        img = img.convert("RGBA")
         wm_layer = generate_watermark_layer(img.size, s)
         if wm_layer:
             final_img = Image.alpha_composite(img, wm_layer).convert("RGB")
-            final_img.save(output_path, "JPEG", quality=95)
+            final_img.save(dst, "JPEG", quality=95)
         else:
-            img.convert("RGB").save(output_path, "JPEG")
+            img.convert("RGB").save(dst, "JPEG")
         return True
     except Exception as e:
         print(f"Image Engine Error: {e}")
         return False
 
+def media_temp_paths(file_type):
+    """Private temp dir + input/output paths for one video/GIF job (caller removes the dir)."""
+    work_dir = tempfile.mkdtemp(prefix="wm_job_")
+    ext = ".gif" if file_type == "gif" else ".mp4"
+    return work_dir, os.path.join(work_dir, f"in{ext}"), os.path.join(work_dir, f"out{ext}")
+
+# ==========================================
+# ⚡ FFMPEG OVERLAY PIPELINE (Native, Fast)
+# ==========================================
+# ওয়াটারমার্ক লেয়ার একবার PNG হিসেবে রেন্ডার করে একটিমাত্র ffmpeg কমান্ডে
+# overlay করা হয়; অডিও রি-এনকোড না করে কপি হয়। MoviePy শুধু ফলব্যাক।
+
+# 'auto' (ffmpeg, ব্যর্থ হলে moviepy), 'ffmpeg' অথবা 'moviepy'
+VIDEO_ENGINE = os.environ.get("WM_VIDEO_ENGINE", "auto").lower()
+
+def find_ffmpeg():
+    path = shutil.which("ffmpeg") or os.environ.get("IMAGEIO_FFMPEG_EXE")
+    return path if path and os.path.exists(path) else None
+
+def probe_video(ffmpeg_bin, input_path):
+    """Returns (width, height, codec, pix_fmt, duration, fps) as displayed (rotation applied)."""
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe:
+        out = subprocess.run(
+            [ffprobe, "-v", "error", "-select_streams", "v:0", "-show_streams", "-show_format", "-of", "json", input_path],
+            capture_output=True, text=True, timeout=30
+        )
+        info = json.loads(out.stdout or "{}")
+        st = (info.get("streams") or [{}])[0]
+        w, h = int(st.get("width", 0)), int(st.get("height", 0))
+        rotation = int(st.get("tags", {}).get("rotate", 0) or 0)
+        for side in st.get("side_data_list", []):
+            if "rotation" in side: rotation = int(side["rotation"])
+        if abs(rotation) % 180 == 90: w, h = h, w
+        try:
+            num, den = st.get("avg_frame_rate", "0/1").split("/")
+            fps = float(num) / float(den) if float(den) else 0.0
+        except ValueError: fps = 0.0
+        duration = float(st.get("duration") or info.get("format", {}).get("duration") or 0)
+        return w, h, st.get("codec_name"), st.get("pix_fmt"), duration, fps
+
+    # ffprobe না থাকলে (imageio-ffmpeg) 'ffmpeg -i' এর stderr থেকে পার্স করা
+    out = subprocess.run([ffmpeg_bin, "-hide_banner", "-i", input_path], capture_output=True, text=True, timeout=30)
+    m = re.search(r"Video: (\w+)[^,]*, (\w+)[^,]*,.*? (\d{2,5})x(\d{2,5})", out.stderr)
+    if not m: raise RuntimeError("Could not read video stream info")
+    d = re.search(r"Duration: (\d+):(\d+):([\d.]+)", out.stderr)
+    duration = int(d.group(1)) * 3600 + int(d.group(2)) * 60 + float(d.group(3)) if d else 0.0
+    f = re.search(r"([\d.]+) fps", out.stderr)
+    return int(m.group(3)), int(m.group(4)), m.group(1), m.group(2), duration, float(f.group(1)) if f else 0.0
+
+def pick_x264_preset(width, height, duration, fps):
+    """Heavier inputs get faster presets so render time stays bounded."""
+    work = width * height * max(duration, 1) * (fps or 30)
+    if work <= 1280 * 720 * 30 * 15: return "medium"      # ≤ ~15s of 720p
+    if work <= 1920 * 1080 * 30 * 60: return "veryfast"   # ≤ ~1 min of 1080p
+    return "ultrafast"
+
+def apply_watermark_video_ffmpeg(input_path, output_path, s, is_gif=False):
+    ffmpeg_bin = find_ffmpeg()
+    if not ffmpeg_bin: raise RuntimeError("ffmpeg binary not found")
+
+    width, height, codec, pix_fmt, duration, fps = probe_video(ffmpeg_bin, input_path)
+    wm_pil = generate_watermark_layer((width, height), s)
+
+    work_dir = tempfile.mkdtemp(prefix="wm_ff_")
+    try:
+        cmd = [ffmpeg_bin, "-y", "-hide_banner", "-loglevel", "error", "-i", input_path]
+        if wm_pil:
+            layer_path = os.path.join(work_dir, "layer.png")
+            wm_pil.save(layer_path, "PNG")
+            cmd += ["-i", layer_path]
+            graph = "[0:v][1:v]overlay=0:0:format=auto"
+        else:
+            graph = "[0:v]null"
+
+        if is_gif:
+            # MoviePy ফলব্যাকের মতো 10fps, পূর্ণ প্যালেট সহ এক পাসে GIF
+            graph += ",fps=10,split[a][b];[a]palettegen[p];[b][p]paletteuse[v]"
+            cmd += ["-filter_complex", graph, "-map", "[v]", output_path]
+        else:
+            graph += ",format=yuv420p[v]" if pix_fmt != "yuv420p" else "[v]"
+            cmd += [
+                "-filter_complex", graph, "-map", "[v]", "-map", "0:a?",
+                "-c:v", "libx264", "-preset", pick_x264_preset(width, height, duration, fps), "-crf", "23",
+                "-c:a", "copy", "-movflags", "+faststart", output_path
+            ]
+
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0 and not is_gif:
+            # কিছু কন্টেইনারের অডিও mp4-এ কপি করা যায় না → AAC তে রি-এনকোড করে আবার চেষ্টা
+            cmd[cmd.index("-c:a") + 1] = "aac"
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip()[-500:] or f"ffmpeg exited with {proc.returncode}")
+        return True
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
 # ==========================================
 # 🎬 VIDEO/GIF PROCESSOR (Conditional)
 # ==========================================
 def apply_watermark_video(input_path, output_path, s, is_gif=False):
-    # যদি VIDEO_SUPPORT ফলস হয়, তবে সরাসরি বের হয়ে যাবে (ক্র্যাশ করবে না)
+    if VIDEO_ENGINE in ("auto", "ffmpeg"):
+        try:
+            return apply_watermark_video_ffmpeg(input_path, output_path, s, is_gif)
+        except Exception as e:
+            print(f"FFmpeg Engine Error: {e}")
+            if VIDEO_ENGINE == "ffmpeg": return False
+            print("ℹ️ Falling back to MoviePy.")
+    return apply_watermark_video_moviepy(input_path, output_path, s, is_gif)
+
+def apply_watermark_video_moviepy(input_path, output_path, s, is_gif=False):
+    # যদি VIDEO_SUPPORT ফলস হয়, তবে সরাসরি বের হয়ে যাবে (ক্র্যাশ করবে না)
     if not VIDEO_SUPPORT:
         print("❌ Video watermarking is disabled due to missing FFmpeg.")
         return False
@@ -166,7 +342,7 @@ def apply_watermark_video(input_path, output_path, s, is_gif=False):
                 output_path, 
                 codec='libx264', 
                 audio_codec='aac', 
-                temp_audiofile='temp-audio.m4a', 
+                temp_audiofile=os.path.splitext(output_path)[0] + '-audio.m4a', 
                 remove_temp=True,
                 preset='ultrafast',
                 verbose=False, logger=None
@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import uuid
+import tempfile
+import threading
+import subprocess
+
+# =========================================================
+# 🏭 MEDIA JOB QUEUE (CPU-bound Video/GIF Rendering)
+# =========================================================
+# ভিডিও/GIF রেন্ডার আলাদা প্রসেসে চলে, তাই বটের থ্রেডগুলো CPU পায়।
+# প্রতিটি জবের নিজের প্রসেস থাকে, ফলে টাইমআউট বা ক্যানসেল হলে শুধু
+# সেই প্রসেসটাকেই kill করা যায়। প্রসেসটা fork নয়, নতুন ইন্টারপ্রেটার (worker.py):
+# বট প্রসেসে অনেক থ্রেড চলে, fork করলে তাদের ধরে রাখা লক চাইল্ডে আটকে যেতে পারত।
+# তাই জবে শুধু JSON-যোগ্য আর্গুমেন্ট (পাথ, সেটিংস) যায়।
+
+MEDIA_WORKERS = int(os.environ.get("MEDIA_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+MEDIA_QUEUE_SIZE = int(os.environ.get("MEDIA_QUEUE_SIZE", "20"))   # মোট অপেক্ষমাণ + চলমান জব
+MEDIA_PER_USER = int(os.environ.get("MEDIA_PER_USER", "2"))         # একজন ইউজারের সর্বোচ্চ জব
+MEDIA_JOB_TIMEOUT = int(os.environ.get("MEDIA_JOB_TIMEOUT", "300"))  # সেকেন্ড
+
+WORKER_MODULE = "handlers.tools.watermark.worker"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class UserLimitError(Exception):
+    pass
+
+
+class MediaJob:
+    def __init__(self, user_id, fn, args, on_done=None, on_position=None):
+        self.job_id = uuid.uuid4().hex[:10]
+        self.user_id = user_id
+        self.fn = fn
+        self.args = args
+        # চাইল্ডে যা যায়; সাবমিটের সময়ই সিরিয়ালাইজ, যাতে ভুল আর্গুমেন্ট সাথে সাথে ধরা পড়ে
+        self.payload = json.dumps({"fn": f"{fn.__module__}:{fn.__qualname__}", "args": list(args)})
+        self.on_done = on_done           # on_done(job) -> job.state / job.result / job.error
+        self.on_position = on_position   # on_position(job, position) কিউতে অবস্থান বদলালে
+        self.state = "queued"            # queued | running | done | failed | timeout | cancelled
+        self.result = None
+        self.error = None
+        self.position = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.process = None
+
+
+class MediaJobQueue:
+    """
+    Bounded FIFO of media jobs executed in separate worker interpreters.
+    `fn` must be a module-level function and its args JSON-serializable.
+    At most `workers` jobs run at once, each user may have at most
+    `per_user` jobs in the system, and a running job is killed after
+    `timeout` seconds.
+    """
+
+    def __init__(self, workers=MEDIA_WORKERS, max_queue=MEDIA_QUEUE_SIZE, per_user=MEDIA_PER_USER, timeout=MEDIA_JOB_TIMEOUT):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.per_user = per_user
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._pending = []
+        self._running = {}
+        self._jobs = {}
+        threading.Thread(target=self._scheduler, name="media-scheduler", daemon=True).start()
+
+    # --- PUBLIC API ---
+    def submit(self, user_id, fn, *args, on_done=None, on_position=None):
+        with self._cond:
+            if len(self._pending) + len(self._running) >= self.max_queue:
+                raise QueueFullError("Media queue is full")
+            if self._user_jobs(user_id) >= self.per_user:
+                raise UserLimitError(f"Max {self.per_user} jobs per user")
+            job = MediaJob(user_id, fn, args, on_done, on_position)
+            self._pending.append(job)
+            self._jobs[job.job_id] = job
+            job.position = len(self._pending)
+            self._cond.notify_all()
+            return job
+
+    def cancel(self, job_id, user_id=None):
+        """Cancels a queued or running job. Returns False if not allowed/found."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or (user_id is not None and job.user_id != user_id): return False
+            if job.state == "queued":
+                self._pending.remove(job)
+                self._finish(job, "cancelled")
+                self._announce_positions()
+                return True
+            if job.state == "running":
+                job.state = "cancelled"
+                if job.process and job.process.poll() is None: job.process.kill()
+                return True
+        return False
+
+    def get_stats(self):
+        with self._cond:
+            return {"running": len(self._running), "queued": len(self._pending), "workers": self.workers}
+
+    # --- INTERNALS ---
+    def _user_jobs(self, user_id):
+        return sum(1 for j in self._pending if j.user_id == user_id) + \
+               sum(1 for j in self._running.values() if j.user_id == user_id)
+
+    def _announce_positions(self):
+        for i, job in enumerate(self._pending, start=1):
+            if job.position != i:
+                job.position = i
+                self._callback(job.on_position, job, i)
+
+    def _callback(self, fn, *args):
+        if not fn: return
+        try: fn(*args)
+        except Exception as e: print(f"⚠️ Media job callback error: {e}")
+
+    def _finish(self, job, state, result=None, error=None):
+        job.state, job.result, job.error = state, result, error
+        job.finished = time.time()
+        self._jobs.pop(job.job_id, None)
+        # কলব্যাক নিজের থ্রেডে, যাতে আপলোড চলাকালীন কিউ লক আটকে না থাকে
+        threading.Thread(target=self._callback, args=(job.on_done, job), daemon=True).start()
+
+    def _scheduler(self):
+        while True:
+            with self._cond:
+                while not self._pending or len(self._running) >= self.workers:
+                    self._cond.wait()
+                job = self._pending.pop(0)
+                job.state, job.started, job.position = "running", time.time(), 0
+                self._running[job.job_id] = job
+                self._announce_positions()
+            threading.Thread(target=self._run_job, args=(job,), name=f"media-{job.job_id}", daemon=True).start()
+
+    def _run_job(self, job):
+        fd, result_path = tempfile.mkstemp(prefix="mediajob_", suffix=".json")
+        os.close(fd)
+        state, result, error = "failed", None, None
+        try:
+            if job.state != "cancelled": # চালুর আগেই ক্যানসেল হলে প্রসেসই নয়
+                job.process = subprocess.Popen([sys.executable, "-m", WORKER_MODULE, result_path],
+                                               stdin=subprocess.PIPE, cwd=os.getcwd())
+                job.process.communicate(job.payload.encode(), timeout=self.timeout)
+                with open(result_path) as f: status, payload = json.load(f)
+                if status == "ok": state, result = "done", payload
+                else: error = payload
+        except subprocess.TimeoutExpired:
+            state, error = "timeout", f"Timed out after {self.timeout}s"
+        except (ValueError, OSError):
+            error = "Worker process died" # kill() হলে বা ক্র্যাশ করলে ফলাফল ফাইল খালি থাকে
+        except Exception as e:
+            error = str(e)
+        finally:
+            if job.process is not None:
+                if job.process.poll() is None: job.process.kill()
+                try: job.process.wait(5)
+                except subprocess.TimeoutExpired: pass
+            try: os.remove(result_path)
+            except OSError: pass
+
+        with self._cond:
+            if job.state == "cancelled": state = "cancelled"
+            self._running.pop(job.job_id, None)
+            self._finish(job, state, result, error)
+            self._cond.notify_all()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_media_queue():
+    """Process-wide media queue shared by the watermark studio and /wm."""
+    global _queue
+    with _queue_lock:
+        if _queue is None: _queue = MediaJobQueue()
+        return _queue
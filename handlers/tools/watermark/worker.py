@@ -0,0 +1,34 @@
+import sys
+import json
+import importlib
+import traceback
+
+# =========================================================
+# 🧵 MEDIA JOB WORKER (Fresh Interpreter Entry Point)
+# =========================================================
+# MediaJobQueue প্রতিটি জব এখানে নতুন পাইথন প্রসেসে চালায়:
+#   python -m handlers.tools.watermark.worker <result_path>
+# stdin এ {"fn": "module:qualname", "args": [...]} (শুধু পাথ আর সেটিংস), ফলাফল
+# result_path এ ["ok", result] বা ["error", message] হিসেবে লেখা হয়।
+# বটের মাল্টিথ্রেডেড প্রসেস fork করা হয় না, তাই অন্য থ্রেডের ধরে রাখা লক
+# (ক্যাশ, লগিং, HTTP পুল) চাইল্ডে আটকে থাকার ভয় নেই।
+
+
+def resolve(target):
+    module, _, name = target.partition(":")
+    obj = importlib.import_module(module)
+    for part in name.split("."): obj = getattr(obj, part)
+    return obj
+
+
+def main(result_path):
+    payload = json.load(sys.stdin)
+    try: out = ["ok", resolve(payload["fn"])(*payload["args"])]
+    except Exception as e:
+        traceback.print_exc()
+        out = ["error", str(e)]
+    with open(result_path, "w") as f: json.dump(out, f)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -2,10 +2,11 @@ import os
 from telebot import types
 from handlers.tools.group_management.data import get_data, save_wm_settings
 from handlers.tools.watermark_engine import apply_watermark
+from utils.session_store import SessionStore
 
 # স্টেট ম্যানেজমেন্ট
 user_states = {} 
-last_menu_ids = {} # মেনু ক্লিন রাখার জন্য
+last_menu_ids = SessionStore("wm_ui_menus", ttl=48 * 3600) # মেনু ক্লিন রাখার জন্য
 
 # ---------------------------------------------------------
 # 🛠️ HELPER FUNCTIONS
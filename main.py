@@ -8,6 +8,7 @@ import time
 import threading
 import telebot
 from telebot import apihelper
+from utils.update_dispatcher import install_dispatcher
 
 # =========================================================
 # 🚀 0. SYSTEM ENVIRONMENT SETUP (FIX FOR FFmpeg)
@@ -49,6 +50,7 @@ logger = logging.getLogger(__name__)
 
 try:
     from config import BOT_TOKEN, DATA_DIR, USERS_FILE, SHOPS_FILE, CUSTOM_FILE
+    from config import BOT_MODE, WEBHOOK_URL, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_SECRET, UPDATE_WORKERS, UPDATE_QUEUE_SIZE, TELEGRAM_API_URL
     logger.info("✅ Loaded settings from config.py")
 except ImportError:
     logger.warning("⚠️ config.py not found! Using Environment Variables & Defaults.")
@@ -57,6 +59,14 @@ except ImportError:
     USERS_FILE = os.path.join(DATA_DIR, "users.json")
     SHOPS_FILE = os.path.join(DATA_DIR, "shops.json")
     CUSTOM_FILE = os.path.join(DATA_DIR, "custom.json")
+    BOT_MODE = os.environ.get("BOT_MODE", "polling").lower()
+    WEBHOOK_URL = os.environ.get("WEBHOOK_URL")
+    WEBHOOK_HOST = os.environ.get("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT = int(os.environ.get("PORT", os.environ.get("WEBHOOK_PORT", "8080")))
+    WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET")
+    UPDATE_WORKERS = int(os.environ.get("UPDATE_WORKERS", "8"))
+    UPDATE_QUEUE_SIZE = int(os.environ.get("UPDATE_QUEUE_SIZE", "1000"))
+    TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL")
 
 USERBOT_SESSIONS_FILE = os.path.join(DATA_DIR, "userbot_sessions.json")
 
@@ -64,7 +74,23 @@ if not BOT_TOKEN:
     logger.error("❌ CRITICAL ERROR: BOT_TOKEN is missing!")
     sys.exit(1)
 
-bot = telebot.TeleBot(BOT_TOKEN, parse_mode="HTML", use_class_middlewares=True)
+if BOT_MODE == "webhook":
+    try: from utils.webhook_server import start_webhook
+    except ImportError as e:
+        logger.error(f"❌ Webhook mode needs Flask ({e}). Falling back to polling.")
+        BOT_MODE = "polling"
+
+if BOT_MODE == "webhook" and not WEBHOOK_URL:
+    logger.error("❌ BOT_MODE=webhook needs WEBHOOK_URL. Falling back to polling.")
+    BOT_MODE = "polling"
+
+# লোকাল ফেক টেলিগ্রাম এন্ডপয়েন্টে টেস্টের জন্য API URL বদলানো
+if TELEGRAM_API_URL:
+    apihelper.API_URL = TELEGRAM_API_URL.rstrip("/") + "/bot{0}/{1}"
+    apihelper.FILE_URL = TELEGRAM_API_URL.rstrip("/") + "/file/bot{0}/{1}"
+
+# সব হ্যান্ডলার আমাদের পার-চ্যাট লেন-ডিসপ্যাচারে চলে, তাই telebot-এর নিজের থ্রেডপুল বন্ধ
+bot = telebot.TeleBot(BOT_TOKEN, parse_mode="HTML", use_class_middlewares=True, threaded=False)
 
 # =========================================================
 # 🛰️ 2. DYNAMIC USERBOT TASK MANAGER (Optimized)
@@ -294,6 +320,10 @@ async def start_all():
     logger.info("🚀 Starting Userbot Engine...")
     await start_userbot_engine()
 
+    # সব আপডেট পার-চ্যাট লেনে (bot threaded=False, তাই এটা ছাড়া সব হ্যান্ডলার পোলিং থ্রেডে সিরিয়ালি চলত)
+    dispatcher = install_dispatcher(bot, UPDATE_WORKERS, UPDATE_QUEUE_SIZE)
+    logger.info(f"🛣 Update dispatcher: {dispatcher.lane_count} lanes, queue {UPDATE_QUEUE_SIZE}")
+
     # মেইন বটের পোলিং ফাংশন
     def run_polling():
         logger.info("🤖 Bot is starting infinity polling...")
@@ -303,9 +333,14 @@ async def start_all():
         except Exception as e:
             logger.error(f"Polling Error: {e}")
 
-    # থ্রেডিং ব্যবহার করে পোলিং রান করা (যাতে অ্যাসিনক্রোনাস টাস্ক ব্লক না হয়)
-    polling_thread = threading.Thread(target=run_polling, daemon=True)
-    polling_thread.start()
+    if BOT_MODE == "webhook":
+        # টেলিগ্রাম আপডেট POST করে, সার্ভার সেগুলো সরাসরি লেন-ডিসপ্যাচারে দেয়
+        logger.info("🌐 Bot is starting in webhook mode...")
+        start_webhook(bot, dispatcher, WEBHOOK_URL, host=WEBHOOK_HOST, port=WEBHOOK_PORT, secret_token=WEBHOOK_SECRET)
+    else:
+        # থ্রেডিং ব্যবহার করে পোলিং রান করা (যাতে অ্যাসিনক্রোনাস টাস্ক ব্লক না হয়)
+        polling_thread = threading.Thread(target=run_polling, daemon=True)
+        polling_thread.start()
     
     # শিডিউলার থ্রেড
     scheduler_thread = threading.Thread(target=scheduler_loop, daemon=True)
@@ -0,0 +1,12 @@
+import os
+import socket
+import sys
+
+# টেস্টগুলো রিপোর রুট থেকে `utils.…` / `handlers.…` ইমপোর্ট করে
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
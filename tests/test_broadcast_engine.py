@@ -0,0 +1,74 @@
+import os
+import threading
+
+from telebot.apihelper import ApiTelegramException
+
+from utils import broadcast_engine
+from utils.broadcast_engine import BroadcastEngine, BroadcastJob
+
+
+def flood(retry_after=1):
+    return ApiTelegramException("copyMessage", None, {
+        "ok": False, "error_code": 429, "description": "Too Many Requests",
+        "parameters": {"retry_after": retry_after},
+    })
+
+
+class FakeBot:
+    """copy_message raises 429 for users in `flooded` until they run out of floods."""
+
+    def __init__(self, floods):
+        self.floods = dict(floods)
+        self.delivered = []
+        self._lock = threading.Lock()
+
+    def copy_message(self, chat_id, from_chat_id, message_id):
+        with self._lock:
+            if self.floods.get(chat_id, 0) > 0:
+                self.floods[chat_id] -= 1
+                raise flood()
+            self.delivered.append(chat_id)
+
+    def edit_message_text(self, *args, **kwargs): pass
+
+
+def run(tmp_path, bot, user_ids):
+    engine = BroadcastEngine(bot, str(tmp_path), rate=1000, workers=2, progress_interval=60)
+    engine.bucket.pause = lambda seconds: None # টেস্টে retry_after পর্যন্ত ঘুম নয়
+    engine.chat_limiter.acquire = lambda chat_id: None
+    done = threading.Event()
+    jobs = []
+    engine.start_job(1, 2, 3, 4, user_ids, on_done=lambda job: (jobs.append(job), done.set()))
+    assert done.wait(10)
+    return engine, jobs[0]
+
+
+def done_lines(job):
+    if not os.path.exists(job.done_path): return []
+    with open(job.done_path, encoding="utf-8") as f: return [line.split("\t")[0] for line in f]
+
+
+def test_flood_on_every_attempt_is_retried_in_a_later_round(tmp_path):
+    bot = FakeBot({"11": broadcast_engine.MAX_ATTEMPTS})
+    _, job = run(tmp_path, bot, ["10", "11"])
+
+    assert sorted(bot.delivered) == ["10", "11"]
+    assert (job.sent, job.failed) == (2, 0)
+    assert not job.retry_ids
+    assert not os.path.exists(job.meta_path) # সব পাঠানো শেষ → জব ফাইল মুছে গেছে
+
+
+def test_still_flooded_users_are_not_marked_done_and_resume_later(tmp_path, monkeypatch):
+    monkeypatch.setattr(broadcast_engine, "RETRY_ROUNDS", 1)
+    bot = FakeBot({"11": 10 * broadcast_engine.MAX_ATTEMPTS})
+    engine, job = run(tmp_path, bot, ["10", "11"])
+
+    assert bot.delivered == ["10"]
+    assert (job.sent, job.failed) == (1, 0)
+    assert job.retry_ids == {"11"}
+    assert done_lines(job) == ["10"]
+    assert os.path.exists(job.meta_path)
+    assert "Rate-limited" in engine.report_text(job)
+
+    resumed = BroadcastJob.load(job.meta_path)
+    assert resumed.pending_ids() == ["11"]
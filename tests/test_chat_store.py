@@ -0,0 +1,37 @@
+import json
+
+from utils import chat_store
+from utils.chat_store import ChatSettingsStore
+
+
+def stored(store, chat_id):
+    row = store._conn.execute(
+        "SELECT data FROM chat_settings WHERE namespace=? AND chat_id=?", (store.namespace, str(chat_id))
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def make_store(tmp_path, name):
+    return ChatSettingsStore(name, lambda: {"on": False}, db_path=str(tmp_path / "chat.db"), flush_interval_ms=3600 * 1000)
+
+
+def test_change_right_after_get_is_flushed(tmp_path):
+    store = make_store(tmp_path, "recent")
+    store.get(1)["on"] = True
+    assert store.flush()
+    assert stored(store, 1) == {"on": True}
+
+
+def test_late_change_needs_mark_dirty(tmp_path, monkeypatch):
+    store = make_store(tmp_path, "late")
+    data = store.get(1)
+    monkeypatch.setattr(chat_store, "RECHECK_WINDOW", 0) # get() এর পর উইন্ডো শেষ
+    store.flush()
+
+    data["on"] = True
+    store.flush()
+    assert stored(store, 1) == {"on": False} # চেক উইন্ডোর বাইরে, তাই নজরে পড়েনি
+
+    store.mark_dirty(1)
+    store.flush()
+    assert stored(store, 1) == {"on": True}
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace as NS
+
+import pytest
+from telebot.apihelper import ApiTelegramException
+
+from utils.download_cache import DownloadResultCache
+from utils.download_pipeline import DownloadPipeline, QueueFullError, UserLimitError
+
+
+@pytest.fixture(autouse=True)
+def tmp_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) # জবের টেম্প ফোল্ডার (downloads/…) টেস্ট ডিরেক্টরিতে
+
+
+def sent_photo(i):
+    return NS(message_id=i, photo=[NS(file_id=f"F{i}", file_size=100)], video=None)
+
+
+def wait_until(cond, timeout=5):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond(): return True
+        time.sleep(0.02)
+    return False
+
+
+def fixture_fetch(job, idx, item):
+    path = job.path(f"{idx}.jpg")
+    with open(path, "wb") as f: f.write(b"\xff\xd8fixture")
+    return [("photo", path)]
+
+
+def make_pipeline(name, **kw):
+    uploads, errors, empties = [], [], []
+
+    def upload(job, media):
+        uploads.append((job, list(media), job.caption))
+        return [sent_photo(i) for i in range(len(media))]
+
+    defaults = dict(metadata=lambda job: ["a", "b"], fetch=fixture_fetch, upload=upload,
+                    on_error=lambda job, e: errors.append(e), on_empty=lambda job: empties.append(job))
+    defaults.update(kw)
+    return DownloadPipeline(name, **defaults), uploads, errors, empties
+
+
+def test_per_user_and_queue_caps():
+    gate = threading.Event()
+
+    def slow_metadata(job):
+        gate.wait(5)
+        return []
+
+    p, _, _, _ = make_pipeline("caps", metadata=slow_metadata, max_jobs=1, max_queue=3, per_user=2)
+    p.submit(1, 1, {})
+    p.submit(1, 1, {})
+    with pytest.raises(UserLimitError): p.submit(1, 1, {})
+    p.submit(2, 2, {})
+    with pytest.raises(QueueFullError): p.submit(3, 3, {})
+    assert p.get_stats()["rejected"] == 2
+
+    gate.set()
+    assert wait_until(lambda: p.get_stats()["active"] == 0)
+    p.submit(1, 1, {}) # স্লট খালি হলে আবার নেয়
+
+
+def test_fetch_and_upload_in_order_and_files_cleaned():
+    p, uploads, _, _ = make_pipeline("order", metadata=lambda job: list(range(4)))
+    job = p.submit(1, 1, {})
+    assert wait_until(lambda: p.get_stats()["done"] == 1)
+    _, media, _ = uploads[0]
+    assert [src.rsplit("/", 1)[-1] for _, src in media] == ["0.jpg", "1.jpg", "2.jpg", "3.jpg"]
+    assert not os.path.exists(job.work_dir)
+
+
+def test_stage_failure_reaches_on_error():
+    def bad_upload(job, media): raise RuntimeError("telegram said no")
+
+    p, _, errors, _ = make_pipeline("fail", upload=bad_upload)
+    job = p.submit(1, 1, {})
+    assert wait_until(lambda: p.get_stats()["failed"] == 1)
+    assert [str(e) for e in errors] == ["telegram said no"]
+    assert job.stage == "upload"
+
+    def bad_metadata(job): raise ValueError("no such post")
+
+    p2, uploads, errors2, _ = make_pipeline("fail-meta", metadata=bad_metadata)
+    p2.submit(1, 1, {})
+    assert wait_until(lambda: p2.get_stats()["failed"] == 1)
+    assert [str(e) for e in errors2] == ["no such post"] and uploads == []
+
+
+def test_failed_fetch_item_is_skipped_and_empty_reported():
+    def broken_fetch(job, idx, item): raise IOError("404")
+
+    p, uploads, errors, empties = make_pipeline("empty", fetch=broken_fetch)
+    p.submit(1, 1, {})
+    assert wait_until(lambda: p.get_stats()["empty"] == 1)
+    assert len(empties) == 1 and uploads == [] and errors == []
+
+
+def test_cache_replay_skips_download(tmp_path):
+    fetched = []
+
+    def counting_fetch(job, idx, item):
+        fetched.append(item)
+        return fixture_fetch(job, idx, item)
+
+    def metadata(job):
+        job.caption = "caption"
+        return ["a", "b"]
+
+    cache = DownloadResultCache("t", db_path=str(tmp_path / "dl.db"))
+    p, uploads, _, _ = make_pipeline("replay", metadata=metadata, fetch=counting_fetch,
+                                     cache=cache, cache_key=lambda job: job.payload["post"])
+    p.submit(1, 1, {"post": "42"})
+    assert wait_until(lambda: p.get_stats()["done"] == 1)
+    p.submit(1, 1, {"post": "42"})
+    assert wait_until(lambda: p.get_stats()["cached"] == 1)
+
+    assert fetched == ["a", "b"] # দ্বিতীয়বার কোনো ডাউনলোড নেই
+    _, media, caption = uploads[1]
+    assert media == [("photo", "F0"), ("photo", "F1")] and caption == "caption"
+    assert p.get_stats()["cache"]["hits"] == 1
+
+
+def test_stale_file_ids_fall_back_to_download(tmp_path):
+    cache = DownloadResultCache("stale", db_path=str(tmp_path / "dl.db"))
+    cache.put("7", [("photo", "DEAD")], "old")
+    calls = []
+
+    def upload(job, media):
+        calls.append(media)
+        if media[0][1] == "DEAD": raise ApiTelegramException("sendMediaGroup", None, {
+            "error_code": 400, "description": "Bad Request: wrong file identifier/HTTP URL specified"})
+        return [sent_photo(i) for i in range(len(media))]
+
+    p, _, errors, _ = make_pipeline("stale", upload=upload, cache=cache, cache_key=lambda job: "7")
+    p.submit(1, 1, {})
+    assert wait_until(lambda: p.get_stats()["done"] == 1)
+    assert len(calls) == 2 and errors == []
+    assert cache.get("7")[0] == [("photo", "F0"), ("photo", "F1")]
+
+
+def test_late_caption_edits_first_message_and_cache(tmp_path):
+    translation, edits = Future(), []
+
+    def metadata(job):
+        job.caption = "original"
+        job.caption_future = translation
+        return ["a"]
+
+    cache = DownloadResultCache("late", db_path=str(tmp_path / "dl.db"))
+    p, uploads, _, _ = make_pipeline("late", metadata=metadata, cache=cache, cache_key=lambda job: "9",
+                                     edit_caption=lambda job, m: edits.append((job.caption, m.message_id)))
+    p.submit(1, 1, {})
+    assert wait_until(lambda: p.get_stats()["done"] == 1)
+    assert uploads[0][2] == "original" and edits == [] # অনুবাদের অপেক্ষায় পাঠানো আটকায় না
+
+    translation.set_result("অনুবাদ")
+    assert wait_until(lambda: edits == [("অনুবাদ", 0)])
+    assert cache.get("9")[1] == "অনুবাদ"
+    assert p.get_stats()["late_captions"] == 1
+
+
+def test_ready_caption_is_used_without_edit():
+    translation, edits = Future(), []
+    translation.set_result("ready")
+
+    def metadata(job):
+        job.caption = "original"
+        job.caption_future = translation
+        return ["a"]
+
+    p, uploads, _, _ = make_pipeline("ready", metadata=metadata, edit_caption=lambda job, m: edits.append(m))
+    p.submit(1, 1, {})
+    assert wait_until(lambda: p.get_stats()["done"] == 1)
+    assert uploads[0][2] == "ready" and edits == []
+
+
+def test_failed_translation_is_not_cached(tmp_path):
+    cache = DownloadResultCache("untranslated", db_path=str(tmp_path / "dl.db"))
+    pending, ready, edits = Future(), Future(), []
+    ready.failed = True
+    ready.set_result("original")
+    futures = {"late": pending, "ready": ready}
+
+    def metadata(job):
+        job.caption = "original"
+        job.caption_future = futures[job.payload["post"]]
+        return ["a"]
+
+    p, uploads, _, _ = make_pipeline("untranslated", metadata=metadata, cache=cache, cache_key=lambda job: job.payload["post"],
+                                     edit_caption=lambda job, m: edits.append(m))
+    p.submit(1, 1, {"post": "ready"})
+    p.submit(2, 2, {"post": "late"})
+    assert wait_until(lambda: p.get_stats()["done"] == 2)
+    assert cache.get("late") is None # অনুবাদ শেষ হওয়ার আগে ক্যাশে নয়
+
+    pending.failed = True
+    pending.set_result("original")
+    time.sleep(0.1)
+    assert cache.get("ready") is None and cache.get("late") is None
+    assert edits == [] and p.get_stats()["late_captions"] == 0
@@ -0,0 +1,136 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import free_port
+from utils.http_client import http
+from utils.mirror_race import MirrorRacer
+
+
+def fetcher(behaviour):
+    """behaviour: mirror -> (delay_s, ok)"""
+    def fetch(mirror):
+        delay, ok = behaviour[mirror]
+        time.sleep(delay)
+        if not ok: raise IOError(f"{mirror} down")
+        return f"data from {mirror}"
+    return fetch
+
+
+def race(racer, behaviour, timeout=2):
+    return racer.race([(m, m) for m in behaviour], fetcher(behaviour), timeout=timeout)
+
+
+def test_first_success_wins_and_failures_are_skipped():
+    racer = MirrorRacer("t-first", parallel=3)
+    behaviour = {"slow": (0.4, True), "fast": (0.05, True), "broken": (0.0, False)}
+    assert race(racer, behaviour) == ("fast", "data from fast")
+
+    # সবচেয়ে দ্রুতটা ফেইল করলে পরের সফলটা
+    behaviour = {"slow": (0.2, True), "fast": (0.05, False)}
+    assert race(racer, behaviour) == ("slow", "data from slow")
+
+
+def test_failed_slot_launches_next_ranked_mirror():
+    racer = MirrorRacer("t-slots", parallel=1)
+    behaviour = {"a": (0.0, False), "b": (0.0, False), "c": (0.0, True)}
+    assert race(racer, behaviour) == ("c", "data from c")
+
+
+def test_ranking_follows_latency_and_fail_rate():
+    racer = MirrorRacer("t-rank", parallel=3)
+    for _ in range(3): race(racer, {"fast": (0.01, True), "slow": (0.15, True), "flaky": (0.01, False)})
+    time.sleep(0.3) # হেরে যাওয়া "slow" এর লেটেন্সিও রেকর্ড হোক
+    assert racer.ranked(["slow", "flaky", "fast"])[0] == "fast"
+    stats = {s["mirror"]: s for s in racer.get_stats()}
+    assert stats["fast"]["wins"] == 3 and stats["flaky"]["failures"] == 3
+    assert stats["slow"]["latency_ms"] > stats["fast"]["latency_ms"]
+
+
+def test_circuit_opens_then_half_opens_and_closes():
+    racer = MirrorRacer("t-circuit", parallel=2, fail_threshold=2, cooldown=0.3)
+    state = lambda m: {s["mirror"]: s["state"] for s in racer.get_stats()}[m]
+
+    for _ in range(2): race(racer, {"bad": (0.0, False), "good": (0.05, True)})
+    assert state("bad") == "open"
+    assert racer.ranked(["bad", "good"]) == ["good"]
+
+    time.sleep(0.35) # কুলডাউন শেষ → একবার ট্রায়াল
+    assert state("bad") == "half-open"
+    assert "bad" in racer.ranked(["bad", "good"])
+
+    race(racer, {"bad": (0.0, True)})
+    assert state("bad") == "closed"
+
+
+def test_all_open_still_tries_the_one_closest_to_reopening():
+    racer = MirrorRacer("t-allopen", parallel=2, fail_threshold=1, cooldown=60)
+    race(racer, {"a": (0.0, False)})
+    time.sleep(0.01)
+    race(racer, {"b": (0.0, False)})
+    assert racer.ranked(["a", "b"]) == ["a"]
+
+
+def test_all_fail_returns_none():
+    racer = MirrorRacer("t-allfail", parallel=2)
+    assert race(racer, {"a": (0.0, False), "b": (0.01, False), "c": (0.0, False)}) == (None, None)
+
+
+def test_timeout_returns_none_without_waiting_for_losers():
+    racer = MirrorRacer("t-timeout", parallel=2)
+    start = time.monotonic()
+    assert race(racer, {"a": (1.0, True), "b": (1.0, True)}, timeout=0.2) == (None, None)
+    assert time.monotonic() - start < 0.6
+
+
+class StubMirror(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/slow"): time.sleep(1.5)
+        code = 500 if self.path.startswith("/err") else 200
+        body = b'{"mirror": "%s"}' % self.path.encode()
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args): pass
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), StubMirror)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def http_fetch(timeout):
+    def fetch(url):
+        res = http.get(url, timeout=timeout, retries=0)
+        if res.status_code != 200: raise ValueError(f"HTTP {res.status_code}")
+        return res.json()
+    return fetch
+
+
+def test_stub_servers_fastest_healthy_mirror_wins(stub_url):
+    racer = MirrorRacer("t-http", parallel=3)
+    candidates = [(m, f"{stub_url}/{m}") for m in ("slow", "err", "ok")]
+    assert racer.race(candidates, http_fetch(5), timeout=3) == ("ok", {"mirror": "/ok"})
+    failures = lambda: {s["mirror"]: s["failures"] for s in racer.get_stats()}.get("err")
+    end = time.monotonic() + 2
+    while failures() != 1 and time.monotonic() < end: time.sleep(0.02) # 500 টা জেতার পরেও আসতে পারে
+    assert failures() == 1
+
+
+def test_stub_servers_request_timeout_frees_losers(stub_url):
+    racer = MirrorRacer("t-http-slow", parallel=2)
+    candidates = [(m, f"{stub_url}/{m}") for m in ("slow-a", "slow-b")]
+    start = time.monotonic()
+    assert racer.race(candidates, http_fetch(0.3), timeout=0.5) == (None, None)
+    time.sleep(0.2)
+    # রিকোয়েস্ট টাইমআউট রেসের টাইমআউটের ভেতরে → হেরে যাওয়া থ্রেডগুলো ততক্ষণে শেষ
+    assert time.monotonic() - start < 1.2
+    assert racer._pool._work_queue.qsize() == 0
+    assert all(s["failures"] == 1 for s in racer.get_stats())
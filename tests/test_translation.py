@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from utils.translation import TranslationService, _split_joined, SEPARATOR
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = TranslationService(db_path=str(tmp_path / "tr.db"), batch_window=0.05)
+    svc.calls = []
+
+    def fake_translate_many(texts, target):
+        svc.calls.append(list(texts))
+        if any("fail" in t for t in texts): raise IOError("translator down")
+        if any("slow" in t for t in texts): time.sleep(0.5)
+        return [f"{target}:{t}" for t in texts]
+
+    svc._translate_many = fake_translate_many # নেটওয়ার্ক ছাড়া; ক্যাশ/ব্যাচিং লজিক আসলটাই
+    return svc
+
+
+def test_texts_in_one_window_share_a_request_and_are_cached(service):
+    futures = [service.submit(f"post {i}") for i in range(5)] + [service.submit("post 0")]
+    assert [f.result(5) for f in futures] == [f"bn:post {i}" for i in range(5)] + ["bn:post 0"]
+    assert service.calls == [[f"post {i}" for i in range(5)]] # একই লেখা দুবার এলেও একবার
+
+    again = service.submit("post 3")
+    assert again.done() and again.result() == "bn:post 3"
+    assert service.get_stats()["hits"] == 1 and len(service.calls) == 1
+
+
+def test_failure_resolves_to_original_text(service):
+    fut = service.submit("will fail")
+    assert fut.result(5) == "will fail" and fut.failed
+    wrapped = service.submit("fail again", wrap=lambda t: t + " [src]")
+    assert wrapped.result(5) == "fail again [src]" and wrapped.failed
+    ok = service.submit("fine")
+    assert ok.result(5) == "bn:fine" and not ok.failed
+    assert service.get_stats()["failures"] == 2
+    assert service.cached("will fail") is None
+
+
+def test_wrap_is_applied_and_a_raising_wrap_still_resolves(service):
+    fut = service.submit("hi", wrap=lambda t: t + " [src]")
+    assert fut.result(5) == "bn:hi [src]" and not fut.failed
+
+    def broken(t): raise KeyError("url")
+    assert service.submit("hello", wrap=broken).result(5) == "bn:hello"
+
+
+def test_translate_times_out_with_original_text(service):
+    start = time.monotonic()
+    assert service.translate("slow text", timeout=0.1) == "slow text"
+    assert time.monotonic() - start < 0.4
+    assert service.get_stats()["timeouts"] == 1
+    time.sleep(0.6)
+    assert service.cached("slow text") == "bn:slow text" # পরের বারের জন্য ক্যাশে
+
+
+def test_split_joined_round_trip_and_lost_markers():
+    texts = ["one", "two", "three"]
+    joined = "".join(SEPARATOR.format(i) + t for i, t in enumerate(texts))
+    assert _split_joined(joined.upper(), 3) == ["ONE", "TWO", "THREE"]
+    assert _split_joined("ONE TWO THREE", 3) is None
@@ -0,0 +1,101 @@
+import importlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace as NS
+from urllib.parse import parse_qs
+
+import pytest
+
+from conftest import free_port
+
+
+class StubSpoo(BaseHTTPRequestHandler):
+    """spoo.me stub: /slow… waits, /err… fails, everything else shortens."""
+    requests = []
+    delay = 0.0
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        StubSpoo.requests.append((self.path, form))
+        time.sleep(StubSpoo.delay)
+        if form["url"][0].endswith("/err"):
+            code, body = 500, {"message": "boom"}
+        else:
+            code, body = 200, {"short_url": "https://spoo.me/" + ("emoji" if self.path.endswith("/emoji") else "abc")}
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args): pass
+
+
+class FakeBot:
+    def __init__(self):
+        self.edits = []
+        self.done = threading.Event()
+
+    def reply_to(self, message, text, **kw):
+        return NS(message_id=99)
+
+    def edit_message_text(self, text, cid, mid, **kw):
+        self.edits.append((text, threading.current_thread().name))
+        self.done.set()
+
+
+@pytest.fixture(scope="module")
+def core():
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), StubSpoo)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mp = pytest.MonkeyPatch()
+    # স্ল্যাশ ছাড়া বেস URL: /emoji ঠিকমতো জোড়া লাগছে কিনা
+    mp.setenv("SPOO_ENDPOINT", f"http://127.0.0.1:{server.server_port}")
+    import handlers.tools.url_shorten.core as core
+    core = importlib.reload(core)
+    yield core
+    mp.undo()
+    server.shutdown()
+
+
+def shorten(core, cid, url, **state):
+    core.init_user(cid)
+    s = core.user_state_url[cid]
+    s.update({"qr": False, **state})
+    core.user_state_url[cid] = s
+    bot = FakeBot()
+    start = time.monotonic()
+    core.process_url(bot, NS(chat=NS(id=cid), text=url))
+    returned_after = time.monotonic() - start
+    assert bot.done.wait(5)
+    return bot, returned_after
+
+
+def test_emoji_endpoint_joins_without_double_slash(core):
+    assert core.EMOJI_ENDPOINT == core.TEXT_ENDPOINT + "/emoji"
+    assert "//emoji" not in core.EMOJI_ENDPOINT
+
+
+def test_shorten_runs_off_the_handler_thread(core):
+    StubSpoo.requests, StubSpoo.delay = [], 0.5
+    try: bot, returned_after = shorten(core, 1, "https://example.com/page")
+    finally: StubSpoo.delay = 0.0
+    assert returned_after < 0.3 # হ্যান্ডলার স্লো API এর জন্য অপেক্ষা করে না
+    text, thread = bot.edits[0]
+    assert "https://spoo.me/abc" in text and thread.startswith("url-shorten")
+    assert StubSpoo.requests == [("/", {"url": ["https://example.com/page"]})]
+
+
+def test_emoji_mode_posts_to_emoji_endpoint(core):
+    StubSpoo.requests = []
+    bot, _ = shorten(core, 2, "https://example.com/e", emoji=True)
+    assert StubSpoo.requests == [("/emoji", {"url": ["https://example.com/e"], "emoji": ["true"]})]
+    assert "https://spoo.me/emoji" in bot.edits[0][0]
+
+
+def test_server_error_is_reported(core):
+    bot, _ = shorten(core, 3, "https://example.com/err")
+    assert bot.edits[0][0] == "❌ Server Error: 500"
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+import pytest
+import requests
+import telebot
+from telebot import apihelper
+
+from conftest import free_port
+from utils.update_dispatcher import ChatLaneDispatcher
+from utils.webhook_server import start_webhook
+
+SECRET = "s3cret"
+TOKEN = "123456:TEST"
+
+
+class FakeTelegram(BaseHTTPRequestHandler):
+    """Bot API stub: records method calls, answers every call with ok."""
+    calls = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0)).decode()
+        method, _, query = self.path.rsplit("/", 1)[-1].partition("?")
+        FakeTelegram.calls.append((method, dict(parse_qsl(query + "&" + body, keep_blank_values=True))))
+        data = json.dumps({"ok": True, "result": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST
+
+    def log_message(self, *args): pass
+
+
+@pytest.fixture
+def fake_api():
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), FakeTelegram)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    old = apihelper.API_URL, apihelper.FILE_URL
+    apihelper.API_URL = f"http://127.0.0.1:{server.server_port}/bot{{0}}/{{1}}"
+    FakeTelegram.calls = []
+    yield FakeTelegram.calls
+    apihelper.API_URL, apihelper.FILE_URL = old
+    server.shutdown()
+
+
+def message_update(update_id, chat_id, text):
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()), "text": text,
+        "chat": {"id": chat_id, "type": "private"}, "from": {"id": chat_id, "is_bot": False, "first_name": "T"}}}
+
+
+def wait_until(cond, timeout=5):
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            if cond(): return True
+        except requests.ConnectionError: pass
+        time.sleep(0.02)
+    return False
+
+
+def test_webhook_secret_backpressure_and_handlers(fake_api):
+    bot = telebot.TeleBot(TOKEN, threaded=False)
+    seen, release = [], threading.Event()
+
+    @bot.message_handler(func=lambda m: True)
+    def record(m):
+        seen.append(m.text)
+        release.wait(5) # লেন আটকে রাখা, যাতে কিউ ভরে যায়
+
+    # ১টা লেন, কিউতে ১টা জায়গা: চলমান ১ + অপেক্ষায় ১, তারপর 503
+    dispatcher = ChatLaneDispatcher(bot.process_new_updates, lanes=1, max_queue=1, name="test")
+    port = free_port()
+    start_webhook(bot, dispatcher, "https://example.test", host="127.0.0.1", port=port, secret_token=SECRET)
+
+    # remove_webhook() = setWebhook(url=""), তারপর আসল রেজিস্ট্রেশন
+    assert [m for m, _ in fake_api] == ["setWebhook", "setWebhook"]
+    assert fake_api[0][1]["url"] == ""
+    assert fake_api[1][1]["url"] == "https://example.test/webhook/123456"
+    assert fake_api[1][1]["secret_token"] == SECRET
+
+    url = f"http://127.0.0.1:{port}/webhook/123456"
+    assert wait_until(lambda: requests.get(f"http://127.0.0.1:{port}/healthz").ok)
+    post = lambda body, secret=SECRET: requests.post(
+        url, data=json.dumps(body), headers={"X-Telegram-Bot-Api-Secret-Token": secret or ""})
+
+    assert post(message_update(1, 10, "bad"), secret="wrong").status_code == 403
+    assert post(message_update(1, 10, "none"), secret=None).status_code == 403
+
+    assert post(message_update(2, 10, "first")).status_code == 200
+    assert wait_until(lambda: seen == ["first"])       # লেন এখন ব্যস্ত
+    assert post(message_update(3, 10, "second")).status_code == 200
+    assert post(message_update(4, 10, "third")).status_code == 503
+    assert dispatcher.rejected == 1
+
+    release.set()
+    assert wait_until(lambda: seen == ["first", "second"])
+    assert "bad" not in seen and "none" not in seen and "third" not in seen
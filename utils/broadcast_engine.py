@@ -0,0 +1,323 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+import logging
+from telebot.apihelper import ApiTelegramException
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# 🚦 RATE LIMITING
+# ==========================================
+# টেলিগ্রাম: বাল্ক মেসেজে মোট ~৩০/সেকেন্ড, একই চ্যাটে ~১/সেকেন্ড
+GLOBAL_RATE = float(os.environ.get("BROADCAST_RATE", "25"))
+PER_CHAT_INTERVAL = 1.0
+WORKERS = int(os.environ.get("BROADCAST_WORKERS", "8"))
+PROGRESS_INTERVAL = 5 # অ্যাডমিনের প্রোগ্রেস মেসেজ কত সেকেন্ড পরপর এডিট হবে
+MAX_ATTEMPTS = 3
+# ৪২৯ এ সব চেষ্টা শেষ হওয়া ইউজারদের জন্য পুরো পাসের পর আরও কত রাউন্ড
+RETRY_ROUNDS = int(os.environ.get("BROADCAST_RETRY_ROUNDS", "3"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is free."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        """Stops handing out tokens for `seconds` (used for 429 retry_after)."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.updated = self.paused_until
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+
+class PerChatLimiter:
+    """Keeps at least `interval` seconds between two sends to the same chat."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, chat_id):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._last.get(chat_id, 0) + self.interval - now
+                if wait <= 0:
+                    if len(self._last) > 10000:
+                        # পুরনো এন্ট্রি ফেলে দেওয়া, নাহলে বড় ব্রডকাস্টে ডিক্ট বাড়তেই থাকে
+                        self._last = {c: t for c, t in self._last.items() if now - t < self.interval}
+                    self._last[chat_id] = now
+                    return
+            time.sleep(wait)
+
+
+# এই এররগুলো মানে ইউজারকে আর কখনো মেসেজ পাঠানো যাবে না
+DEAD_REASONS = ("blocked", "deactivated", "not_found")
+
+
+def classify_error(e):
+    """Maps a send error to 'blocked', 'deactivated', 'not_found' or 'failed'."""
+    if not isinstance(e, ApiTelegramException): return "failed"
+    desc = str(getattr(e, "description", "") or e).lower()
+    if e.error_code == 403:
+        return "deactivated" if "deactivated" in desc else "blocked"
+    if e.error_code == 400 and "chat not found" in desc:
+        return "not_found"
+    return "failed"
+
+
+def retry_after_of(e):
+    """Seconds Telegram asked us to wait (0 if the error is not a 429)."""
+    if isinstance(e, ApiTelegramException) and e.error_code == 429:
+        try: return int(e.result_json.get("parameters", {}).get("retry_after", 1))
+        except Exception: return 1
+    return 0
+
+
+# ==========================================
+# 📦 BROADCAST JOB (Resumable)
+# ==========================================
+
+class BroadcastJob:
+    """
+    One broadcast run. Metadata and the target list live in <job_id>.json;
+    every finished user is appended to <job_id>.done so a restart only sends
+    to the users that are still left.
+    """
+
+    def __init__(self, jobs_dir, meta):
+        self.meta = meta
+        self.job_id = meta["job_id"]
+        self.meta_path = os.path.join(jobs_dir, f"{self.job_id}.json")
+        self.done_path = os.path.join(jobs_dir, f"{self.job_id}.done")
+        self.sent = 0
+        self.failed = 0
+        self.dead = {r: 0 for r in DEAD_REASONS} # failed এর যে অংশ স্থায়ীভাবে ডেড
+        self.done_ids = set()
+        self.retry_ids = set()   # ফ্লাড লিমিটে আটকে থাকা, .done এ লেখা হয়নি
+        self._lock = threading.Lock()
+        self._done_file = None
+
+    @classmethod
+    def create(cls, jobs_dir, user_ids, **meta):
+        meta.update({"job_id": uuid.uuid4().hex[:12], "targets": [str(u) for u in user_ids], "created": int(time.time())})
+        job = cls(jobs_dir, meta)
+        job.save_meta()
+        return job
+
+    @classmethod
+    def load(cls, meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            job = cls(os.path.dirname(meta_path), json.load(f))
+        if os.path.exists(job.done_path):
+            with open(job.done_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    uid, _, result = line.strip().partition("\t")
+                    if not result: continue # অর্ধেক লেখা লাইন
+                    job._count(uid, result)
+        return job
+
+    def save_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    @property
+    def total(self):
+        return len(self.meta["targets"])
+
+    def pending_ids(self):
+        return [u for u in self.meta["targets"] if u not in self.done_ids]
+
+    def record(self, user_id, result):
+        with self._lock:
+            if self._done_file is None:
+                self._done_file = open(self.done_path, 'a', encoding='utf-8')
+            self._done_file.write(f"{user_id}\t{result}\n")
+            self._done_file.flush()
+            self._count(user_id, result)
+
+    def defer(self, user_id):
+        with self._lock: self.retry_ids.add(user_id)
+
+    def _count(self, user_id, result):
+        self.done_ids.add(user_id)
+        if result == "ok": self.sent += 1
+        else: self.failed += 1
+        if result in self.dead: self.dead[result] += 1
+
+    def close(self):
+        with self._lock:
+            if self._done_file is not None: self._done_file.close()
+            self._done_file = None
+
+    def finish(self):
+        self.close()
+        for path in (self.meta_path, self.done_path):
+            if os.path.exists(path): os.remove(path)
+
+
+# ==========================================
+# 🚀 ENGINE
+# ==========================================
+
+class BroadcastEngine:
+    """
+    Runs broadcasts on background threads: a shared token bucket keeps the
+    global send rate under Telegram's limit, a worker pool fans out the
+    copy_message calls and 429 responses pause the bucket for retry_after.
+    `on_dead_user(user_id, reason)` is called for users that blocked the bot,
+    were deactivated or no longer exist.
+    """
+
+    def __init__(self, bot, jobs_dir, rate=GLOBAL_RATE, workers=WORKERS, progress_interval=PROGRESS_INTERVAL, on_dead_user=None):
+        self.bot = bot
+        self.on_dead_user = on_dead_user
+        self.jobs_dir = jobs_dir
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.bucket = TokenBucket(rate)
+        self.chat_limiter = PerChatLimiter(PER_CHAT_INTERVAL)
+        self.active = {}
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def start_job(self, from_chat_id, message_id, admin_chat_id, status_msg_id, user_ids, on_done=None, skipped=0):
+        """`skipped` = inactive users left out of `user_ids` (for the report)."""
+        job = BroadcastJob.create(
+            self.jobs_dir, user_ids,
+            from_chat_id=from_chat_id, message_id=message_id,
+            admin_chat_id=admin_chat_id, status_msg_id=status_msg_id, skipped=skipped
+        )
+        self._launch(job, on_done)
+        return job.job_id
+
+    def resume_pending(self, on_done=None):
+        """Restarts every job that was still running when the bot stopped."""
+        resumed = 0
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith(".json"): continue
+            try: job = BroadcastJob.load(os.path.join(self.jobs_dir, name))
+            except Exception as e:
+                logger.error(f"❌ Broken broadcast job {name}: {e}")
+                continue
+            if job.job_id in self.active: continue
+            logger.info(f"🔁 Resuming broadcast {job.job_id}: {len(job.done_ids)}/{job.total} already done")
+            self._launch(job, on_done)
+            resumed += 1
+        return resumed
+
+    def _launch(self, job, on_done):
+        self.active[job.job_id] = job
+        threading.Thread(target=self._run, args=(job, on_done), name=f"broadcast-{job.job_id}", daemon=True).start()
+
+    # --- SENDING ---
+    def _send_one(self, job, user_id):
+        for attempt in range(MAX_ATTEMPTS):
+            self.bucket.acquire()
+            self.chat_limiter.acquire(user_id)
+            try:
+                self.bot.copy_message(chat_id=user_id, from_chat_id=job.meta["from_chat_id"], message_id=job.meta["message_id"])
+                return "ok"
+            except Exception as e:
+                wait = retry_after_of(e)
+                if not wait: return classify_error(e)
+                logger.warning(f"⏳ Broadcast flood wait {wait}s (attempt {attempt + 1})")
+                self.bucket.pause(wait)
+        return "retry" # এখনো ফ্লাড লিমিট: ডান হিসেবে লেখা নয়, পরের রাউন্ডে আবার
+
+    def _worker(self, job, q):
+        while True:
+            user_id = q.get()
+            if user_id is None: return
+            try: result = self._send_one(job, user_id)
+            except Exception: result = "failed"
+            if result == "retry":
+                job.defer(user_id)
+                continue
+            job.record(user_id, result)
+            if result in DEAD_REASONS and self.on_dead_user:
+                try: self.on_dead_user(user_id, result)
+                except Exception as e: logger.error(f"Failed to mark {user_id} inactive: {e}")
+
+    def _run(self, job, on_done):
+        ids = job.pending_ids()
+        for round_no in range(RETRY_ROUNDS + 1):
+            job.retry_ids = set()
+            self._run_pass(job, ids)
+            ids = sorted(job.retry_ids)
+            if not ids: break
+            # বাকেট retry_after পর্যন্ত থেমে আছে, তাই পরের পাস নিজে থেকেই অপেক্ষা করে
+            logger.info(f"🔁 Broadcast {job.job_id}: {len(ids)} users still rate-limited (round {round_no + 1})")
+
+        self._edit_status(job, self.report_text(job))
+        if job.retry_ids:
+            # ফাইলগুলো রেখে দেওয়া, পরের স্টার্টে resume_pending শুধু এদেরকেই পাঠাবে
+            job.close()
+            logger.warning(f"⏳ Broadcast {job.job_id}: {len(job.retry_ids)} users left for the next resume")
+        else: job.finish()
+        self.active.pop(job.job_id, None)
+        if on_done:
+            try: on_done(job)
+            except Exception as e: logger.error(f"Broadcast on_done failed: {e}")
+
+    def _run_pass(self, job, ids):
+        q = queue.Queue()
+        for uid in ids: q.put(uid)
+        threads = [threading.Thread(target=self._worker, args=(job, q), daemon=True) for _ in range(self.workers)]
+        for _ in threads: q.put(None)
+        for t in threads: t.start()
+
+        last_update, last_text = 0, None
+        while any(t.is_alive() for t in threads):
+            if time.monotonic() - last_update >= self.progress_interval:
+                text = f"🚀 <b>Broadcasting...</b>\n{len(job.done_ids)}/{job.total}\n✅ {job.sent} ❌ {job.failed}"
+                # একই টেক্সট আবার এডিট করলে টেলিগ্রাম 'not modified' এরর দেয়
+                if text != last_text: self._edit_status(job, text)
+                last_update, last_text = time.monotonic(), text
+            time.sleep(0.5)
+
+    def report_text(self, job):
+        pruned = sum(job.dead.values())
+        return (
+            f"✅ <b>Broadcast Complete!</b>\n\n"
+            f"🎯 <b>Total:</b> {job.total}\n"
+            f"✅ <b>Success:</b> {job.sent}\n"
+            f"🚫 <b>Blocked/Failed:</b> {job.failed}\n\n"
+            f"🧹 <b>Marked Inactive:</b> {pruned} "
+            f"(blocked {job.dead['blocked']}, deactivated {job.dead['deactivated']}, not found {job.dead['not_found']})\n"
+            f"⏭ <b>Skipped (already inactive):</b> {job.meta.get('skipped', 0)} sends saved"
+            + (f"\n⏳ <b>Rate-limited, retried on next start:</b> {len(job.retry_ids)}" if job.retry_ids else "")
+        )
+
+    def _edit_status(self, job, text):
+        try:
+            self.bot.edit_message_text(text, chat_id=job.meta["admin_chat_id"], message_id=job.meta["status_msg_id"])
+        except Exception: pass
@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+
+# ==========================================
+# 📦 BYTE-BOUNDED LRU CACHE
+# ==========================================
+# রেন্ডার করা ইমেজ/PNG এর মতো বড় অবজেক্ট RAM এ রাখার জন্য; মোট সাইজ বাজেট
+# ছাড়ালে সবচেয়ে পুরনো এন্ট্রি বাদ পড়ে।
+
+
+class ByteLRUCache:
+    """
+    Thread-safe LRU bounded by total bytes (or by item count when every
+    entry weighs 1). Entries bigger than the whole budget are not stored.
+    """
+
+    def __init__(self, max_bytes, name="cache"):
+        self.max_bytes = max_bytes
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        if size > self.max_bytes: return value
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None: self.bytes -= old[1]
+            self._data[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, dropped) = self._data.popitem(last=False)
+                self.bytes -= dropped
+                self.evictions += 1
+                self.evicted_bytes += dropped
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "evicted_bytes": self.evicted_bytes,
+            }
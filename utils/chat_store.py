@@ -0,0 +1,211 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ==========================================
+# 💾 PER-CHAT SETTINGS STORE (SQLite + LRU)
+# ==========================================
+# টুলগুলোর চ্যাট-ভিত্তিক সেটিংস (ওয়াটারমার্ক, গ্রুপ ম্যানেজমেন্ট) রিস্টার্টের পরও থাকে।
+# - প্রথমবার কোনো চ্যাট অ্যাক্সেস হলে তবেই ডিস্ক থেকে লোড হয় (lazy)
+# - সাম্প্রতিক চ্যাটগুলো RAM এ থাকে, বাকিগুলো LRU অনুযায়ী বাদ পড়ে
+# - হ্যান্ডলাররা ডিক্ট সরাসরি মডিফাই করে; ফ্লাশার থ্রেড সম্প্রতি ছোঁয়া এন্ট্রিগুলো
+#   সিরিয়ালাইজ করে দেখে কী বদলেছে, আর শুধু সেগুলোই এক ট্রানজ্যাকশনে লেখে
+# - RECHECK_WINDOW এর পরের পরিবর্তন ফ্লাশার দেখে না, তাই সেটিংস বদলানোর জায়গাগুলো
+#   (save_wm_settings, টগল, ওয়ার্ন) সবসময় mark_dirty() কল করে
+
+CHAT_SETTINGS_DB = os.environ.get("CHAT_SETTINGS_DB", "data/chat_settings.db")
+CHAT_CACHE_SIZE = int(os.environ.get("CHAT_SETTINGS_CACHE", "2000"))   # প্রতি নেমস্পেসে RAM এ কতগুলো চ্যাট
+CHAT_FLUSH_MS = int(os.environ.get("CHAT_SETTINGS_FLUSH_MS", "1000"))
+# get() এর পর কতক্ষণ পর্যন্ত এন্ট্রি বদলেছে কিনা চেক করা হবে
+# (হ্যান্ডলার ডিক্ট নিয়ে কিছুক্ষণ পর মডিফাই করলেও যেন মিস না হয়)
+RECHECK_WINDOW = 60
+
+_stores = []
+_connections = {}
+_conn_lock = threading.Lock()
+
+
+def _connect(db_path):
+    """One shared connection (+ lock) per database file."""
+    with _conn_lock:
+        if db_path not in _connections:
+            if os.path.dirname(db_path): os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_settings ("
+                "namespace TEXT NOT NULL, chat_id TEXT NOT NULL, data TEXT NOT NULL, updated REAL, "
+                "PRIMARY KEY (namespace, chat_id))"
+            )
+            _connections[db_path] = (conn, threading.Lock())
+        return _connections[db_path]
+
+
+def _digest(raw):
+    return hashlib.sha1(raw.encode()).digest()
+
+
+class ChatSettingsStore:
+    """
+    Dict-like, persistent per-chat settings for one tool (`namespace`).
+    get(chat_id) returns the live dict; callers mutate it in place and the
+    change is written back within `flush_interval_ms`. In-place changes are
+    only noticed for RECHECK_WINDOW seconds after the last get(); code that
+    changes a dict it obtained earlier must call mark_dirty(chat_id), and
+    settings writers call it unconditionally. `on_load(data)` can fix up a
+    record read from disk (e.g. add new default keys).
+    """
+
+    def __init__(self, namespace, default_factory, db_path=CHAT_SETTINGS_DB,
+                 max_entries=CHAT_CACHE_SIZE, flush_interval_ms=CHAT_FLUSH_MS, on_load=None):
+        self.namespace = namespace
+        self.default_factory = default_factory
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.on_load = on_load
+        self._conn, self._db_lock = _connect(db_path)
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._cache = OrderedDict()   # chat_id -> dict
+        self._persisted = {}          # chat_id -> sha1 of the last written JSON
+        self._touched = {}            # chat_id -> last get() time
+        self._evicted = {}            # বাদ পড়া কিন্তু এখনো না-লেখা এন্ট্রি
+        self.stats = {"hits": 0, "misses": 0, "loads": 0, "created": 0, "writes": 0, "flushes": 0, "evictions": 0, "flush_errors": 0}
+        _stores.append(self)
+        threading.Thread(target=self._flusher, name=f"chat-store-{namespace}", daemon=True).start()
+
+    # --- PUBLIC API ---
+    def get(self, chat_id):
+        key = str(chat_id)
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                data = self._evicted.pop(key, None)
+                if data is None: data = self._load(key)
+                self._cache[key] = data
+                self._evict()
+            self._touched[key] = time.monotonic()
+            return data
+
+    # পুরনো ডিক্ট-স্টাইল কোডের জন্য
+    __getitem__ = get
+
+    def __contains__(self, chat_id):
+        key = str(chat_id)
+        with self._lock:
+            if key in self._cache or key in self._evicted: return True
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT 1 FROM chat_settings WHERE namespace=? AND chat_id=?", (self.namespace, key)
+            ).fetchone() is not None
+
+    def mark_dirty(self, chat_id):
+        """Forces a re-check of `chat_id` on the next flush (call after every change)."""
+        with self._lock:
+            self._touched[str(chat_id)] = time.monotonic()
+
+    def flush(self):
+        """Writes every changed entry (cached or just evicted) in one transaction."""
+        with self._flush_lock:
+            now = time.monotonic()
+            with self._lock:
+                candidates = {k: self._cache[k] for k in self._touched if k in self._cache}
+                candidates.update(self._evicted)
+                evicted = dict(self._evicted)
+
+            rows, digests, retry = [], {}, []
+            for key, data in candidates.items():
+                try: raw = json.dumps(data, ensure_ascii=False, sort_keys=True)
+                except (RuntimeError, TypeError, ValueError):
+                    retry.append(key) # অন্য থ্রেড ঠিক এই মুহূর্তে মডিফাই করছে
+                    continue
+                digest = _digest(raw)
+                if self._persisted.get(key) != digest:
+                    rows.append((self.namespace, key, raw, time.time()))
+                    digests[key] = digest
+
+            if rows:
+                try:
+                    with self._db_lock:
+                        self._conn.execute("BEGIN IMMEDIATE")
+                        try:
+                            self._conn.executemany(
+                                "INSERT INTO chat_settings (namespace, chat_id, data, updated) VALUES (?, ?, ?, ?) "
+                                "ON CONFLICT(namespace, chat_id) DO UPDATE SET data=excluded.data, updated=excluded.updated",
+                                rows
+                            )
+                            self._conn.execute("COMMIT")
+                        except Exception:
+                            self._conn.execute("ROLLBACK")
+                            raise
+                except Exception as e:
+                    self.stats["flush_errors"] += 1
+                    print(f"⚠️ Chat settings flush failed ({self.namespace}): {e}")
+                    return False
+
+            with self._lock:
+                self._persisted.update(digests)
+                self.stats["writes"] += len(rows)
+                self.stats["flushes"] += 1 if rows else 0
+                for key, data in evicted.items():
+                    if key in retry: continue
+                    if self._evicted.get(key) is data: del self._evicted[key]
+                    if key not in self._cache: self._persisted.pop(key, None)
+                for key, at in list(self._touched.items()):
+                    if key not in retry and (now - at > RECHECK_WINDOW or key not in self._cache):
+                        del self._touched[key]
+            return True
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, cached=len(self._cache), pending_evicted=len(self._evicted),
+                        hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0)
+
+    # --- INTERNALS ---
+    def _load(self, key):
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT data FROM chat_settings WHERE namespace=? AND chat_id=?", (self.namespace, key)
+            ).fetchone()
+        if row is None:
+            self.stats["created"] += 1
+            return self.default_factory()
+        self.stats["loads"] += 1
+        data = json.loads(row[0])
+        self._persisted[key] = _digest(row[0])
+        if self.on_load: data = self.on_load(data)
+        return data
+
+    def _evict(self):
+        while len(self._cache) > self.max_entries:
+            key, data = self._cache.popitem(last=False)
+            # পরের ফ্লাশে লেখা হবে; তার আগে কেউ চাইলে একই অবজেক্ট ফেরত যাবে
+            self._evicted[key] = data
+            self.stats["evictions"] += 1
+
+    def _flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._touched or self._evicted:
+                try: self.flush()
+                except Exception as e: print(f"⚠️ Chat settings flusher error: {e}")
+
+
+def flush_all_stores():
+    """Flushes every ChatSettingsStore (call before os.execl, which skips atexit)."""
+    for store in list(_stores):
+        store.flush()
+
+
+atexit.register(flush_all_stores)
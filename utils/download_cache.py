@@ -0,0 +1,103 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ==========================================
+# ♻️ DOWNLOAD RESULT CACHE (Post ID → file_ids)
+# ==========================================
+# ভাইরাল টুইট/রেডিট পোস্ট অনেক গ্রুপে শেয়ার হয়; প্রতিবার আবার ডাউনলোড-স্প্লিট-আপলোড
+# না করে আগের ডেলিভারির file_id আর ক্যাপশন দিয়ে সাথে সাথে পাঠানো হয় (কোনো ব্যান্ডউইথ নেই)।
+# - কী = ক্যানোনিকাল পোস্ট আইডি (প্লাগিন ঠিক করে), তাই ভিন্ন লিঙ্ক ফরম্যাটেও একই এন্ট্রি
+# - DL_CACHE_TTL পার হলে এন্ট্রি বাতিল (মুছে ফেলা পোস্ট/বদলানো মিডিয়া যেন চিরকাল না থাকে)
+# - নেমস্পেস-প্রতি সর্বোচ্চ DL_CACHE_MAX_ENTRIES, পুরনো (শেষ ব্যবহার) আগে বাদ
+
+DL_CACHE_DB = os.environ.get("DL_CACHE_DB", "data/download_cache.db")
+DL_CACHE_TTL = int(os.environ.get("DL_CACHE_TTL", str(7 * 24 * 3600)))  # সেকেন্ড
+DL_CACHE_MAX_ENTRIES = int(os.environ.get("DL_CACHE_MAX_ENTRIES", "5000"))
+
+_connections = {}
+_conn_lock = threading.Lock()
+
+
+def _connect(db_path):
+    """One shared connection (+ lock) per database file."""
+    with _conn_lock:
+        if db_path not in _connections:
+            if os.path.dirname(db_path): os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS download_results ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, media TEXT NOT NULL, caption TEXT, "
+                "created REAL, last_used REAL, PRIMARY KEY (namespace, key))"
+            )
+            _connections[db_path] = (conn, threading.Lock())
+        return _connections[db_path]
+
+
+class DownloadResultCache:
+    """
+    Persistent post-ID → (media, caption) map for one downloader.
+    media is [(kind, file_id), ...] in delivery order.
+    """
+
+    def __init__(self, namespace, ttl=DL_CACHE_TTL, max_entries=DL_CACHE_MAX_ENTRIES, db_path=DL_CACHE_DB):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn, self._lock = _connect(db_path)
+        self._puts = 0
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stored": 0, "stale": 0}
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT media, caption, created FROM download_results WHERE namespace=? AND key=?", (self.namespace, key)
+            ).fetchone()
+            if row and now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM download_results WHERE namespace=? AND key=?", (self.namespace, key))
+                self.stats["expired"] += 1
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE download_results SET last_used=? WHERE namespace=? AND key=?", (now, self.namespace, key))
+            self.stats["hits"] += 1
+        return [tuple(m) for m in json.loads(row[0])], row[1]
+
+    def put(self, key, media, caption):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO download_results (namespace, key, media, caption, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(media), caption, now, now)
+            )
+            self.stats["stored"] += 1
+            self._puts += 1
+            if self._puts % 50 == 0: self._trim(now)
+
+    def forget(self, key):
+        """Drops an entry whose file_ids Telegram refused."""
+        with self._lock:
+            self._conn.execute("DELETE FROM download_results WHERE namespace=? AND key=?", (self.namespace, key))
+            self.stats["stale"] += 1
+
+    def _trim(self, now):
+        self._conn.execute("DELETE FROM download_results WHERE namespace=? AND created < ?", (self.namespace, now - self.ttl))
+        count = self._conn.execute("SELECT COUNT(*) FROM download_results WHERE namespace=?", (self.namespace,)).fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM download_results WHERE namespace=? AND key IN "
+                "(SELECT key FROM download_results WHERE namespace=? ORDER BY last_used LIMIT ?)",
+                (self.namespace, self.namespace, count - self.max_entries)
+            )
+
+    def get_stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM download_results WHERE namespace=?", (self.namespace,)).fetchone()[0]
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, name=self.namespace, entries=entries,
+                        hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0)
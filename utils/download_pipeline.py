@@ -0,0 +1,249 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from utils.file_id_cache import file_id_of, is_bad_file_id
+
+# ==========================================
+# 🚚 STAGED DOWNLOAD PIPELINE (Downloader Plugins)
+# ==========================================
+# টুইটার/রেডিট ডাউনলোডার আগে মেসেজ হ্যান্ডলার থ্রেডেই মেটাডাটা → ডাউনলোড → স্প্লিট →
+# আপলোড একটার পর একটা করত। এখন প্রতিটি পোস্ট একটা জব, আর প্রতিটি ধাপের নিজের পুল:
+#   metadata (১ বার) → fetch (প্রতিটি মিডিয়া প্যারালালে) → split (প্রতিটি ফাইল) → upload
+# - একসাথে সর্বোচ্চ DL_MAX_JOBS টি জব চলে, অপেক্ষায় থাকে DL_QUEUE_SIZE পর্যন্ত
+# - একজন ইউজারের সর্বোচ্চ DL_PER_USER টি জব
+# - প্রতিটি জবের নিজের টেম্প ফোল্ডার; স্প্লিটের পর মূল ফাইল, আপলোডের পর পাঠানো
+#   ফাইল সাথে সাথে মুছে যায়, আর শেষে পুরো ফোল্ডার
+
+DL_MAX_JOBS = int(os.environ.get("DL_MAX_JOBS", "3"))
+DL_QUEUE_SIZE = int(os.environ.get("DL_QUEUE_SIZE", "20"))
+DL_PER_USER = int(os.environ.get("DL_PER_USER", "2"))
+DL_FETCH_WORKERS = int(os.environ.get("DL_FETCH_WORKERS", "6"))
+DL_SPLIT_WORKERS = int(os.environ.get("DL_SPLIT_WORKERS", "2"))   # ffmpeg = CPU/ডিস্ক, তাই কম
+DL_UPLOAD_WORKERS = int(os.environ.get("DL_UPLOAD_WORKERS", "3"))
+DL_TMP_DIR = os.environ.get("DL_TMP_DIR", "downloads")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class UserLimitError(Exception):
+    pass
+
+
+class DownloadJob:
+    """Per-post state handed to every stage callback."""
+
+    def __init__(self, pipeline, user_id, chat_id, payload):
+        self.job_id = uuid.uuid4().hex[:10]
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.payload = payload      # প্লাগিনের নিজস্ব ডাটা (url, ক্যাপশন, স্ট্যাটাস মেসেজ…)
+        self.work_dir = os.path.join(DL_TMP_DIR, f"{pipeline.name}_{chat_id}_{self.job_id}")
+        self.caption = None
+        self.caption_future = None  # ধীর ক্যাপশন (অনুবাদ); শেষ না হলে job.caption দিয়ে পাঠিয়ে পরে এডিট
+        self.stage = "queued"
+        self.created = time.time()
+
+    def path(self, name):
+        return os.path.join(self.work_dir, name)
+
+
+def remove_file(path):
+    try: os.remove(path)
+    except OSError: pass
+
+
+class DownloadPipeline:
+    """
+    Runs downloader jobs as metadata → fetch → split → upload.
+    Stage callbacks (all receive the job):
+      metadata(job) -> list of items (job.caption may be set here)
+      fetch(job, index, item) -> list of (kind, source) — kind 'video'/'photo'/'file', source a local path or URL
+      split(job, kind, path) -> list of paths (optional; default: unchanged)
+      upload(job, media) -> list of sent Messages, media = [(kind, source), ...] in original order;
+                            source may also be a Telegram file_id (cache hit)
+      on_error(job, exc) / on_empty(job)
+      edit_caption(job, message) -> re-captions the first sent message with job.caption
+    job.caption_future (optional, set in metadata) resolves to the final caption:
+    if it is done by upload time it is used directly, otherwise the media goes
+    out with job.caption and edit_caption is called once it resolves.
+    With `cache` (DownloadResultCache) and `cache_key(job) -> post id or None`,
+    a repeated post is re-sent from the stored file_ids and job.caption
+    without any download. The entry is stored only once the caption is final;
+    a caption_future with `failed` set (translation fell back to the original
+    text) is not cached, so the next share tries translating again.
+    """
+
+    def __init__(self, name, metadata, fetch, upload, split=None, on_error=None, on_empty=None,
+                 edit_caption=None, cache=None, cache_key=None, max_jobs=DL_MAX_JOBS, max_queue=DL_QUEUE_SIZE, per_user=DL_PER_USER):
+        self.name = name
+        self.metadata, self.fetch, self.split, self.upload = metadata, fetch, split, upload
+        self.on_error, self.on_empty, self.edit_caption = on_error, on_empty, edit_caption
+        self.cache, self.cache_key = cache, cache_key
+        self.max_queue = max_queue
+        self.per_user = per_user
+        self._lock = threading.Lock()
+        self._active = {}   # job_id -> job
+        self.stats = {"done": 0, "cached": 0, "failed": 0, "empty": 0, "rejected": 0, "items": 0, "late_captions": 0, "total_ms": 0.0}
+        self._jobs = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix=f"{name}-job")
+        _pipelines[:] = [p for p in _pipelines if p.name != name] + [self] # প্লাগিন রিলোড হলে পুরনোটা বাদ
+
+    # --- PUBLIC API ---
+    def submit(self, user_id, chat_id, payload):
+        with self._lock:
+            if len(self._active) >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise QueueFullError("Download queue is full")
+            if sum(1 for j in self._active.values() if j.user_id == user_id) >= self.per_user:
+                self.stats["rejected"] += 1
+                raise UserLimitError(f"Max {self.per_user} downloads per user")
+            job = DownloadJob(self, user_id, chat_id, payload)
+            self._active[job.job_id] = job
+        self._jobs.submit(self._run, job)
+        return job
+
+    def get_stats(self):
+        with self._lock:
+            stages = {}
+            for j in self._active.values(): stages[j.stage] = stages.get(j.stage, 0) + 1
+            finished = self.stats["done"] + self.stats["cached"] + self.stats["empty"]
+            stats = dict(self.stats, name=self.name, active=len(self._active), stages=stages,
+                         avg_ms=round(self.stats["total_ms"] / finished, 1) if finished else 0.0)
+        if self.cache: stats["cache"] = self.cache.get_stats()
+        return stats
+
+    # --- JOB RUNNER ---
+    def _run(self, job):
+        start = time.perf_counter()
+        result = "failed"
+        try:
+            os.makedirs(job.work_dir, exist_ok=True)
+            key = self.cache_key(job) if self.cache and self.cache_key else None
+            if key and self._replay(job, key):
+                result = "cached"
+                return
+
+            job.stage = "metadata"
+            items = self.metadata(job) or []
+
+            # fetch: প্রতিটি আইটেম আলাদা থ্রেডে, ফলাফল মূল ক্রমেই
+            job.stage = "fetch"
+            fetched = _fan_out(_fetch_pool, [(self.fetch, job, i, item) for i, item in enumerate(items)])
+            media = [m for group in fetched for m in group]
+
+            # split: লোকাল ভিডিওগুলো সাইজ লিমিটের নিচে ভাঙা; ভাঙা হলে মূল ফাইল সাথে সাথে মুছে যায়
+            if self.split:
+                job.stage = "split"
+                tasks = [(self._split_one, job, kind, src) for kind, src in media]
+                media = [m for group in _fan_out(_split_pool, tasks) for m in group]
+
+            media = [(kind, src) for kind, src in media if _usable(src)]
+            if not media:
+                result = "empty"
+                if self.on_empty: self.on_empty(job)
+                return
+
+            job.stage = "upload"
+            late, cacheable = job.caption_future, True
+            if late is not None and late.done():
+                cacheable = not _caption_failed(late)
+                job.caption, late = late.result(), None
+            sent = _upload_pool.submit(self.upload, job, media).result() or []
+            with self._lock: self.stats["items"] += len(media)
+            result = "done"
+            delivered = delivered_media(sent)
+            if not (key and delivered and len(delivered) == len(media)): delivered = None
+            # অনুবাদ বাকি থাকলে ক্যাশে লেখা সেটা শেষ হওয়ার পর, নাহলে মূল ক্যাপশন :bn কী তে থেকে যায়
+            if late is not None: late.add_done_callback(lambda f: self._late_caption(job, key, delivered, sent, f))
+            elif delivered and cacheable: self.cache.put(key, delivered, job.caption)
+        except Exception as e:
+            print(f"⚠️ {self.name} job {job.job_id} failed at {job.stage}: {e}")
+            if self.on_error:
+                try: self.on_error(job, e)
+                except Exception: pass
+        finally:
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+            with self._lock:
+                self._active.pop(job.job_id, None)
+                self.stats[result] += 1
+                if result != "failed": self.stats["total_ms"] += (time.perf_counter() - start) * 1000
+
+    def _replay(self, job, key):
+        hit = self.cache.get(key)
+        if not hit: return False
+        media, job.caption = hit
+        job.stage = "cached"
+        try: _upload_pool.submit(self.upload, job, media).result()
+        except Exception as e:
+            if not is_bad_file_id(e): raise
+            self.cache.forget(key) # file_id আর চলে না → স্বাভাবিকভাবে আবার ডাউনলোড
+            return False
+        return True
+
+    def _late_caption(self, job, key, delivered, sent, future):
+        if _caption_failed(future): return # মূল লেখাই রইল; ক্যাশে নয়, পরের বার আবার অনুবাদ
+        caption = future.result() or job.caption
+        if delivered: self.cache.put(key, delivered, caption)
+        if caption == job.caption: return
+        job.caption = caption
+        if not sent or not self.edit_caption: return
+        try:
+            self.edit_caption(job, sent[0])
+            with self._lock: self.stats["late_captions"] += 1
+        except Exception as e: print(f"⚠️ {self.name} caption edit failed: {e}")
+
+    def _split_one(self, job, kind, src):
+        if kind != "video" or not os.path.isfile(src): return [(kind, src)]
+        try: parts = self.split(job, kind, src) or [src]
+        except Exception as e:
+            print(f"⚠️ {self.name} split failed, sending as is: {e}")
+            parts = [src]
+        if src not in parts: remove_file(src)
+        return [(kind, p) for p in parts]
+
+
+def delivered_media(messages):
+    """[(kind, file_id), ...] of sent photo/video messages; None if any other type was sent."""
+    out = []
+    for m in messages:
+        kind = next((k for k in ("photo", "video") if getattr(m, k, None)), None)
+        if kind is None: return None
+        out.append((kind, file_id_of(m, kind)))
+    return out
+
+
+def _caption_failed(future):
+    """True if the caption future fell back to its input (utils.translation sets `failed`)."""
+    return getattr(future, "failed", False)
+
+
+def _usable(src):
+    if not isinstance(src, str) or "://" in src: return bool(src)
+    return os.path.isfile(src) and os.path.getsize(src) > 0
+
+
+def _fan_out(pool, tasks):
+    """Runs (fn, *args) tasks on `pool`; results in task order, a failed task yields []."""
+    futures = [pool.submit(fn, *args) for fn, *args in tasks]
+    results = []
+    for fut in futures:
+        try: results.append(fut.result() or [])
+        except Exception as e:
+            print(f"⚠️ Download stage error: {e}")
+            results.append([])
+    return results
+
+
+# স্টেজ পুলগুলো সব ডাউনলোডার শেয়ার করে, তাই মোট থ্রেড সংখ্যা প্লাগিন বাড়লেও বাড়ে না
+_fetch_pool = ThreadPoolExecutor(max_workers=DL_FETCH_WORKERS, thread_name_prefix="dl-fetch")
+_split_pool = ThreadPoolExecutor(max_workers=DL_SPLIT_WORKERS, thread_name_prefix="dl-split")
+_upload_pool = ThreadPoolExecutor(max_workers=DL_UPLOAD_WORKERS, thread_name_prefix="dl-upload")
+_pipelines = []
+
+
+def get_download_stats():
+    return [p.get_stats() for p in _pipelines]
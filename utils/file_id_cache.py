@@ -0,0 +1,170 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from telebot import types
+from telebot.apihelper import ApiTelegramException
+
+# ==========================================
+# 📎 TELEGRAM FILE_ID CACHE (Content Hash → file_id)
+# ==========================================
+# একই বাইট (ফন্ট প্রিভিউ, প্যালেট পেজ, বারবার চাওয়া QR…) বারবার আপলোড না করে
+# প্রথম আপলোডের পর টেলিগ্রামের দেওয়া file_id দিয়ে পাঠানো হয়। কী = sha1(কনটেন্ট) + মিডিয়া টাইপ,
+# তাই কনটেন্ট বদলালে নিজে থেকেই নতুন কী হয়; পুরনোগুলো LRU অনুযায়ী বাদ পড়ে।
+# file_id বট-ভিত্তিক, তাই টোকেন বদলালে টেলিগ্রাম রিজেক্ট করে → এন্ট্রি মুছে আবার আপলোড।
+
+FILE_ID_DB = os.environ.get("FILE_ID_DB", "data/file_ids.db")
+FILE_ID_MAX_ENTRIES = int(os.environ.get("FILE_ID_MAX_ENTRIES", "20000"))
+
+SEND_METHODS = {
+    "photo": "send_photo", "document": "send_document", "video": "send_video",
+    "animation": "send_animation", "audio": "send_audio", "sticker": "send_sticker",
+}
+INPUT_MEDIA = {
+    "photo": types.InputMediaPhoto, "document": types.InputMediaDocument, "video": types.InputMediaVideo,
+    "animation": types.InputMediaAnimation, "audio": types.InputMediaAudio,
+}
+
+
+def read_payload(data):
+    """bytes for a path, bytes-like or file-like payload (file-likes are rewound)."""
+    if isinstance(data, (bytes, bytearray, memoryview)): return bytes(data)
+    if isinstance(data, str):
+        with open(data, 'rb') as f: return f.read()
+    if hasattr(data, "getvalue"): return data.getvalue()
+    pos = data.tell() if hasattr(data, "tell") else None
+    raw = data.read()
+    if pos is not None: data.seek(pos)
+    return raw
+
+
+def file_id_of(message, kind):
+    """The file_id Telegram assigned to the `kind` media of a sent message (or None)."""
+    media = getattr(message, kind, None)
+    if kind == "photo" and media: media = media[-1]
+    return getattr(media, "file_id", None)
+
+
+def is_bad_file_id(e):
+    if not isinstance(e, ApiTelegramException) or e.error_code != 400: return False
+    desc = str(getattr(e, "description", "") or e).lower()
+    return "file" in desc and ("identifier" in desc or "file_id" in desc or "not found" in desc)
+
+
+class FileIdCache:
+    """
+    Persistent content-hash → file_id map (SQLite, LRU-trimmed to
+    `max_entries`). send()/edit_media() upload once and re-send by file_id
+    afterwards; stats count uploads, hits and the bytes that were not re-sent.
+    """
+
+    def __init__(self, db_path=FILE_ID_DB, max_entries=FILE_ID_MAX_ENTRIES):
+        self.max_entries = max_entries
+        if os.path.dirname(db_path): os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_ids ("
+            "key TEXT PRIMARY KEY, file_id TEXT NOT NULL, size INTEGER, last_used REAL)"
+        )
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.stats = {"hits": 0, "misses": 0, "uploads": 0, "bytes_saved": 0, "bytes_uploaded": 0, "stale": 0}
+
+    # --- LOOKUP ---
+    @staticmethod
+    def key_for(raw, kind):
+        return f"{kind}:{hashlib.sha1(raw).hexdigest()}"
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT file_id FROM file_ids WHERE key=?", (key,)).fetchone()
+            if row: self._conn.execute("UPDATE file_ids SET last_used=? WHERE key=?", (time.time(), key))
+            return row[0] if row else None
+
+    def put(self, key, file_id, size):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_ids (key, file_id, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, file_id, size, time.time())
+            )
+            self._puts += 1
+            if self._puts % 100 == 0: self._trim()
+
+    def forget(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM file_ids WHERE key=?", (key,))
+
+    # --- SENDING ---
+    def send(self, bot, kind, chat_id, data, **kwargs):
+        """
+        bot.send_<kind>(chat_id, data, **kwargs), but by file_id when these
+        exact bytes were uploaded before. `data`: path, bytes or file-like.
+        """
+        method = getattr(bot, SEND_METHODS[kind])
+        return self._deliver(kind, data, lambda media: method(chat_id, media, **kwargs))
+
+    def edit_media(self, bot, kind, chat_id, message_id, data, caption=None, parse_mode=None, reply_markup=None):
+        """edit_message_media with the same file_id reuse as send()."""
+        def edit(media):
+            im = INPUT_MEDIA[kind](media, caption=caption, parse_mode=parse_mode)
+            return bot.edit_message_media(media=im, chat_id=chat_id, message_id=message_id, reply_markup=reply_markup)
+        return self._deliver(kind, data, edit)
+
+    def _deliver(self, kind, data, call):
+        raw = read_payload(data)
+        key = self.key_for(raw, kind)
+        file_id = self.get(key)
+        if file_id:
+            try:
+                sent = call(file_id)
+                with self._lock:
+                    self.stats["hits"] += 1
+                    self.stats["bytes_saved"] += len(raw)
+                return sent
+            except ApiTelegramException as e:
+                if not is_bad_file_id(e): raise
+                self.forget(key)
+                with self._lock: self.stats["stale"] += 1
+
+        with self._lock: self.stats["misses"] += 1
+        media = raw if isinstance(data, (bytes, bytearray, memoryview, str)) else data
+        if hasattr(media, "seek"): media.seek(0)
+        sent = call(media)
+        with self._lock:
+            self.stats["uploads"] += 1
+            self.stats["bytes_uploaded"] += len(raw)
+        new_id = file_id_of(sent, kind)
+        if new_id: self.put(key, new_id, len(raw))
+        return sent
+
+    # --- MAINTENANCE ---
+    def _trim(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM file_ids").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM file_ids WHERE key IN (SELECT key FROM file_ids ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def get_stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM file_ids").fetchone()[0]
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entries=entries, hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0)
+
+
+file_id_cache = FileIdCache()
+
+
+def send_cached(bot, kind, chat_id, data, **kwargs):
+    return file_id_cache.send(bot, kind, chat_id, data, **kwargs)
+
+
+def edit_media_cached(bot, kind, chat_id, message_id, data, **kwargs):
+    return file_id_cache.edit_media(bot, kind, chat_id, message_id, data, **kwargs)
+
+
+def get_file_id_stats():
+    return file_id_cache.get_stats()
@@ -0,0 +1,178 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ==========================================
+# 🌐 SHARED HTTP CLIENT (Pooling + Retries + Metrics)
+# ==========================================
+# আগে প্রতিটি requests.get/post নতুন TCP+TLS কানেকশন খুলত। এখন সব হ্যান্ডলার একটা
+# requests.Session শেয়ার করে (keep-alive, হোস্ট-প্রতি কানেকশন পুল), ফলে একই হোস্টে
+# পরের কলগুলো হ্যান্ডশেক ছাড়াই যায়।
+# - টাইমআউট না দিলে HTTP_TIMEOUT ব্যবহার হয় (আগে কিছু কলে টাইমআউটই ছিল না)
+# - ক্ষণস্থায়ী এরর (কানেকশন, 429, 5xx) এ exponential backoff + full jitter দিয়ে রিট্রাই
+# - হোস্ট-প্রতি লেটেন্সি হিস্টোগ্রাম আর পুল কতটা ভরা (in-flight vs pool size) তার হিসাব
+
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "16"))      # হোস্ট-প্রতি কানেকশন
+HTTP_POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "32"))    # কতগুলো হোস্টের পুল রাখা হবে
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "0.3"))       # সেকেন্ড, প্রতি চেষ্টায় দ্বিগুণ
+HTTP_BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", "5"))
+HTTP_TIMEOUT = (float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5")), float(os.environ.get("HTTP_READ_TIMEOUT", "20")))
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+# এগুলো আবার পাঠালে সার্ভারের অবস্থা বদলায় না; বাকিগুলো (POST/PUT/DELETE) শুধু তখনই
+# রিট্রাই হয় যখন নিশ্চিত রিকোয়েস্ট সার্ভারে পৌঁছায়নি (কানেক্ট টাইমআউট বা 429)
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "retries", "buckets", "total_ms", "max_ms", "in_flight", "peak_in_flight", "saturated")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1) # শেষ ঘর = সবচেয়ে বড় বাকেটের উপরে
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated = 0 # পুল ভরা অবস্থায় নতুন রিকোয়েস্ট এসেছে (অতিরিক্ত কানেকশন খুলতে হয়েছে)
+
+
+class HttpClient:
+    """
+    Thread-safe wrapper around one pooled requests.Session with
+    requests-style get/post/put/delete/head helpers, default timeouts,
+    jittered retries and per-host metrics.
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, pool_hosts=HTTP_POOL_HOSTS, retries=HTTP_RETRIES,
+                 backoff=HTTP_BACKOFF, backoff_max=HTTP_BACKOFF_MAX, timeout=HTTP_TIMEOUT):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.session = requests.Session()
+        # pool_block=False: পুল ভরা থাকলে অপেক্ষা না করে বাড়তি কানেকশন খোলে (saturated এ গোনা হয়)
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=0, pool_block=False)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    # --- REQUESTS-STYLE API ---
+    def request(self, method, url, retries=None, **kwargs):
+        method = method.upper()
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.retries if retries is None else retries
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            self._begin(host)
+            start = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self._end(host, start, failed=True)
+                if attempt >= retries or not self._should_retry(method, error=e): raise
+            else:
+                self._end(host, start, failed=resp.status_code >= 500)
+                if attempt >= retries or not self._should_retry(method, status=resp.status_code): return resp
+                delay = self._retry_after(resp)
+                resp.close() # কানেকশন পুলে ফেরত যাক
+                if delay is not None:
+                    self._sleep_and_count(host, min(delay, self.backoff_max))
+                    attempt += 1
+                    continue
+            self._sleep_and_count(host, random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt))))
+            attempt += 1
+
+    def get(self, url, **kwargs): return self.request("GET", url, **kwargs)
+    def head(self, url, **kwargs): return self.request("HEAD", url, **kwargs)
+    def post(self, url, **kwargs): return self.request("POST", url, **kwargs)
+    def put(self, url, **kwargs): return self.request("PUT", url, **kwargs)
+    def delete(self, url, **kwargs): return self.request("DELETE", url, **kwargs)
+
+    # --- RETRY POLICY ---
+    @staticmethod
+    def _should_retry(method, status=None, error=None):
+        if status is not None:
+            if status == 429: return True
+            return status in RETRY_STATUSES and method in IDEMPOTENT_METHODS
+        if isinstance(error, requests.exceptions.ConnectTimeout): return True
+        return method in IDEMPOTENT_METHODS and isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    @staticmethod
+    def _retry_after(resp):
+        try: return float(resp.headers["Retry-After"])
+        except (KeyError, TypeError, ValueError): return None
+
+    def _sleep_and_count(self, host, delay):
+        with self._lock: self._host(host).retries += 1
+        time.sleep(delay)
+
+    # --- METRICS ---
+    def _host(self, host):
+        stats = self._hosts.get(host)
+        if stats is None: stats = self._hosts[host] = _HostStats()
+        return stats
+
+    def _begin(self, host):
+        with self._lock:
+            stats = self._host(host)
+            if stats.in_flight >= self.pool_size: stats.saturated += 1
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+
+    def _end(self, host, start, failed):
+        ms = (time.perf_counter() - start) * 1000
+        idx = next((i for i, edge in enumerate(LATENCY_BUCKETS_MS) if ms <= edge), len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            stats = self._host(host)
+            stats.in_flight -= 1
+            stats.requests += 1
+            stats.errors += 1 if failed else 0
+            stats.buckets[idx] += 1
+            stats.total_ms += ms
+            stats.max_ms = max(stats.max_ms, ms)
+
+    def get_stats(self):
+        """One dict per host: counts, latency histogram {'<=50ms': n, ...}, p50/p95 bucket and pool usage."""
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        out = []
+        with self._lock:
+            for host, s in sorted(self._hosts.items(), key=lambda kv: -kv[1].requests):
+                out.append({
+                    "host": host, "requests": s.requests, "errors": s.errors, "retries": s.retries,
+                    "avg_ms": round(s.total_ms / s.requests, 1) if s.requests else 0.0, "max_ms": round(s.max_ms, 1),
+                    "p50": _percentile_label(s.buckets, labels, 0.5), "p95": _percentile_label(s.buckets, labels, 0.95),
+                    "histogram": dict(zip(labels, s.buckets)),
+                    "in_flight": s.in_flight, "peak_in_flight": s.peak_in_flight,
+                    "pool_size": self.pool_size, "saturated": s.saturated,
+                })
+        return out
+
+
+def _percentile_label(buckets, labels, q):
+    total = sum(buckets)
+    if not total: return "-"
+    seen = 0
+    for count, label in zip(buckets, labels):
+        seen += count
+        if seen >= q * total: return label
+    return labels[-1]
+
+
+http = HttpClient()
+
+
+def get_http_stats():
+    return http.get_stats()
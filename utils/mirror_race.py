@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# ==========================================
+# 🏁 MIRROR RACING (Health Score + Circuit Breaker)
+# ==========================================
+# একই ডাটা কয়েকটা মিরর থেকে পাওয়া যায় (যেমন reddit.com + redlib ইনস্ট্যান্স)। আগে একটা
+# একটা করে চেষ্টা হতো, তাই একটা মরা মিরর মানেই পুরো টাইমআউট অপেক্ষা। এখন:
+# - সেরা স্কোরের মিররগুলো একসাথে চালানো হয়, প্রথম ভ্যালিড উত্তর জেতে, বাকিগুলো বাতিল
+#   (শুরু না হলে cancel; চলতে থাকলে শেষ হয়ে শুধু হেলথ আপডেট করে)
+# - মিরর-প্রতি হেলথ: লেটেন্সি আর ফেইল রেটের EWMA, স্কোর = latency × (1 + 3 × fail_rate)
+# - পরপর MIRROR_FAIL_THRESHOLD বার ফেইল → সার্কিট খোলা, MIRROR_COOLDOWN সেকেন্ড বাদ;
+#   তারপর একবার ট্রায়াল (half-open), সফল হলে আবার স্বাভাবিক
+
+MIRROR_PARALLEL = int(os.environ.get("MIRROR_PARALLEL", "4"))
+MIRROR_FAIL_THRESHOLD = int(os.environ.get("MIRROR_FAIL_THRESHOLD", "3"))
+MIRROR_COOLDOWN = int(os.environ.get("MIRROR_COOLDOWN", "120"))  # সেকেন্ড
+EWMA_ALPHA = 0.3
+UNKNOWN_LATENCY_MS = 1500.0 # নতুন মিরর মাঝামাঝি র‍্যাঙ্কে শুরু করে
+
+_racers = []
+
+
+class MirrorHealth:
+    __slots__ = ("latency_ms", "fail_rate", "consecutive", "open_until", "requests", "failures", "wins")
+
+    def __init__(self):
+        self.latency_ms = UNKNOWN_LATENCY_MS
+        self.fail_rate = 0.0
+        self.consecutive = 0
+        self.open_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.wins = 0
+
+    def score(self):
+        return self.latency_ms * (1 + 3 * self.fail_rate)
+
+
+class MirrorRacer:
+    """
+    Races `fetch(arg)` over several mirrors and returns the first result
+    that does not raise. Health is shared across calls, so dead or slow
+    mirrors sink in the ranking and are skipped while their circuit is open.
+    """
+
+    def __init__(self, name, parallel=MIRROR_PARALLEL, fail_threshold=MIRROR_FAIL_THRESHOLD, cooldown=MIRROR_COOLDOWN):
+        self.name = name
+        self.parallel = max(1, parallel)
+        self.fail_threshold = fail_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._health = {}
+        # হেরে যাওয়া রিকোয়েস্টগুলো টাইমআউট পর্যন্ত থ্রেড ধরে রাখতে পারে, তাই পুল একটু বড়
+        self._pool = ThreadPoolExecutor(max_workers=self.parallel * 4, thread_name_prefix=f"race-{name}")
+        _racers[:] = [r for r in _racers if r.name != name] + [self] # প্লাগিন রিলোড হলে পুরনোটা বাদ
+
+    # --- PUBLIC API ---
+    def ranked(self, mirrors):
+        """Mirrors by health score, open circuits removed (all open → the one closest to reopening)."""
+        now = time.monotonic()
+        with self._lock:
+            health = {m: self._health.setdefault(m, MirrorHealth()) for m in mirrors}
+            usable = [m for m in mirrors if health[m].open_until <= now]
+            if not usable: usable = [min(mirrors, key=lambda m: health[m].open_until)]
+            return sorted(usable, key=lambda m: health[m].score())
+
+    def race(self, candidates, fetch, timeout):
+        """
+        candidates: [(mirror, arg), ...]. Returns (mirror, result) of the
+        first successful fetch, or (None, None) if all failed / `timeout` passed.
+        """
+        args = dict(candidates)
+        queue = self.ranked(list(args))
+        futures = {}
+
+        def launch():
+            mirror = queue.pop(0)
+            futures[self._pool.submit(self._attempt, mirror, fetch, args[mirror])] = mirror
+
+        while queue and len(futures) < self.parallel: launch()
+        deadline = time.monotonic() + timeout
+        while futures:
+            done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done: break
+            for fut in done:
+                mirror = futures.pop(fut)
+                ok, result = fut.result()
+                if ok:
+                    for other in futures: other.cancel()
+                    with self._lock: self._health[mirror].wins += 1
+                    return mirror, result
+                if queue: launch() # ফেইল করা স্লটে পরের র‍্যাঙ্কের মিরর
+        for other in futures: other.cancel()
+        return None, None
+
+    def get_stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "mirror": m, "latency_ms": round(h.latency_ms, 1), "fail_rate": round(h.fail_rate, 3),
+                "requests": h.requests, "failures": h.failures, "wins": h.wins,
+                "state": "open" if h.open_until > now else ("half-open" if h.consecutive >= self.fail_threshold else "closed"),
+            } for m, h in sorted(self._health.items(), key=lambda kv: kv[1].score())]
+
+    # --- INTERNALS ---
+    def _attempt(self, mirror, fetch, arg):
+        start = time.perf_counter()
+        try: result, ok = fetch(arg), True
+        except Exception: result, ok = None, False
+        self._record(mirror, ok, (time.perf_counter() - start) * 1000)
+        return ok, result
+
+    def _record(self, mirror, ok, ms):
+        with self._lock:
+            h = self._health.setdefault(mirror, MirrorHealth())
+            h.requests += 1
+            h.fail_rate = EWMA_ALPHA * (0.0 if ok else 1.0) + (1 - EWMA_ALPHA) * h.fail_rate
+            if ok:
+                h.latency_ms = ms if h.requests == 1 else EWMA_ALPHA * ms + (1 - EWMA_ALPHA) * h.latency_ms
+                h.consecutive = 0
+                h.open_until = 0.0
+            else:
+                # ফেইলের সময়টাও লেটেন্সিতে গোনা (টাইমআউট হওয়া মিরর ধীরও)
+                h.latency_ms = EWMA_ALPHA * max(ms, h.latency_ms) + (1 - EWMA_ALPHA) * h.latency_ms
+                h.failures += 1
+                h.consecutive += 1
+                if h.consecutive >= self.fail_threshold: h.open_until = time.monotonic() + self.cooldown
+
+
+def get_mirror_stats():
+    return {r.name: r.get_stats() for r in _racers}
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+# ==========================================
+# 🧠 SESSION STATE (TTL + LRU + Byte Budget)
+# ==========================================
+# হ্যান্ডলারগুলোর মডিউল-লেভেল সেশন ডিক্ট (কার্ট, ধাপে-ধাপে ইনপুট, মেনু আইডি…)
+# আগে কখনো খালি হতো না। SessionStore সাধারণ ডিক্টের মতোই ব্যবহার হয়, কিন্তু:
+# - শেষ ব্যবহারের `ttl` সেকেন্ড পর এন্ট্রি মুছে যায়
+# - RAM এ সর্বোচ্চ `max_entries` টি এন্ট্রি / `max_bytes` বাইট থাকে (LRU)
+# - `spill=True` হলে বাজেটের বাইরে যাওয়া এন্ট্রি ফেলে না দিয়ে ডিস্কে pickle হয়,
+#   আবার দরকার হলে ফেরত আসে
+
+SESSION_SPILL_DIR = os.environ.get("SESSION_SPILL_DIR", "data/sessions")
+SWEEP_INTERVAL = 30 # সেকেন্ড
+
+_stores = []
+_janitor = None
+_janitor_lock = threading.Lock()
+
+
+def payload_size(obj, _depth=0):
+    """Approximate bytes held by `obj`; binary payloads are counted exactly."""
+    if isinstance(obj, (bytes, bytearray)): return len(obj)
+    if isinstance(obj, memoryview): return obj.nbytes
+    if isinstance(obj, str): return len(obj)
+    if _depth > 8: return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return 64 + sum(payload_size(k, _depth + 1) + payload_size(v, _depth + 1) for k, v in list(obj.items()))
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return 56 + sum(payload_size(v, _depth + 1) for v in list(obj))
+    return sys.getsizeof(obj)
+
+
+class SessionStore(MutableMapping):
+    """
+    Thread-safe dict with TTL expiry (since last access), an LRU bound on
+    entries and bytes, and optional spill-to-disk instead of eviction.
+    Values may be mutated in place; their size is re-measured on the next
+    write or sweep.
+    """
+
+    def __init__(self, name, ttl=3600, max_entries=10000, max_bytes=None, spill=False):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.spill_dir = os.path.join(SESSION_SPILL_DIR, name) if spill else None
+        self._lock = threading.RLock()
+        self._data = OrderedDict()  # key -> [value, last_access, size]
+        self._stale = set()         # get() হয়েছে, সাইজ বদলে থাকতে পারে
+        self._spilled = {}          # key -> (path, last_access, size)
+        self.bytes = 0
+        self.stats = {"expired": 0, "evicted": 0, "spilled": 0, "restored": 0}
+        if self.spill_dir:
+            # আগের প্রসেসের সেশন রিস্টার্টের পর অর্থহীন
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            os.makedirs(self.spill_dir, exist_ok=True)
+        _stores.append(self)
+        _start_janitor()
+
+    # --- DICT API ---
+    def __getitem__(self, key):
+        with self._lock:
+            now = time.monotonic()
+            entry = self._data.get(key)
+            if entry is None:
+                if key not in self._spilled: raise KeyError(key)
+                entry = self._restore(key)
+            if now - entry[1] > self.ttl:
+                self._drop(key)
+                self.stats["expired"] += 1
+                raise KeyError(key)
+            entry[1] = now
+            self._data.move_to_end(key)
+            self._stale.add(key)
+            return entry[0]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._drop(key)
+            size = payload_size(value)
+            self._data[key] = [value, time.monotonic(), size]
+            self.bytes += size
+            self._enforce(keep=key)
+
+    def __delitem__(self, key):
+        with self._lock:
+            if key not in self._data and key not in self._spilled: raise KeyError(key)
+            self._drop(key)
+
+    def __contains__(self, key):
+        # মেসেজ ফিল্টারগুলো প্রতি আপডেটে `in` চেক করে, তাই এখানে ডিস্ক থেকে লোড বা TTL রিফ্রেশ হয় না
+        with self._lock:
+            entry = self._data.get(key) or self._spilled.get(key)
+            return entry is not None and time.monotonic() - entry[1] <= self.ttl
+
+    def __iter__(self):
+        with self._lock:
+            return iter([k for k in list(self._data) + list(self._spilled) if k in self])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data) + len(self._spilled)
+
+    # --- MAINTENANCE ---
+    def sweep(self):
+        """Drops expired entries, re-measures mutated ones and enforces the budget."""
+        with self._lock:
+            now = time.monotonic()
+            for key in [k for k, e in self._data.items() if now - e[1] > self.ttl] + \
+                       [k for k, e in self._spilled.items() if now - e[1] > self.ttl]:
+                self._drop(key)
+                self.stats["expired"] += 1
+            self._enforce()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, name=self.name, entries=len(self._data), spilled_entries=len(self._spilled), bytes=self.bytes)
+
+    # --- INTERNALS ---
+    def _remeasure(self):
+        for key in self._stale:
+            entry = self._data.get(key)
+            if entry is None: continue
+            size = payload_size(entry[0])
+            self.bytes += size - entry[2]
+            entry[2] = size
+        self._stale.clear()
+
+    def _over_budget(self):
+        return len(self._data) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes)
+
+    def _enforce(self, keep=None):
+        self._remeasure()
+        for key in list(self._data):
+            if not self._over_budget(): break
+            if key == keep: continue
+            if not (self.spill_dir and self._spill(key)):
+                self._drop(key)
+                self.stats["evicted"] += 1
+
+    def _spill(self, key):
+        value, last_access, size = self._data[key]
+        path = os.path.join(self.spill_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".pkl")
+        try:
+            with open(path, 'wb') as f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            if os.path.exists(path): os.remove(path)
+            return False # pickle করা যায় না (যেমন ক্লায়েন্ট অবজেক্ট) → সাধারণ eviction
+        del self._data[key]
+        self.bytes -= size
+        self._spilled[key] = (path, last_access, size)
+        self.stats["spilled"] += 1
+        return True
+
+    def _restore(self, key):
+        path, last_access, size = self._spilled.pop(key)
+        try:
+            with open(path, 'rb') as f: value = pickle.load(f)
+        finally:
+            if os.path.exists(path): os.remove(path)
+        entry = self._data[key] = [value, last_access, size]
+        self.bytes += size
+        self.stats["restored"] += 1
+        return entry
+
+    def _drop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None: self.bytes -= entry[2]
+        self._stale.discard(key)
+        spilled = self._spilled.pop(key, None)
+        if spilled and os.path.exists(spilled[0]): os.remove(spilled[0])
+
+
+def _sweep_all():
+    while True:
+        time.sleep(SWEEP_INTERVAL)
+        for store in list(_stores):
+            try: store.sweep()
+            except Exception as e: print(f"⚠️ Session sweep failed ({store.name}): {e}")
+
+
+def _start_janitor():
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            _janitor = threading.Thread(target=_sweep_all, name="session-janitor", daemon=True)
+            _janitor.start()
+
+
+def get_session_stats():
+    return [s.get_stats() for s in _stores]
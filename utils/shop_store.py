@@ -0,0 +1,355 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# ==========================================
+# 🗄 SHOP STORAGE BACKENDS
+# ==========================================
+# দুটি ব্যাকএন্ড একই ইন্টারফেস দেয়:
+#   get(shop_id) -> dict | None
+#   put_many({shop_id: shop_dict | None})   (None = ডিলিট)
+#   load_all() -> {shop_id: shop_dict}
+#   due_shop_ids(now) -> [shop_id, ...]
+# utils_shop.py শুধু এই মেথডগুলো ব্যবহার করে, তাই ব্যাকএন্ড বদলালেও হ্যান্ডলার বদলাতে হয় না।
+
+# প্রতিটি প্রোডাক্ট/অর্ডার আলাদা রো-তে থাকে, শপের বাকি ফিল্ড 'shops' টেবিলে
+ROW_FIELDS = ("products", "orders")
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _next_post_at(shop):
+    runs = [t.get("run_at") for t in shop.get("scheduled_posts") or [] if t.get("run_at") is not None]
+    return min(runs) if runs else None
+
+
+class JsonShopBackend:
+    """Legacy backend: the whole marketplace lives in one shops.json file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._data = None # প্রথম রিডের পর ফাইলটা RAM-এ থাকে, প্রতি রাইটে আবার পার্স করতে হয় না
+
+    def _read_file(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f: return json.load(f)
+            except Exception as e:
+                print(f"⚠️ Error reading {self.path}: {e}")
+        return {}
+
+    def _loaded(self):
+        if self._data is None: self._data = self._read_file()
+        return self._data
+
+    def load_all(self):
+        with self._lock:
+            return dict(self._loaded())
+
+    def get(self, shop_id):
+        with self._lock:
+            return self._loaded().get(str(shop_id))
+
+    def put_many(self, shops):
+        with self._lock:
+            data = dict(self._loaded())
+            for sid, shop in shops.items():
+                if shop is None: data.pop(str(sid), None)
+                else: data[str(sid)] = shop
+            # টেম্প ফাইলে লিখে os.replace, যাতে মাঝপথে ক্র্যাশ হলে পুরনো ফাইল অক্ষত থাকে
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._data = data
+
+    def due_shop_ids(self, now):
+        due = []
+        for sid, shop in self.load_all().items():
+            run_at = _next_post_at(shop)
+            if run_at is not None and run_at <= now: due.append(sid)
+        return due
+
+    def close(self):
+        pass
+
+
+class SqliteShopBackend:
+    """
+    SQLite (WAL) backend: one row per shop, product and order.
+    Writes only touch the rows that actually changed.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS shops (
+        shop_id TEXT PRIMARY KEY,
+        next_post_at INTEGER,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS products (
+        shop_id TEXT NOT NULL,
+        prod_id TEXT NOT NULL,
+        category TEXT,
+        status TEXT,
+        data TEXT NOT NULL,
+        PRIMARY KEY (shop_id, prod_id)
+    );
+    CREATE TABLE IF NOT EXISTS orders (
+        shop_id TEXT NOT NULL,
+        order_id TEXT NOT NULL,
+        status TEXT,
+        data TEXT NOT NULL,
+        PRIMARY KEY (shop_id, order_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_shops_next_post ON shops(next_post_at);
+    CREATE INDEX IF NOT EXISTS idx_products_shop ON products(shop_id);
+    CREATE INDEX IF NOT EXISTS idx_products_status ON products(shop_id, status);
+    CREATE INDEX IF NOT EXISTS idx_products_category ON products(shop_id, category);
+    CREATE INDEX IF NOT EXISTS idx_orders_shop ON orders(shop_id);
+    CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(shop_id, status);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        # isolation_level=None: ট্রানজ্যাকশন আমরা নিজেরা BEGIN/COMMIT দিয়ে চালাই
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    # --- READ ---
+    def _rows(self, table, key, sid):
+        cur = self.conn.execute(f"SELECT {key}, data FROM {table} WHERE shop_id = ? ORDER BY rowid", (sid,))
+        return {k: json.loads(d) for k, d in cur}
+
+    def get(self, shop_id):
+        sid = str(shop_id)
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM shops WHERE shop_id = ?", (sid,)).fetchone()
+            if not row: return None
+            shop = json.loads(row[0])
+            shop["products"] = self._rows("products", "prod_id", sid)
+            shop["orders"] = self._rows("orders", "order_id", sid)
+            return shop
+
+    def load_all(self):
+        with self._lock:
+            data = {}
+            for sid, d in self.conn.execute("SELECT shop_id, data FROM shops ORDER BY rowid"):
+                shop = json.loads(d)
+                shop["products"] = {}
+                shop["orders"] = {}
+                data[sid] = shop
+            for sid, pid, d in self.conn.execute("SELECT shop_id, prod_id, data FROM products ORDER BY rowid"):
+                if sid in data: data[sid]["products"][pid] = json.loads(d)
+            for sid, oid, d in self.conn.execute("SELECT shop_id, order_id, data FROM orders ORDER BY rowid"):
+                if sid in data: data[sid]["orders"][oid] = json.loads(d)
+            return data
+
+    def due_shop_ids(self, now):
+        with self._lock:
+            cur = self.conn.execute("SELECT shop_id FROM shops WHERE next_post_at <= ?", (now,))
+            return [r[0] for r in cur]
+
+    # --- WRITE ---
+    def _sync_rows(self, table, key, sid, items, extra_cols):
+        existing = dict(self.conn.execute(f"SELECT {key}, data FROM {table} WHERE shop_id = ?", (sid,)))
+        cols = ", ".join(extra_cols)
+        marks = ", ".join("?" for _ in extra_cols)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in extra_cols)
+        for k, item in items.items():
+            raw = _dumps(item)
+            if existing.pop(k, None) == raw: continue
+            values = [item.get(c) if isinstance(item, dict) else None for c in extra_cols]
+            # ON CONFLICT ... DO UPDATE rowid ঠিক রাখে, ফলে ইনসার্ট অর্ডার বজায় থাকে
+            self.conn.execute(
+                f"INSERT INTO {table} (shop_id, {key}, {cols}, data) VALUES (?, ?, {marks}, ?) "
+                f"ON CONFLICT(shop_id, {key}) DO UPDATE SET {updates}, data = excluded.data",
+                (sid, k, *values, raw)
+            )
+        for k in existing:
+            self.conn.execute(f"DELETE FROM {table} WHERE shop_id = ? AND {key} = ?", (sid, k))
+
+    def _put(self, sid, shop):
+        if shop is None:
+            for table in ("shops", "products", "orders"):
+                self.conn.execute(f"DELETE FROM {table} WHERE shop_id = ?", (sid,))
+            return
+        body = {k: v for k, v in shop.items() if k not in ROW_FIELDS}
+        self.conn.execute(
+            "INSERT INTO shops (shop_id, next_post_at, data) VALUES (?, ?, ?) "
+            "ON CONFLICT(shop_id) DO UPDATE SET next_post_at = excluded.next_post_at, data = excluded.data",
+            (sid, _next_post_at(shop), _dumps(body))
+        )
+        self._sync_rows("products", "prod_id", sid, shop.get("products") or {}, ("category", "status"))
+        self._sync_rows("orders", "order_id", sid, shop.get("orders") or {}, ("status",))
+
+    def put_many(self, shops):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sid, shop in shops.items():
+                    self._put(str(sid), shop)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+# ==========================================
+# ⚡ IN-MEMORY CACHE (Dirty-Shop Flushing)
+# ==========================================
+
+class ShopCache:
+    """
+    Shared RAM cache in front of a backend.
+    Reads are served from memory; put() only marks the shop dirty and a
+    background thread coalesces all dirty shops into one backend write
+    every `flush_interval_ms` (or when flush() is called on shutdown).
+    Cached shops are treated as immutable snapshots: callers that want to
+    modify a shop must copy it and put() the new version back.
+    """
+
+    def __init__(self, backend, flush_interval_ms=500):
+        self.backend = backend
+        self.flush_interval = max(flush_interval_ms, 10) / 1000
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock() # একসাথে দুটি ফ্লাশ চললে পুরনো ভার্সন পরে লেখা হতে পারে
+        self._shops = {} # shop_id -> shop (None = জানা আছে যে শপ নেই)
+        self._dirty = set()
+        self._thread = None
+        self.stats = {
+            "hits": 0, "misses": 0, "writes": 0,
+            "flushes": 0, "flushed_shops": 0, "flush_errors": 0,
+            "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0
+        }
+
+    def get(self, shop_id):
+        sid = str(shop_id)
+        with self._lock:
+            if sid in self._shops:
+                self.stats["hits"] += 1
+                return self._shops[sid]
+            self.stats["misses"] += 1
+            shop = self.backend.get(sid)
+            self._shops[sid] = shop
+            return shop
+
+    def put(self, shop_id, shop):
+        sid = str(shop_id)
+        with self._lock:
+            self._shops[sid] = shop
+            self._dirty.add(sid)
+            self.stats["writes"] += 1
+            self._start_flusher()
+
+    def load_all(self):
+        self.flush()
+        return self.backend.load_all()
+
+    def due_shop_ids(self, now):
+        self.flush()
+        return self.backend.due_shop_ids(now)
+
+    def flush(self):
+        """Writes every dirty shop in a single backend call. Returns the count."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty: return 0
+                batch = {sid: self._shops.get(sid) for sid in self._dirty}
+                self._dirty.clear()
+
+            start = time.perf_counter()
+            try:
+                self.backend.put_many(batch)
+            except Exception as e:
+                with self._lock:
+                    self._dirty.update(batch)
+                    self.stats["flush_errors"] += 1
+                print(f"❌ Shop Flush Error: {e}")
+                return 0
+            took = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                self.stats["flushes"] += 1
+                self.stats["flushed_shops"] += len(batch)
+                self.stats["last_flush_ms"] = took
+                self.stats["max_flush_ms"] = max(self.stats["max_flush_ms"], took)
+                self.stats["total_flush_ms"] += took
+            return len(batch)
+
+    def _start_flusher(self):
+        if self._thread and self._thread.is_alive(): return
+        self._thread = threading.Thread(target=self._flush_loop, name="shop-flusher", daemon=True)
+        self._thread.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cached"] = len(self._shops)
+            stats["dirty"] = len(self._dirty)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["avg_flush_ms"] = round(stats["total_flush_ms"] / stats["flushes"], 2) if stats["flushes"] else 0.0
+        return stats
+
+
+# ==========================================
+# 🔁 ONE-SHOT MIGRATOR (shops.json -> SQLite)
+# ==========================================
+
+def migrate_json_to_sqlite(json_path, db_path, backend=None):
+    """
+    Copies every shop from the legacy JSON file into SQLite and renames the
+    JSON file to *.migrated so it is never imported twice.
+    Returns the number of migrated shops.
+    """
+    if not os.path.exists(json_path): return 0
+    data = JsonShopBackend(json_path).load_all()
+    target = backend or SqliteShopBackend(db_path)
+    try:
+        target.put_many(data)
+    finally:
+        if backend is None: target.close()
+    os.replace(json_path, json_path + ".migrated")
+    print(f"✅ Migrated {len(data)} shops from {json_path} to {db_path}")
+    return len(data)
+
+
+def open_backend(kind, json_path, db_path):
+    """Returns the configured backend ('sqlite' or 'json')."""
+    if kind == "json":
+        return JsonShopBackend(json_path)
+    backend = SqliteShopBackend(db_path)
+    # প্রথমবার চালু হলে পুরনো JSON ডাটা অটোমেটিক ইমপোর্ট
+    if os.path.exists(json_path):
+        try:
+            migrate_json_to_sqlite(json_path, db_path, backend=backend)
+        except Exception as e:
+            print(f"❌ Shop migration failed: {e}")
+    return backend
+
+
+if __name__ == "__main__":
+    # ব্যবহার: python -m utils.shop_store shops.json shops.db
+    src = sys.argv[1] if len(sys.argv) > 1 else "shops.json"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "shops.db"
+    start = time.time()
+    count = migrate_json_to_sqlite(src, dst)
+    print(f"⏱ {count} shops in {time.time() - start:.2f}s")
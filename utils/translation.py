@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# 🌐 TRANSLATION SERVICE (Cache + Batching + Timeout)
+# ==========================================
+# ডাউনলোডাররা প্রতিটি পোস্টের ক্যাপশন আলাদাভাবে GoogleTranslator দিয়ে অনুবাদ করত, একই
+# ক্যাপশন বারবার, আর অনুবাদ ধীর হলে মিডিয়া পাঠানোও আটকে থাকত। এখন:
+# - (sha1(text), target) → অনুবাদ SQLite এ থাকে (রিস্টার্টের পরও), শেষ ব্যবহার অনুযায়ী LRU
+# - ক্যাশে না থাকা লেখাগুলো TRANSLATE_BATCH_WINDOW এর মধ্যে জমিয়ে এক রিকোয়েস্টে পাঠানো
+# - submit() সাথে সাথে Future দেয়; কলার মূল ক্যাপশন দিয়ে পাঠিয়ে পরে এডিট করতে পারে
+# - অনুবাদ ফেইল করলে Future মূল লেখাই ফেরত দেয়, তাই কলারকে এরর সামলাতে হয় না;
+#   তবে future.failed = True থাকে, যাতে কেউ সেটাকে আসল অনুবাদ ধরে ক্যাশ না করে
+
+TRANSLATION_DB = os.environ.get("TRANSLATION_DB", "data/translations.db")
+TRANSLATION_MAX_ENTRIES = int(os.environ.get("TRANSLATION_MAX_ENTRIES", "20000"))
+TRANSLATE_BATCH_WINDOW = float(os.environ.get("TRANSLATE_BATCH_WINDOW", "0.15"))  # সেকেন্ড
+TRANSLATE_TIMEOUT = float(os.environ.get("TRANSLATE_TIMEOUT", "2"))              # translate() কতক্ষণ অপেক্ষা করবে
+MAX_CHARS = 4500 # গুগলের ৫০০০ অক্ষরের লিমিটের নিচে, প্রতি রিকোয়েস্টে
+# ব্যাচের লেখাগুলো আলাদা করার মার্কার; অনুবাদে ঠিকঠাক না ফিরলে প্রতিটি আলাদা অনুবাদ হয়
+SEPARATOR = "\n\n⟦{}⟧\n\n"
+
+
+def text_key(text, target):
+    return f"{target}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+
+class TranslationService:
+    """
+    Cached, batched text translation. submit() never blocks on the network;
+    translate() waits at most `timeout` and otherwise returns the original
+    text (the translation still lands in the cache for the next request).
+    """
+
+    def __init__(self, db_path=TRANSLATION_DB, max_entries=TRANSLATION_MAX_ENTRIES,
+                 batch_window=TRANSLATE_BATCH_WINDOW, workers=2):
+        self.max_entries = max_entries
+        self.batch_window = batch_window
+        if os.path.dirname(db_path): os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translated TEXT NOT NULL, last_used REAL)"
+        )
+        self._db_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._pending = {}   # (text, target) -> [Future, ...]; একই লেখা দুবার এলে একবারই অনুবাদ
+        self._puts = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+        self.stats = {"hits": 0, "misses": 0, "requests": 0, "batched_texts": 0, "failures": 0, "timeouts": 0}
+        threading.Thread(target=self._batcher, name="translate-batcher", daemon=True).start()
+
+    # --- PUBLIC API ---
+    def cached(self, text, target='bn'):
+        key = text_key(text, target)
+        with self._db_lock:
+            row = self._conn.execute("SELECT translated FROM translations WHERE key=?", (key,)).fetchone()
+            if row: self._conn.execute("UPDATE translations SET last_used=? WHERE key=?", (time.time(), key))
+            return row[0] if row else None
+
+    def submit(self, text, target='bn', wrap=None):
+        """
+        Future resolving to the translation (or `text` itself if translating
+        failed); with `wrap`, to wrap(translation). Already done on a cache hit.
+        If `wrap` raises, the Future resolves to the unwrapped translation.
+        `future.failed` is True once it resolved without a real translation.
+        """
+        fut = self._submit(text, target)
+        if wrap is None: return fut
+        out = Future()
+        out.failed = False
+
+        def relay(f):
+            out.failed = f.failed
+            result = f.result()
+            try: result = wrap(result)
+            except Exception as e: logger.warning(f"⚠️ Translation wrap failed, using plain text: {e}")
+            out.set_result(result)
+
+        fut.add_done_callback(relay)
+        return out
+
+    def translate(self, text, target='bn', timeout=TRANSLATE_TIMEOUT):
+        fut = self.submit(text, target)
+        try: return fut.result(timeout=timeout)
+        except Exception:
+            with self._cond: self.stats["timeouts"] += 1
+            return text
+
+    def get_stats(self):
+        with self._db_lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        with self._cond:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entries=entries, pending=len(self._pending),
+                        hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0)
+
+    # --- BATCHING ---
+    def _submit(self, text, target):
+        fut = Future()
+        fut.failed = False
+        text = text[:MAX_CHARS] if text else text
+        if not text or not text.strip():
+            fut.set_result(text)
+            return fut
+        hit = self.cached(text, target)
+        with self._cond:
+            if hit is not None:
+                self.stats["hits"] += 1
+                fut.set_result(hit)
+                return fut
+            self.stats["misses"] += 1
+            self._pending.setdefault((text, target), []).append(fut)
+            self._cond.notify()
+        return fut
+
+    def _batcher(self):
+        while True:
+            with self._cond:
+                while not self._pending: self._cond.wait()
+            time.sleep(self.batch_window) # আরও লেখা জমার সুযোগ
+            with self._cond:
+                pending, self._pending = self._pending, {}
+            by_target = {}
+            for (text, target), futures in pending.items():
+                by_target.setdefault(target, []).append((text, futures))
+            for target, items in by_target.items():
+                for batch in _chunks(items):
+                    self._pool.submit(self._run_batch, target, batch)
+
+    def _run_batch(self, target, batch):
+        texts = [text for text, _ in batch]
+        failed = False
+        try: results = self._translate_many(texts, target)
+        except Exception as e:
+            logger.warning(f"⚠️ Translation failed: {e}")
+            with self._cond: self.stats["failures"] += len(texts)
+            results, failed = texts, True
+        for (text, futures), result in zip(batch, results):
+            if result != text:
+                try: self._store(text, target, result)
+                except Exception as e: logger.warning(f"⚠️ Translation cache write failed: {e}")
+            for fut in futures:
+                fut.failed = failed # set_result এর আগে, যাতে কলব্যাকগুলো দেখতে পায়
+                fut.set_result(result)
+
+    def _translate_many(self, texts, target):
+        from deep_translator import GoogleTranslator
+        translator = GoogleTranslator(source='auto', target=target)
+        with self._cond:
+            self.stats["requests"] += 1
+            self.stats["batched_texts"] += len(texts)
+        if len(texts) == 1: return [translator.translate(texts[0]) or texts[0]]
+
+        joined = "".join(SEPARATOR.format(i) + t for i, t in enumerate(texts))
+        out = translator.translate(joined) or ""
+        parts = _split_joined(out, len(texts))
+        if parts is not None: return parts
+        # মার্কার হারিয়ে গেছে → প্রতিটি আলাদা
+        with self._cond: self.stats["requests"] += len(texts)
+        return [translator.translate(t) or t for t in texts]
+
+    def _store(self, text, target, translated):
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, translated, last_used) VALUES (?, ?, ?)",
+                (text_key(text, target), translated, time.time())
+            )
+            self._puts += 1
+            if self._puts % 100 == 0:
+                count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+                if count > self.max_entries:
+                    self._conn.execute(
+                        "DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY last_used LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+
+
+def _chunks(items):
+    """Groups (text, futures) so each joined request stays under MAX_CHARS."""
+    batch, size = [], 0
+    for text, futures in items:
+        cost = len(text) + len(SEPARATOR) + 4
+        if batch and size + cost > MAX_CHARS:
+            yield batch
+            batch, size = [], 0
+        batch.append((text, futures))
+        size += cost
+    if batch: yield batch
+
+
+def _split_joined(out, n):
+    parts, rest = [], out
+    for i in range(n):
+        marker = f"⟦{i}⟧"
+        pos = rest.find(marker)
+        if pos < 0: return None
+        if i: parts.append(rest[:pos].strip())
+        rest = rest[pos + len(marker):]
+    parts.append(rest.strip())
+    return parts if all(parts) else None
+
+
+translator = TranslationService()
+
+
+def get_translation_stats():
+    return translator.get_stats()
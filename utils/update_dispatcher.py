@@ -0,0 +1,142 @@
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# 🛣 PER-CHAT ORDERED DISPATCHER
+# ==========================================
+# একই চ্যাটের আপডেট সবসময় একই লেনে যায় (chat_id % lanes), তাই চ্যাটের ভেতরে
+# অর্ডার ঠিক থাকে, আর ভিন্ন চ্যাটগুলো আলাদা লেনে প্যারালালে চলে।
+# একটা স্লো ওয়াটারমার্ক ভিডিও শুধু নিজের লেন আটকায়, বাকি চ্যাট চলতে থাকে।
+
+_dispatcher = None
+
+
+def update_chat_id(update):
+    """Best-effort chat id of a telebot Update (None if it has no chat)."""
+    for field in ("message", "edited_message", "channel_post", "edited_channel_post",
+                  "my_chat_member", "chat_member", "chat_join_request"):
+        obj = getattr(update, field, None)
+        if obj is not None and getattr(obj, "chat", None) is not None:
+            return obj.chat.id
+    cq = getattr(update, "callback_query", None)
+    if cq is not None:
+        if cq.message is not None: return cq.message.chat.id
+        return cq.from_user.id
+    for field in ("inline_query", "chosen_inline_result", "shipping_query", "pre_checkout_query", "poll_answer"):
+        obj = getattr(update, field, None)
+        user = getattr(obj, "from_user", None) or getattr(obj, "user", None)
+        if user is not None: return user.id
+    return None
+
+
+class _LaneStats:
+    __slots__ = ("processed", "failed", "total_wait", "max_wait", "total_run", "busy_since")
+
+    def __init__(self):
+        self.processed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+        self.busy_since = None
+
+
+class ChatLaneDispatcher:
+    """
+    N serial worker lanes with bounded queues in front of `handler`
+    (called as handler([update])).
+    submit(block=False) returns False when the chat's lane is full so the
+    caller can push back (the webhook answers 503); block=True waits instead
+    (polling simply stops fetching until there is room).
+    """
+
+    def __init__(self, handler, lanes=8, max_queue=1000, name="updates"):
+        self.handler = handler
+        self.lane_count = max(1, lanes)
+        per_lane = max(1, max_queue // self.lane_count)
+        self.queues = [queue.Queue(maxsize=per_lane) for _ in range(self.lane_count)]
+        self.stats = [_LaneStats() for _ in range(self.lane_count)]
+        self.rejected = 0
+        for i in range(self.lane_count):
+            threading.Thread(target=self._run, args=(i,), name=f"{name}-lane-{i}", daemon=True).start()
+
+    def lane_of(self, chat_id):
+        return hash(chat_id) % self.lane_count if chat_id is not None else 0
+
+    def submit(self, update, block=False):
+        item = (time.monotonic(), update)
+        q = self.queues[self.lane_of(update_chat_id(update))]
+        try:
+            q.put(item, block=block)
+            return True
+        except queue.Full:
+            self.rejected += 1
+            return False
+
+    def _run(self, i):
+        q, st = self.queues[i], self.stats[i]
+        while True:
+            queued_at, update = q.get()
+            start = time.monotonic()
+            wait = start - queued_at
+            st.busy_since = start
+            try:
+                self.handler([update])
+            except Exception as e:
+                st.failed += 1
+                logger.error(f"❌ Update handler failed: {e}")
+            finally:
+                st.busy_since = None
+                st.processed += 1
+                st.total_wait += wait
+                st.max_wait = max(st.max_wait, wait)
+                st.total_run += time.monotonic() - start
+                q.task_done()
+
+    def get_stats(self):
+        """Per-lane queue depth, wait time (enqueue → start) and run time."""
+        now = time.monotonic()
+        lanes = []
+        for i, (q, st) in enumerate(zip(self.queues, self.stats)):
+            n = st.processed or 1
+            lanes.append({
+                "lane": i,
+                "depth": q.qsize(),
+                "processed": st.processed,
+                "failed": st.failed,
+                "avg_wait_ms": round(st.total_wait / n * 1000, 1),
+                "max_wait_ms": round(st.max_wait * 1000, 1),
+                "avg_run_ms": round(st.total_run / n * 1000, 1),
+                "busy_for_s": round(now - st.busy_since, 1) if st.busy_since else 0.0
+            })
+        return lanes
+
+
+def install_dispatcher(bot, lanes=8, max_queue=1000, name="updates"):
+    """
+    Routes every update of `bot` through a ChatLaneDispatcher.
+    Polling calls bot.process_new_updates(); we keep last_update_id moving
+    right away (so getUpdates does not re-fetch) and hand the actual
+    handler work to the chat's lane. The bot must be created with
+    threaded=False so telebot does not add its own unordered pool.
+    """
+    global _dispatcher
+    original = bot.process_new_updates
+    dispatcher = ChatLaneDispatcher(original, lanes=lanes, max_queue=max_queue, name=name)
+
+    def process_new_updates(updates):
+        for update in updates:
+            if update.update_id > bot.last_update_id: bot.last_update_id = update.update_id
+            dispatcher.submit(update, block=True)
+
+    bot.process_new_updates = process_new_updates
+    _dispatcher = dispatcher
+    return dispatcher
+
+
+def get_dispatcher():
+    return _dispatcher
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+import time
+
+# ==========================================
+# 📒 USER JOURNAL (Append-Only + Compaction)
+# ==========================================
+# users.json হলো শেষ কম্প্যাক্ট করা স্ন্যাপশট, আর *.journal.jsonl ফাইলে
+# প্রতিটি আপডেট একটি করে লাইন হিসেবে যোগ হয় (শেষ রেকর্ডটাই সঠিক)।
+# স্টার্টআপে স্ন্যাপশট + জার্নাল রিপ্লে করে সব ইউজার RAM-এ রাখা হয়।
+
+
+class UserJournal:
+    """
+    In-memory user table backed by a snapshot file plus an append-only
+    JSONL journal. Every update is a single appended line; the snapshot is
+    rewritten (and the journal truncated) only every `compact_every` updates.
+    """
+
+    def __init__(self, snapshot_path, compact_every=5000):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + ".journal.jsonl"
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._users = {}
+        self._journal = None
+        self._pending = 0 # শেষ কম্প্যাকশনের পর কতগুলো লাইন যোগ হয়েছে
+        self._compacting = False
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    self._users = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Error reading user snapshot: {e}")
+        # আগের কম্প্যাকশন মাঝপথে থেমে থাকলে রোটেট করা জার্নালও রিপ্লে করতে হবে
+        for path in (self.journal_path + ".old", self.journal_path):
+            if not os.path.exists(path): continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try: record = json.loads(line)
+                    except ValueError: continue # ক্র্যাশের সময় অর্ধেক লেখা শেষ লাইন
+                    self._users[str(record["id"])] = record
+                    self._pending += 1
+
+    # --- READ ---
+    def snapshot(self):
+        """Shallow copy of the latest user table (safe to iterate)."""
+        with self._lock:
+            return dict(self._users)
+
+    def get(self, user_id):
+        return self._users.get(str(user_id))
+
+    def count(self, predicate=None):
+        with self._lock:
+            if predicate is None: return len(self._users)
+            return sum(1 for u in self._users.values() if predicate(u))
+
+    # --- WRITE ---
+    def put(self, record):
+        """Stores the full latest record for a user (must contain 'id')."""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._users[str(record["id"])] = record
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal.write(line)
+            self._journal.flush()
+            self._pending += 1
+            if self._pending >= self.compact_every and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self.compact, name="user-compact", daemon=True).start()
+
+    def compact(self):
+        """Rewrites the snapshot atomically and drops the replayed journal."""
+        rotated = self.journal_path + ".old"
+        with self._compact_lock:
+            if self._pending or os.path.exists(rotated): self._compact(rotated)
+            self._compacting = False
+
+    def _compact(self, rotated):
+        with self._lock:
+            # লকের ভেতরে শুধু কপি আর জার্নাল রোটেট, ভারী রাইট লকের বাইরে
+            users = dict(self._users)
+            entries = self._pending
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if os.path.exists(self.journal_path) and not os.path.exists(rotated):
+                os.replace(self.journal_path, rotated)
+            self._pending = 0
+        try:
+            start = time.time()
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(users, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+            # স্ন্যাপশট নিরাপদে লেখার পরই পুরনো জার্নাল মুছে ফেলা
+            if os.path.exists(rotated): os.remove(rotated)
+            print(f"🗜 User journal compacted: {len(users)} users, {entries} entries in {time.time() - start:.2f}s")
+        except Exception as e:
+            print(f"❌ User journal compaction failed: {e}")
+        finally:
+            self._compacting = False
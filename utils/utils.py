@@ -1,8 +1,12 @@
 import json
 import os
 import time
+import atexit
 import threading
 from config import SUPER_ADMINS, BACKUP_CHANNEL_ID, CUSTOM_FILE, USERS_FILE
+from utils.user_store import UserJournal
+
+user_lock = threading.Lock()
 
 # ==========================================
 # 📂 SECTION 1: SETTINGS & CACHE (custom_data.json)
@@ -77,34 +81,55 @@ def send_backup(bot, commit_msg="System Update"):
 # 👥 SECTION 3: USER DATABASE (users.json)
 # ==========================================
 
+_user_journal = None
+
+def get_user_journal():
+    """Users are kept in RAM; users.json is only the compacted snapshot."""
+    global _user_journal
+    if _user_journal is None:
+        with user_lock:
+            if _user_journal is None:
+                _user_journal = UserJournal(USERS_FILE)
+                atexit.register(_user_journal.compact)
+    return _user_journal
+
 def load_users():
-    """Reads the separate users file instantly."""
-    if os.path.exists(USERS_FILE):
-        try:
-            with open(USERS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+    """Returns a snapshot of all users from RAM (no disk read)."""
+    return get_user_journal().snapshot()
+
+def _is_active(user):
+    return not user.get("inactive")
+
+def load_active_users():
+    """Users that can still receive messages (skips blocked/deactivated)."""
+    return {uid: u for uid, u in load_users().items() if _is_active(u)}
+
+def count_users(active_only=True):
+    journal = get_user_journal()
+    return journal.count(_is_active) if active_only else journal.count()
+
+def mark_user_inactive(user_id, reason):
+    """
+    Flags a user found dead during a broadcast (blocked / deactivated /
+    chat not found). The next /start from that user clears the flag.
+    """
+    journal = get_user_journal()
+    user = journal.get(user_id)
+    record = dict(user) if user else {"id": int(user_id)}
+    record.update({"inactive": True, "inactive_reason": reason, "inactive_since": time.time()})
+    journal.put(record)
 
 def track_user(user):
     """
-    Saves user info to users.json separately.
+    Appends the user's latest info to the user journal.
     """
-    user_id = str(user.id)
-    users = load_users()
-    
-    # Update User Data
-    users[user_id] = {
-        "id": user.id,
-        "first_name": user.first_name,
-        "username": user.username,
-        "last_active": time.time()
-    }
-    
     try:
-        with open(USERS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(users, f, indent=4, ensure_ascii=False)
+        get_user_journal().put({
+            "id": user.id,
+            "first_name": user.first_name,
+            "username": user.username,
+            "last_active": time.time()
+        })
     except Exception as e:
         print(f"❌ Error saving user database: {e}")
 
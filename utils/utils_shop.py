@@ -1,108 +1,165 @@
-import json
 import os
+import copy
 import time
+import atexit
+import threading
+from utils.shop_store import open_backend, ShopCache
 
 SHOPS_FILE = 'shops.json'
+SHOPS_DB = 'shops.db'
+
+# 'sqlite' (ডিফল্ট) অথবা 'json' (পুরনো সিঙ্গেল-ফাইল মোড)
+SHOP_BACKEND = os.environ.get("SHOP_BACKEND", "sqlite").lower()
+# ডার্টি শপগুলো কত মিলিসেকেন্ড পরপর ডিস্কে ফ্লাশ হবে
+SHOP_FLUSH_MS = int(os.environ.get("SHOP_FLUSH_MS", "500"))
+
+# রিড-মডিফাই-রাইট একসাথে লক করা, যাতে দুই থ্রেডের রাইট হারিয়ে না যায়
+shop_lock = threading.RLock()
+_cache = None
 
 # ==========================================
 # 💾 DATABASE CORE
 # ==========================================
 
-def load_shops():
-    if os.path.exists(SHOPS_FILE):
-        try:
-            with open(SHOPS_FILE, 'r', encoding='utf-8') as f: return json.load(f)
-        except: return {}
-    return {}
+def get_cache():
+    global _cache
+    if _cache is None:
+        with shop_lock:
+            if _cache is None:
+                _cache = ShopCache(open_backend(SHOP_BACKEND, SHOPS_FILE, SHOPS_DB), SHOP_FLUSH_MS)
+                atexit.register(flush_shops)
+    return _cache
+
+def _peek_shop(user_id):
+    """The cached shop itself; only for code here that reads it and returns nothing from it."""
+    try: return get_cache().get(user_id)
+    except Exception as e:
+        print(f"⚠️ Shop Load Error: {e}")
+        return None
 
-def save_shops(data):
+def get_shop(user_id):
+    """Private copy of a shop (None if missing); changing it never touches the cache."""
+    return copy.deepcopy(_peek_shop(user_id))
+
+def load_shop(user_id):
+    """Private, editable copy of a shop (None if missing). Save it with save_shop()."""
+    return get_shop(user_id)
+
+def save_shop(user_id, shop):
+    """Replaces the cached shop and marks it dirty; the flusher persists it."""
     try:
-        with open(SHOPS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        get_cache().put(user_id, shop)
         return True
-    except: return False
+    except Exception as e:
+        print(f"❌ Shop Save Error: {e}")
+        return False
 
-def get_shop(user_id):
-    data = load_shops()
-    return data.get(str(user_id))
+def load_shops():
+    """Full marketplace snapshot (slow path, kept for backups/tools)."""
+    try: return get_cache().load_all()
+    except Exception as e:
+        print(f"⚠️ Shop Load Error: {e}")
+        return {}
+
+def save_shops(data):
+    """Replaces the whole marketplace with `data`; shops missing from it are deleted."""
+    with shop_lock:
+        # পুরনো ফুল-ফাইল রিরাইটের মতো: ইনপুটে না থাকা শপ মুছে ফেলা (None = ডিলিট)
+        for sid in set(load_shops()) - {str(sid) for sid in data}:
+            if not save_shop(sid, None): return False
+        for sid, shop in data.items():
+            if not save_shop(sid, shop): return False
+    return True
+
+def flush_shops():
+    """Writes pending shop changes to disk right now (shutdown/restart)."""
+    if _cache is not None: _cache.flush()
+
+def get_shop_cache_stats():
+    return get_cache().get_stats()
 
 def create_shop(user_id, name):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data: return False
-    
-    data[uid] = {
-        "owner_id": user_id,
-        "name": name,
-        "description": "Welcome to my store!",
-        "banner": None,
-        "payment_info": "Contact Admin for payment.",
-        "privacy": "public",
-        "subscription_price": 0, # 0 = Free, >0 = Paid
-        "channel_id": None,
-        "auto_post": False,
-        "approved_users": [],
-        "pending_requests": [],
-        "scheduled_posts": [],
-        "customers": {},
-        "categories": {}, 
-        "products": {},
-        "coupons": {},
-        "orders": {} 
-    }
-    return save_shops(data)
+    with shop_lock:
+        if _peek_shop(uid): return False
+
+        shop = {
+            "owner_id": user_id,
+            "name": name,
+            "description": "Welcome to my store!",
+            "banner": None,
+            "payment_info": "Contact Admin for payment.",
+            "privacy": "public",
+            "subscription_price": 0, # 0 = Free, >0 = Paid
+            "channel_id": None,
+            "auto_post": False,
+            "approved_users": [],
+            "pending_requests": [],
+            "scheduled_posts": [],
+            "customers": {},
+            "categories": {}, 
+            "products": {},
+            "coupons": {},
+            "orders": {} 
+        }
+        return save_shop(uid, shop)
 
 # ==========================================
 # 📦 PRODUCTS MANAGEMENT
 # ==========================================
 
 def add_product_to_shop(user_id, name, price, description, media_list, category_id=None):
-    data = load_shops()
     uid = str(user_id)
-    if uid not in data: return False
-    if "products" not in data[uid]: data[uid]["products"] = {}
-    
-    prod_id = f"prod_{int(time.time())}"
-    data[uid]["products"][prod_id] = {
-        "name": name, "price": price, "description": description,
-        "media": media_list, "category": category_id, 
-        "status": "active", "use_thumbnail": True, "reviews": []
-    }
-    return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if not shop: return False
+        if "products" not in shop: shop["products"] = {}
+        
+        prod_id = f"prod_{int(time.time())}"
+        shop["products"][prod_id] = {
+            "name": name, "price": price, "description": description,
+            "media": media_list, "category": category_id, 
+            "status": "active", "use_thumbnail": True, "reviews": []
+        }
+        return save_shop(uid, shop)
 
 def update_product_field(user_id, prod_id, field, value):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data and "products" in data[uid] and prod_id in data[uid]["products"]:
-        data[uid]["products"][prod_id][field] = value
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop and "products" in shop and prod_id in shop["products"]:
+            shop["products"][prod_id][field] = value
+            return save_shop(uid, shop)
     return False
 
 def toggle_product_thumbnail(user_id, prod_id):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data and "products" in data[uid] and prod_id in data[uid]["products"]:
-        current = data[uid]["products"][prod_id].get("use_thumbnail", True)
-        data[uid]["products"][prod_id]["use_thumbnail"] = not current
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop and "products" in shop and prod_id in shop["products"]:
+            current = shop["products"][prod_id].get("use_thumbnail", True)
+            shop["products"][prod_id]["use_thumbnail"] = not current
+            return save_shop(uid, shop)
     return False
 
 def delete_product(user_id, prod_id):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data and "products" in data[uid] and prod_id in data[uid]["products"]:
-        del data[uid]["products"][prod_id]
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop and "products" in shop and prod_id in shop["products"]:
+            del shop["products"][prod_id]
+            return save_shop(uid, shop)
     return False
 
 def toggle_product_status(user_id, prod_id):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data and "products" in data[uid] and prod_id in data[uid]["products"]:
-        current = data[uid]["products"][prod_id].get("status", "active")
-        new_status = "sold" if current == "active" else "active"
-        data[uid]["products"][prod_id]["status"] = new_status
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop and "products" in shop and prod_id in shop["products"]:
+            current = shop["products"][prod_id].get("status", "active")
+            new_status = "sold" if current == "active" else "active"
+            shop["products"][prod_id]["status"] = new_status
+            return save_shop(uid, shop)
     return False
 
 # ==========================================
@@ -110,29 +167,30 @@ def toggle_product_status(user_id, prod_id):
 # ==========================================
 
 def create_category(user_id, name):
-    data = load_shops()
     uid = str(user_id)
-    if uid not in data: return False
-    if "categories" not in data[uid]: data[uid]["categories"] = {}
-    cat_id = f"cat_{int(time.time())}"
-    data[uid]["categories"][cat_id] = name
-    return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if not shop: return False
+        if "categories" not in shop: shop["categories"] = {}
+        cat_id = f"cat_{int(time.time())}"
+        shop["categories"][cat_id] = name
+        return save_shop(uid, shop)
 
 def delete_category(user_id, cat_id):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data and "categories" in data[uid] and cat_id in data[uid]["categories"]:
-        del data[uid]["categories"][cat_id]
-        if "products" in data[uid]:
-            for pid in data[uid]["products"]:
-                if data[uid]["products"][pid].get("category") == cat_id:
-                    data[uid]["products"][pid]["category"] = None
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop and "categories" in shop and cat_id in shop["categories"]:
+            del shop["categories"][cat_id]
+            if "products" in shop:
+                for pid in shop["products"]:
+                    if shop["products"][pid].get("category") == cat_id:
+                        shop["products"][pid]["category"] = None
+            return save_shop(uid, shop)
     return False
 
 def get_categories(user_id):
-    data = load_shops()
-    return data.get(str(user_id), {}).get("categories", {})
+    return (get_shop(user_id) or {}).get("categories", {})
 
 # ==========================================
 # 🛒 ORDERS & PAYMENTS (Supports Cart)
@@ -143,49 +201,53 @@ def create_order(shop_id, buyer_id, buyer_name, item_summary, price, proof_file_
     item_summary: Can be single item name OR cart summary string.
     order_type: 'product' or 'subscription'
     """
-    data = load_shops()
     sid = str(shop_id)
-    if sid in data:
-        if "orders" not in data[sid]: data[sid]["orders"] = {}
-        
-        order_id = f"ord_{int(time.time())}_{buyer_id}"
-        data[sid]["orders"][order_id] = {
-            "buyer_id": buyer_id,
-            "buyer_name": buyer_name,
-            "item": item_summary,
-            "price": price,
-            "proof": proof_file_id,
-            "type": order_type, 
-            "status": "pending", 
-            "date": int(time.time())
-        }
-        save_shops(data)
-        return order_id
+    with shop_lock:
+        shop = load_shop(sid)
+        if shop:
+            if "orders" not in shop: shop["orders"] = {}
+            
+            order_id = f"ord_{int(time.time())}_{buyer_id}"
+            shop["orders"][order_id] = {
+                "buyer_id": buyer_id,
+                "buyer_name": buyer_name,
+                "item": item_summary,
+                "price": price,
+                "proof": proof_file_id,
+                "type": order_type, 
+                "status": "pending", 
+                "date": int(time.time())
+            }
+            save_shop(sid, shop)
+            return order_id
     return None
 
 def update_order_status(shop_id, order_id, status):
-    data = load_shops()
     sid = str(shop_id)
-    if sid in data and "orders" in data[sid] and order_id in data[sid]["orders"]:
-        data[sid]["orders"][order_id]["status"] = status
-        save_shops(data)
-        return data[sid]["orders"][order_id]
+    with shop_lock:
+        shop = load_shop(sid)
+        if shop and "orders" in shop and order_id in shop["orders"]:
+            shop["orders"][order_id]["status"] = status
+            save_shop(sid, shop)
+            return shop["orders"][order_id]
     return None
 
 def set_payment_info(user_id, text):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data:
-        data[uid]["payment_info"] = text
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop:
+            shop["payment_info"] = text
+            return save_shop(uid, shop)
     return False
 
 def set_subscription_price(user_id, price):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data:
-        data[uid]["subscription_price"] = float(price)
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop:
+            shop["subscription_price"] = float(price)
+            return save_shop(uid, shop)
     return False
 
 # ==========================================
@@ -193,57 +255,62 @@ def set_subscription_price(user_id, price):
 # ==========================================
 
 def toggle_shop_privacy(user_id):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data:
-        current = data[uid].get("privacy", "public")
-        data[uid]["privacy"] = "private" if current == "public" else "public"
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop:
+            current = shop.get("privacy", "public")
+            shop["privacy"] = "private" if current == "public" else "public"
+            return save_shop(uid, shop)
     return False
 
 def add_access_request(shop_owner_id, buyer_id, buyer_info):
-    data = load_shops()
     soid = str(shop_owner_id)
-    if soid in data:
-        if "pending_requests" not in data[soid]: data[soid]["pending_requests"] = []
-        if "customers" not in data[soid]: data[soid]["customers"] = {}
-        if buyer_id not in data[soid]["pending_requests"] and buyer_id not in data[soid].get("approved_users", []):
-            data[soid]["pending_requests"].append(buyer_id)
-            data[soid]["customers"][str(buyer_id)] = buyer_info 
-            save_shops(data)
-            return True
+    with shop_lock:
+        shop = load_shop(soid)
+        if shop:
+            if "pending_requests" not in shop: shop["pending_requests"] = []
+            if "customers" not in shop: shop["customers"] = {}
+            if buyer_id not in shop["pending_requests"] and buyer_id not in shop.get("approved_users", []):
+                shop["pending_requests"].append(buyer_id)
+                shop["customers"][str(buyer_id)] = buyer_info 
+                save_shop(soid, shop)
+                return True
     return False
 
 def approve_access(shop_owner_id, buyer_id):
-    data = load_shops()
     soid = str(shop_owner_id)
-    if soid in data:
-        if "approved_users" not in data[soid]: data[soid]["approved_users"] = []
-        if "pending_requests" not in data[soid]: data[soid]["pending_requests"] = []
-        if buyer_id in data[soid]["pending_requests"]: data[soid]["pending_requests"].remove(buyer_id)
-        if buyer_id not in data[soid]["approved_users"]: data[soid]["approved_users"].append(buyer_id)
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(soid)
+        if shop:
+            if "approved_users" not in shop: shop["approved_users"] = []
+            if "pending_requests" not in shop: shop["pending_requests"] = []
+            if buyer_id in shop["pending_requests"]: shop["pending_requests"].remove(buyer_id)
+            if buyer_id not in shop["approved_users"]: shop["approved_users"].append(buyer_id)
+            return save_shop(soid, shop)
     return False
 
 def deny_access(shop_owner_id, buyer_id):
-    data = load_shops()
     soid = str(shop_owner_id)
-    if soid in data and "pending_requests" in data[soid]:
-        if buyer_id in data[soid]["pending_requests"]:
-            data[soid]["pending_requests"].remove(buyer_id)
-            return save_shops(data)
+    with shop_lock:
+        shop = load_shop(soid)
+        if shop and "pending_requests" in shop:
+            if buyer_id in shop["pending_requests"]:
+                shop["pending_requests"].remove(buyer_id)
+                return save_shop(soid, shop)
     return False
 
 def manual_add_buyer(shop_owner_id, target_id, name="Manual Add"):
-    data = load_shops()
     soid = str(shop_owner_id)
-    if soid in data:
-        if "approved_users" not in data[soid]: data[soid]["approved_users"] = []
-        if target_id not in data[soid]["approved_users"]:
-            data[soid]["approved_users"].append(target_id)
-            if "customers" not in data[soid]: data[soid]["customers"] = {}
-            data[soid]["customers"][str(target_id)] = {'first_name': name, 'username': 'Unknown'}
-            return save_shops(data)
+    with shop_lock:
+        shop = load_shop(soid)
+        if shop:
+            if "approved_users" not in shop: shop["approved_users"] = []
+            if target_id not in shop["approved_users"]:
+                shop["approved_users"].append(target_id)
+                if "customers" not in shop: shop["customers"] = {}
+                shop["customers"][str(target_id)] = {'first_name': name, 'username': 'Unknown'}
+                return save_shop(soid, shop)
     return False
 
 # ==========================================
@@ -251,29 +318,29 @@ def manual_add_buyer(shop_owner_id, target_id, name="Manual Add"):
 # ==========================================
 
 def create_coupon(user_id, code, discount_type, value):
-    data = load_shops()
     uid = str(user_id)
-    if uid not in data: return False
-    if "coupons" not in data[uid]: data[uid]["coupons"] = {}
-    code = code.upper().strip()
-    data[uid]["coupons"][code] = {"type": discount_type, "value": float(value), "created_at": int(time.time())}
-    return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if not shop: return False
+        if "coupons" not in shop: shop["coupons"] = {}
+        code = code.upper().strip()
+        shop["coupons"][code] = {"type": discount_type, "value": float(value), "created_at": int(time.time())}
+        return save_shop(uid, shop)
 
 def delete_coupon(user_id, code):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data and "coupons" in data[uid] and code in data[uid]["coupons"]:
-        del data[uid]["coupons"][code]
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop and "coupons" in shop and code in shop["coupons"]:
+            del shop["coupons"][code]
+            return save_shop(uid, shop)
     return False
 
 def get_coupons(user_id):
-    data = load_shops()
-    return data.get(str(user_id), {}).get("coupons", {})
+    return (get_shop(user_id) or {}).get("coupons", {})
 
 def validate_coupon(shop_id, code):
-    data = load_shops()
-    shop = data.get(str(shop_id))
+    shop = get_shop(shop_id)
     if not shop: return None
     return shop.get("coupons", {}).get(code.upper().strip())
 
@@ -282,22 +349,22 @@ def validate_coupon(shop_id, code):
 # ==========================================
 
 def add_product_review(shop_id, prod_id, user_id, user_name, rating, text):
-    data = load_shops()
     sid = str(shop_id)
-    if sid in data and prod_id in data[sid]["products"]:
-        prod = data[sid]["products"][prod_id]
-        if "reviews" not in prod: prod["reviews"] = []
-        for r in prod["reviews"]:
-            if r["user_id"] == user_id:
-                r["rating"] = rating; r["text"] = text; r["date"] = int(time.time())
-                return save_shops(data)
-        prod["reviews"].append({"user_id": user_id, "name": user_name, "rating": rating, "text": text, "date": int(time.time())})
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(sid)
+        if shop and prod_id in shop["products"]:
+            prod = shop["products"][prod_id]
+            if "reviews" not in prod: prod["reviews"] = []
+            for r in prod["reviews"]:
+                if r["user_id"] == user_id:
+                    r["rating"] = rating; r["text"] = text; r["date"] = int(time.time())
+                    return save_shop(sid, shop)
+            prod["reviews"].append({"user_id": user_id, "name": user_name, "rating": rating, "text": text, "date": int(time.time())})
+            return save_shop(sid, shop)
     return False
 
 def get_product_reviews(shop_id, prod_id):
-    data = load_shops()
-    return data.get(str(shop_id), {}).get("products", {}).get(prod_id, {}).get("reviews", [])
+    return (get_shop(shop_id) or {}).get("products", {}).get(prod_id, {}).get("reviews", [])
 
 def get_product_rating(shop_id, prod_id):
     reviews = get_product_reviews(shop_id, prod_id)
@@ -310,48 +377,54 @@ def get_product_rating(shop_id, prod_id):
 # ==========================================
 
 def set_shop_channel(user_id, channel_id):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data:
-        data[uid]["channel_id"] = channel_id
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop:
+            shop["channel_id"] = channel_id
+            return save_shop(uid, shop)
     return False
 
 def toggle_auto_post(user_id):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data:
-        curr = data[uid].get("auto_post", False)
-        data[uid]["auto_post"] = not curr
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop:
+            curr = shop.get("auto_post", False)
+            shop["auto_post"] = not curr
+            return save_shop(uid, shop)
     return False
 
 def schedule_post(user_id, prod_id, post_time):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data:
-        if "scheduled_posts" not in data[uid]: data[uid]["scheduled_posts"] = []
-        data[uid]["scheduled_posts"].append({"prod_id": prod_id, "run_at": post_time})
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop:
+            if "scheduled_posts" not in shop: shop["scheduled_posts"] = []
+            shop["scheduled_posts"].append({"prod_id": prod_id, "run_at": post_time})
+            return save_shop(uid, shop)
     return False
 
 def get_and_clear_due_posts():
-    data = load_shops()
     now = int(time.time())
     tasks_to_run = []
-    modified = False
-    for uid, shop in data.items():
-        if "scheduled_posts" not in shop or not shop["scheduled_posts"]: continue
-        remaining = []
-        for task in shop["scheduled_posts"]:
-            if task["run_at"] <= now:
-                prod = shop["products"].get(task["prod_id"])
-                if prod and shop.get("channel_id"):
-                    tasks_to_run.append({"channel_id": shop["channel_id"], "product": prod, "shop_name": shop["name"], "shop_owner_id": uid})
-                modified = True
-            else: remaining.append(task)
-        data[uid]["scheduled_posts"] = remaining
-    if modified: save_shops(data)
+    with shop_lock:
+        try: due_ids = get_cache().due_shop_ids(now)
+        except Exception as e:
+            print(f"⚠️ Shop Load Error: {e}")
+            return []
+        for uid in due_ids:
+            shop = load_shop(uid)
+            if not shop or not shop.get("scheduled_posts"): continue
+            remaining = []
+            for task in shop["scheduled_posts"]:
+                if task["run_at"] <= now:
+                    prod = shop["products"].get(task["prod_id"])
+                    if prod and shop.get("channel_id"):
+                        tasks_to_run.append({"channel_id": shop["channel_id"], "product": prod, "shop_name": shop["name"], "shop_owner_id": uid})
+                else: remaining.append(task)
+            shop["scheduled_posts"] = remaining
+            save_shop(uid, shop)
     return tasks_to_run
 
 # ==========================================
@@ -359,37 +432,37 @@ def get_and_clear_due_posts():
 # ==========================================
 
 def update_shop_desc(user_id, new_desc):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data:
-        data[uid]["description"] = new_desc
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop:
+            shop["description"] = new_desc
+            return save_shop(uid, shop)
     return False
 
 def set_shop_banner(user_id, photo_id):
-    data = load_shops()
     uid = str(user_id)
-    if uid in data:
-        data[uid]["banner"] = photo_id
-        return save_shops(data)
+    with shop_lock:
+        shop = load_shop(uid)
+        if shop:
+            shop["banner"] = photo_id
+            return save_shop(uid, shop)
     return False
 
 def get_shop_backup_data(user_id):
-    data = load_shops()
-    return data.get(str(user_id))
+    return load_shop(user_id)
 
 def restore_shop_data(user_id, backup_data):
-    data = load_shops()
     uid = str(user_id)
     required_keys = ["owner_id", "name", "products"]
     if not all(key in backup_data for key in required_keys): return False, "Invalid File."
     backup_data["owner_id"] = user_id
-    data[uid] = backup_data
-    if save_shops(data): return True, "Restored!"
-    else: return False, "Save error."
+    with shop_lock:
+        if save_shop(uid, backup_data): return True, "Restored!"
+        else: return False, "Save error."
 
 def get_shop_analytics(user_id):
-    shop = get_shop(user_id)
+    shop = _peek_shop(user_id)
     if not shop: return None
     orders = shop.get("orders", {})
     products = shop.get("products", {})
@@ -0,0 +1,122 @@
+import os
+import re
+import shutil
+import subprocess
+
+# ==========================================
+# ✂️ SIZE-TARGETED VIDEO SPLITTER (Keyframe-aligned)
+# ==========================================
+# টেলিগ্রামের আপলোড লিমিটের চেয়ে বড় ভিডিও ভাগ করার জন্য। আগে ডিউরেশন সমান ভাগ করে
+# প্রতিটি অংশের জন্য আলাদা ffmpeg চলত, কাট কী-ফ্রেমে পড়ত না আর বিটরেট ওঠানামায় অংশ
+# লিমিট ছাড়িয়ে যেত বা খালি আসত। এখন:
+# 1. ffmpeg এর framecrc প্যাকেট লিস্ট (ডিকোড ছাড়া, ffprobe লাগে না) থেকে কী-ফ্রেমের সময়
+#    আর সেই পর্যন্ত জমা বাইট বের করা
+# 2. প্রতিটি অংশ যত বড় সম্ভব কিন্তু টার্গেটের নিচে রেখে কী-ফ্রেমে কাট পয়েন্ট বাছাই
+# 3. একটাই ffmpeg segment-muxer পাস (-c copy), কোনো রি-এনকোড নেই
+# 4. প্রতিটি অংশ লিমিটের সাথে মিলিয়ে দেখা; বড় হলে শুধু সেটাকে ছোট টার্গেটে আবার ভাগ
+
+SAFETY = 0.94             # কন্টেইনার ওভারহেড আর বিটরেট অনুমানের ভুলের জন্য জায়গা
+MAX_RESPLIT_DEPTH = 2
+SPLIT_TIMEOUT = int(os.environ.get("SPLIT_TIMEOUT", "600"))  # সেকেন্ড
+
+
+def find_ffmpeg():
+    path = shutil.which("ffmpeg") or os.environ.get("IMAGEIO_FFMPEG_EXE")
+    return path if path and os.path.exists(path) else None
+
+
+def probe_keyframes(ffmpeg_bin, path):
+    """
+    ([(keyframe_time, bytes_before_it), ...], total_bytes) from the packet
+    list of a stream-copy pass into ffmpeg's framecrc muxer (no decoding; works
+    without ffprobe). Audio packets are counted too. None if there is no video.
+    """
+    proc = subprocess.run(
+        [ffmpeg_bin, "-hide_banner", "-loglevel", "error", "-i", path, "-map", "0", "-c", "copy", "-f", "framecrc", "-"],
+        capture_output=True, text=True, timeout=SPLIT_TIMEOUT
+    )
+    time_base, video, packets = {}, None, []
+    for line in proc.stdout.splitlines():
+        if line.startswith("#"):
+            m = re.match(r"#tb (\d+): (\d+)/(\d+)", line)
+            if m: time_base[int(m.group(1))] = int(m.group(2)) / int(m.group(3))
+            m = re.match(r"#media_type (\d+): video", line)
+            if m and video is None: video = int(m.group(1))
+            continue
+        fields = [f.strip() for f in line.split(",")]
+        try:
+            idx, pts, size = int(fields[0]), int(fields[2]), int(fields[4])
+            flags = next((int(f[2:], 16) for f in fields[6:] if f.startswith("F=")), 1) # F= না থাকলে কী-ফ্রেম
+        except (IndexError, ValueError): continue
+        packets.append((pts * time_base.get(idx, 0), size, idx == video and flags & 1))
+    if video is None or not packets: return None
+    packets.sort(key=lambda x: x[0])
+
+    keyframes, total = [], 0
+    for t, size, is_key in packets:
+        if is_key: keyframes.append((t, total))
+        total += size
+    return keyframes, total
+
+
+def plan_cuts(keyframes, total, target):
+    """Greedy: each part ends at the last keyframe that keeps it under `target` bytes."""
+    cuts, part_start, prev = [], 0, None
+    for t, offset in keyframes:
+        if offset - part_start > target and prev is not None and prev[1] > part_start:
+            cuts.append(prev[0])
+            part_start = prev[1]
+        prev = (t, offset)
+    # শেষ অংশও বড় হলে শেষ কী-ফ্রেমে একটা কাট
+    if prev is not None and total - part_start > target and prev[1] > part_start:
+        cuts.append(prev[0])
+    return [t for t in cuts if t > 0]
+
+
+def segment(ffmpeg_bin, path, output_dir, cuts, prefix):
+    """One ffmpeg pass that cuts `path` at `cuts` (seconds). Returns the part paths in order."""
+    base, ext = os.path.splitext(os.path.basename(path))
+    pattern = os.path.join(output_dir, f"{prefix}%03d_{base}{ext}")
+    cmd = [ffmpeg_bin, "-hide_banner", "-loglevel", "error", "-y", "-i", path, "-map", "0", "-c", "copy",
+           "-f", "segment", "-segment_times", ",".join(f"{t:.3f}" for t in cuts), "-reset_timestamps", "1"]
+    if ext.lower() in (".mp4", ".mov", ".m4v"): cmd += ["-segment_format_options", "movflags=+faststart"]
+    proc = subprocess.run(cmd + [pattern], capture_output=True, text=True, timeout=SPLIT_TIMEOUT)
+    if proc.returncode != 0: raise RuntimeError(proc.stderr.strip()[-300:] or "ffmpeg segment failed")
+    parts = sorted(os.path.join(output_dir, f) for f in os.listdir(output_dir)
+                   if f.startswith(prefix) and f.endswith(f"_{base}{ext}"))
+    return parts
+
+
+def split_video(path, output_dir, max_bytes):
+    """
+    Splits `path` into keyframe-aligned parts of at most `max_bytes` each
+    (stream copy). Returns [path] when it already fits or cannot be split;
+    empty parts are dropped. A part that still overshoots is re-split with a
+    smaller target (up to MAX_RESPLIT_DEPTH); one GOP larger than the limit
+    cannot be cut and is returned as is.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0: return []
+    if os.path.getsize(path) <= max_bytes: return [path]
+    ffmpeg_bin = find_ffmpeg()
+    if not ffmpeg_bin: return [path]
+    return _split(ffmpeg_bin, path, output_dir, max_bytes, max_bytes * SAFETY, 0)
+
+
+def _split(ffmpeg_bin, path, output_dir, max_bytes, target, depth):
+    probed = probe_keyframes(ffmpeg_bin, path)
+    cuts = plan_cuts(*probed, target) if probed else []
+    if not cuts: return [path]
+
+    prefix = f"part{depth}_" if depth else "part_"
+    parts = [p for p in segment(ffmpeg_bin, path, output_dir, cuts, prefix) if os.path.getsize(p) > 0]
+    if not parts: return [path]
+    if depth: os.remove(path) # মাঝের ধাপের অংশ, আর লাগবে না
+
+    # যাচাই: লিমিট ছাড়ানো অংশ শুধু সেটাকেই ছোট টার্গেটে আবার ভাগ
+    checked = []
+    for part in parts:
+        part_size = os.path.getsize(part)
+        if part_size > max_bytes and depth < MAX_RESPLIT_DEPTH:
+            checked.extend(_split(ffmpeg_bin, part, output_dir, max_bytes, target * max_bytes / part_size, depth + 1))
+        else: checked.append(part)
+    return checked
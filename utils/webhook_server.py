@@ -0,0 +1,53 @@
+import logging
+import threading
+from flask import Flask, request, abort
+from telebot.types import Update
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# 🌐 WEBHOOK SERVER (Flask)
+# ==========================================
+# টেলিগ্রাম আপডেট HTTP POST করে পাঠায়, আমরা শুধু কিউতে রেখে সাথে সাথে 200 দিই।
+# কিউ ভরা থাকলে 503 দিলে টেলিগ্রাম নিজেই পরে আবার পাঠায় (ব্যাকপ্রেশার)।
+
+
+def create_webhook_app(dispatcher, path, secret_token=None):
+    app = Flask(__name__)
+
+    @app.route(f"/{path}", methods=["POST"])
+    def receive_update():
+        if secret_token and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret_token:
+            abort(403)
+        try:
+            update = Update.de_json(request.get_data(as_text=True))
+        except Exception:
+            abort(400)
+        if not dispatcher.submit(update):
+            logger.warning("⚠️ Update queue full, asking Telegram to retry later")
+            return "busy", 503
+        return "", 200
+
+    @app.route("/healthz", methods=["GET"])
+    def healthz():
+        return "ok", 200
+
+    return app
+
+
+def start_webhook(bot, dispatcher, public_url, host="0.0.0.0", port=8080, secret_token=None):
+    """Registers the webhook with Telegram and serves it on a background thread."""
+    path = f"webhook/{bot.token.split(':')[0]}"
+    app = create_webhook_app(dispatcher, path, secret_token)
+
+    bot.remove_webhook()
+    bot.set_webhook(url=f"{public_url.rstrip('/')}/{path}", secret_token=secret_token, drop_pending_updates=True)
+
+    server = threading.Thread(
+        target=app.run,
+        kwargs={"host": host, "port": port, "threaded": True, "use_reloader": False},
+        name="webhook-server",
+        daemon=True
+    )
+    server.start()
+    logger.info(f"🌐 Webhook server listening on {host}:{port}/{path}")